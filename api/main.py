@@ -1,29 +1,133 @@
+import asyncio
+import json
 import os
-from typing import List, Optional, Any, Dict
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
-from fastapi.responses import JSONResponse, HTMLResponse
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, List, Optional, Any, Dict, Tuple
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
 
 from src.data_ingestion.data_ingestion import (
     ChatIngestor,
     DocumentHandler,
     DocumentComparator,
 )
-from src.document_analyzer.data_analysis import DocumentAnalyzer
-from src.document_compare.document_comparator import DocumentComparatorLLM
+from src.document_analyzer.data_analysis import (
+    DocumentAnalyzer,
+    get_document_analyzer,
+)
+from src.document_compare.document_comparator import (
+    DocumentComparatorLLM,
+    get_document_comparator_llm,
+)
 # from src.document_chat.retrieval import ConversationalRAG
 
 from src.multi_doc_chat.retriever import ConversationalRAG
+from utils.config_loader import load_config
+from utils.storage_manager import StorageSweeper, lease
+from utils.admission import (
+    AdmissionRejected,
+    estimate_cost,
+    get_admission_controller,
+)
+from utils.metrics import REQUEST_LATENCY, server_timing, span, start_trace
+from utils.model_loader import ModelLoader
+from utils.parse_cache import parse_pdf, sha256_of
+from utils.reference_registry import (
+    get_reference_registry,
+    page_hashes,
+    unchanged_rows,
+)
+from utils.result_cache import get_result_cache
+from utils.warmup import Warmup, WarmupStep, preload_indexes, prime_providers
 
 FAISS_BASE = os.getenv("FAISS_BASE", "faiss_index")
 UPLOAD_BASE = os.getenv("UPLOAD_BASE", "data")
 FAISS_INDEX_NAME = os.getenv("FAISS_INDEX_NAME", "index")
 
+
+def _warmup_steps(config: Dict[str, Any]) -> List[WarmupStep]:
+    """Models and chains are required for readiness; the rest is best-effort."""
+    warmup_cfg = config.get("warmup", {})
+    built: List[ModelLoader] = []
+
+    def loader() -> ModelLoader:
+        # Built by the first step, so missing API keys fail that step (and
+        # /ready) instead of startup.
+        if not built:
+            built.append(ModelLoader())
+        return built[0]
+
+    steps: List[WarmupStep] = [
+        ("embeddings", lambda: loader().load_embeddings(), True),
+        ("llm", lambda: loader().load_llm(), True),
+        ("analyzer", get_document_analyzer, True),
+        ("comparator", get_document_comparator_llm, True),
+    ]
+    preload = int(warmup_cfg.get("preload_indexes", 0))
+    if preload > 0:
+        steps.append(
+            (
+                "indexes",
+                lambda: preload_indexes(
+                    FAISS_BASE, preload, loader().load_embeddings()
+                ),
+                False,
+            )
+        )
+    if warmup_cfg.get("prime_providers", False):
+        steps.append(
+            (
+                "providers",
+                lambda: prime_providers(
+                    loader().load_embeddings(), loader().load_llm()
+                ),
+                False,
+            )
+        )
+    return steps
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    config = load_config()
+    storage_cfg = config.get("storage", {})
+    sweeper = None
+    if storage_cfg.get("enabled", False):
+        sweeper = StorageSweeper(storage_cfg)
+        sweeper.start()
+    app.state.storage_sweeper = sweeper
+    # Warm-up runs in the background so /health answers at once; /ready
+    # reports when the shared clients and chains are built.
+    warmup = Warmup()
+    app.state.warmup = warmup
+    if config.get("warmup", {}).get("enabled", True):
+        app.state.warmup_task = asyncio.create_task(
+            asyncio.to_thread(warmup.run, _warmup_steps(config))
+        )
+    else:
+        warmup.run([])
+    yield
+    if sweeper:
+        sweeper.stop()
+
+
 app = FastAPI(
     title="Document Portal API",
+    lifespan=lifespan,
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
@@ -37,6 +141,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    trace = start_trace()
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template, not raw path, to keep metric cardinality bounded.
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    REQUEST_LATENCY.labels(route, request.method, response.status_code).observe(
+        time.perf_counter() - start
+    )
+    if trace:
+        response.headers["Server-Timing"] = server_timing(trace)
+    return response
+
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
@@ -54,36 +174,249 @@ def health() -> Dict[str, str]:
     return {"status": "ok", "service": "document-portal"}
 
 
+@app.get("/ready")
+def ready(request: Request) -> JSONResponse:
+    """200 once warm-up has finished; 503 while warming or if it failed."""
+    warmup = getattr(request.app.state, "warmup", None)
+    if warmup is None:
+        return JSONResponse({"status": "ready", "steps": {}})
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if warmup.ready else 503)
+
+
+@app.get("/metrics")
+def metrics() -> Response:
+    # With several workers, PROMETHEUS_MULTIPROC_DIR makes every worker write its
+    # samples to a shared directory that is aggregated here.
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/admission/stats")
+def admission_stats() -> Dict[str, Any]:
+    controller = get_admission_controller()
+    return {"enabled": controller.enabled, **controller.stats()}
+
+
+@app.get("/storage/stats")
+def storage_stats(request: Request) -> Dict[str, Any]:
+    sweeper = request.app.state.storage_sweeper
+    if sweeper is None:
+        return {"enabled": False}
+    return {"enabled": True, **sweeper.stats()}
+
+
 # ---------- ANALYZE ----------
 @app.post("/analyze")
 async def analyze_document(file: UploadFile = File(...)) -> Any:
     try:
-        dh = DocumentHandler()
-        saved_path = dh.save_pdf(FastAPIFileAdapter(file))
-        text = _read_pdf_via_handler(dh, saved_path)
-        analyzer = DocumentAnalyzer()
-        result = analyzer.analyze_document(text)
-        return JSONResponse(content=result)
+        upload = FastAPIFileAdapter(file)
+        async with _admitted("analyze", [upload]):
+            dh = DocumentHandler()
+            # Small uploads come back as bytes and are parsed without touching disk.
+            source = await run_in_threadpool(dh.open_upload, upload)
+
+            analyzer = await run_in_threadpool(get_document_analyzer)
+
+            def _analyze():
+                return analyzer.analyze_pdf(source)
+
+            key = DocumentAnalyzer.cache_key([sha256_of(source)], analyzer.loader)
+            # Blocking LLM work runs off the event loop so gateway waits never stall it.
+            result, hit = await run_in_threadpool(
+                get_result_cache().get_or_compute, key, "analyze", _analyze
+            )
+            return JSONResponse(content=result, headers={"X-Cache": _cache_header(hit)})
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {e}")
 
 
+@app.post("/analyze/batch")
+async def analyze_batch(
+    files: List[UploadFile] = File(...),
+    max_concurrency: Optional[int] = Form(None, gt=0),
+) -> StreamingResponse:
+    """
+    Analyze many PDFs in one request. Results stream back as NDJSON, one line per
+    file in completion order, followed by a summary line with status "done".
+    """
+    max_files = int(
+        load_config().get("analysis", {}).get("batch", {}).get("max_files", 200)
+    )
+    if len(files) > max_files:
+        raise HTTPException(
+            status_code=413, detail=f"At most {max_files} files per batch."
+        )
+    # Held until the stream ends, not just until this handler returns.
+    release = await _admit("analyze_batch", [FastAPIFileAdapter(f) for f in files])
+
+    def _prepare():
+        dh = DocumentHandler()
+        analyzer = get_document_analyzer()
+        saved: List[tuple] = []
+        rejected: List[Dict[str, Any]] = []
+        seen: set = set()
+        for index, file in enumerate(files):
+            adapter = FastAPIFileAdapter(file)
+            if adapter.name in seen:  # keep same-named uploads from overwriting
+                adapter.name = f"{index}_{adapter.name}"
+            seen.add(adapter.name)
+            try:
+                saved.append((index, dh.save_pdf(adapter)))
+            except Exception as e:
+                rejected.append(
+                    {
+                        "index": index,
+                        "file": file.filename,
+                        "status": "error",
+                        "error": str(e.__cause__ or e),
+                    }
+                )
+        return dh, analyzer, saved, rejected
+
+    try:
+        # Building the analyzer and saving up to max_files uploads is blocking.
+        dh, analyzer, saved, rejected = await run_in_threadpool(_prepare)
+    except Exception as e:
+        release()
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {e}")
+    except BaseException:  # cancelled, e.g. the client went away
+        release()
+        raise
+
+    async def _stream():
+        counts = {"ok": 0, "error": len(rejected)}
+        try:
+            for record in rejected:
+                yield json.dumps(record) + "\n"
+            with lease(dh.session_path):
+                async for record in analyzer.analyze_files(
+                    [path for _, path in saved],
+                    max_concurrency=max_concurrency,
+                    cache=get_result_cache(),
+                ):
+                    record["index"] = saved[record["index"]][0]
+                    counts[record["status"]] += 1
+                    yield json.dumps(record, ensure_ascii=False) + "\n"
+        finally:
+            release()
+        yield (
+            json.dumps({"status": "done", "session_id": dh.session_id, **counts}) + "\n"
+        )
+
+    # The background task releases too if the stream never starts.
+    return StreamingResponse(
+        _stream(), media_type="application/x-ndjson", background=BackgroundTask(release)
+    )
+
+
+@app.post("/compare/references")
+async def add_reference(
+    file: UploadFile = File(...), reference_id: Optional[str] = Form(None)
+) -> Any:
+    """Store a reference PDF version that later /compare calls can name by id."""
+    try:
+        adapter = FastAPIFileAdapter(file)
+        data = await run_in_threadpool(adapter.getbuffer)
+        record, created = await run_in_threadpool(
+            get_reference_registry().add, adapter.name, data, reference_id or None
+        )
+        return {**record, "created": created}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Storing reference failed: {e}")
+
+
+@app.get("/compare/references")
+def list_references() -> Dict[str, Any]:
+    return {"references": get_reference_registry().list()}
+
+
+@app.get("/compare/references/{reference_id}")
+def get_reference(reference_id: str, version: Optional[int] = None) -> Any:
+    try:
+        return get_reference_registry().get(reference_id, version)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+
 @app.post("/compare")
 async def compare_documents(
-    reference: UploadFile = File(...), actual: UploadFile = File(...)
+    response: Response,
+    actual: UploadFile = File(...),
+    reference: Optional[UploadFile] = File(None),
+    reference_id: Optional[str] = Form(None),
+    reference_version: Optional[int] = Form(None),
 ) -> Any:
-    try:
-        dc = DocumentComparator()
-        ref_path, act_path = dc.save_uploaded_files(
-            FastAPIFileAdapter(reference), FastAPIFileAdapter(actual)
+    """
+    Compare an uploaded PDF against either an uploaded reference or a stored
+    one named by reference_id (latest version unless reference_version).
+    """
+    if (reference is None) == (not reference_id):
+        raise HTTPException(
+            status_code=400, detail="Send exactly one of reference or reference_id."
         )
-        _ = ref_path, act_path
-        combined_text = dc.combine_documents()
-        comp = DocumentComparatorLLM()
-        df = comp.compare_documents(combined_text)
-        return {"rows": df.to_dict(orient="records"), "session_id": dc.session_id}
+    try:
+        act_upload = FastAPIFileAdapter(actual)
+        uploads = [act_upload]
+        ref_pages = 0
+        if reference_id:
+            try:
+                ref_pages = get_reference_registry().get(
+                    reference_id, reference_version
+                )["page_count"]
+            except (KeyError, ValueError) as e:
+                raise HTTPException(status_code=404, detail=str(e.args[0]))
+        else:
+            uploads.append(FastAPIFileAdapter(reference))
+        async with _admitted("compare", uploads, pages=ref_pages):
+            dc = DocumentComparator()
+            if reference_id:
+                try:
+                    record, ref_parsed = await run_in_threadpool(
+                        get_reference_registry().load, reference_id, reference_version
+                    )
+                except (KeyError, ValueError) as e:
+                    raise HTTPException(status_code=404, detail=str(e.args[0]))
+                act_path = await run_in_threadpool(dc.save_uploaded_file, act_upload)
+                doc_hashes = [
+                    record["sha256"],
+                    await run_in_threadpool(sha256_of, act_path),
+                ]
+
+                def _compare():
+                    with span("parse"):
+                        act_parsed = parse_pdf(act_path)
+                    if page_hashes(act_parsed) == record["page_hashes"]:
+                        return unchanged_rows(act_parsed)
+                    combined_text = dc.combine_parsed(
+                        [(record["file_name"], ref_parsed), (act_path.name, act_parsed)]
+                    )
+                    df = comparator.compare_documents(combined_text)
+                    return df.to_dict(orient="records")
+            else:
+                dc.save_uploaded_files(uploads[1], act_upload)
+                doc_hashes = dc.document_hashes()
+
+                def _compare():
+                    combined_text = dc.combine_documents()
+                    df = comparator.compare_documents(combined_text)
+                    return df.to_dict(orient="records")
+
+            comparator = await run_in_threadpool(get_document_comparator_llm)
+            key = DocumentComparatorLLM.cache_key(doc_hashes, comparator.loader)
+            rows, hit = await run_in_threadpool(
+                get_result_cache().get_or_compute, key, "compare", _compare
+            )
+            response.headers["X-Cache"] = _cache_header(hit)
+            return {"rows": rows, "session_id": dc.session_id}
     except HTTPException:
         raise
     except Exception as e:
@@ -92,33 +425,97 @@ async def compare_documents(
 
 @app.post("/chat/index")
 async def chat_build_index(
-    files: List[UploadFile] = File(...),
+    files: List[UploadFile] = File(default_factory=list),
     session_id: Optional[str] = Form(None),
     use_session_dirs: bool = Form(True),
     chunk_size: int = Form(1000),
     chunk_overlap: int = Form(200),
     k: int = Form(5),
+    replace: bool = Form(False),
 ) -> Any:
     try:
         wrapped = [FastAPIFileAdapter(f) for f in files]
+        async with _admitted("chat_index", wrapped):
+            chat_ingestor = ChatIngestor(
+                temp_base=UPLOAD_BASE,
+                faiss_base=FAISS_BASE,
+                use_session_dirs=use_session_dirs,
+                session_id=session_id or None,
+            )
+            with lease(chat_ingestor.faiss_dir):
+                await run_in_threadpool(
+                    chat_ingestor.build_retriever,
+                    wrapped,
+                    chunk_size=chunk_size,
+                    chunk_overlap=chunk_overlap,
+                    k=k,
+                    replace=replace,
+                )
+            report = chat_ingestor.last_report
+            return {
+                "session_id": chat_ingestor.session_id,
+                "k": k,
+                "use_session_dirs": use_session_dirs,
+                "files_added": report.files_added,
+                "files_skipped": report.files_skipped,
+                "chunks_added": report.chunks_added,
+                "chunks_skipped": report.chunks_skipped,
+                "files_replaced": report.files_replaced,
+                "chunks_removed": report.chunks_removed,
+                "files_resumed": report.files_resumed,
+                "chunks_resumed": report.chunks_resumed,
+                "chunks_deduplicated": report.chunks_deduplicated,
+            }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Indexing failed: {e}")
+
+
+@app.post("/chat/index/remove")
+async def chat_remove_documents(
+    session_id: str = Form(...),
+    documents: List[str] = Form(...),
+    use_session_dirs: bool = Form(True),
+) -> Any:
+    """Remove documents (file names or content hashes) from a session index."""
+    try:
+        index_dir = (
+            os.path.join(FAISS_BASE, session_id) if use_session_dirs else FAISS_BASE
+        )
+        if not os.path.isdir(index_dir):
+            raise HTTPException(
+                status_code=404, detail=f"Index directory not found: {index_dir}"
+            )
         chat_ingestor = ChatIngestor(
             temp_base=UPLOAD_BASE,
             faiss_base=FAISS_BASE,
             use_session_dirs=use_session_dirs,
-            session_id=session_id or None,
-        )
-        chat_ingestor.build_retriever(
-            wrapped, chunk_size=chunk_size, chunk_overlap=chunk_overlap, k=k
+            session_id=session_id,
         )
-        return {
-            "session_id": chat_ingestor.session_id,
-            "k": k,
-            "use_session_dirs": use_session_dirs,
-        }
+        with lease(index_dir):
+            result = await run_in_threadpool(chat_ingestor.remove_documents, documents)
+        if not result["removed"]:
+            raise HTTPException(status_code=404, detail="No matching documents")
+        return {"session_id": session_id, **result}
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Indexing failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Removal failed: {e}")
+
+
+def _page_range(page: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Parse a 1-based page or page range ("3", "2-5") into 0-based bounds."""
+    if not page:
+        return None
+    try:
+        first, _, last = page.partition("-")
+        bounds = (int(first), int(last or first))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid page filter: {page}")
+    if bounds[0] < 1 or bounds[1] < bounds[0]:
+        raise HTTPException(status_code=400, detail=f"Invalid page filter: {page}")
+    return bounds[0] - 1, bounds[1] - 1
 
 
 @app.post("/chat/query")
@@ -127,6 +524,8 @@ async def chat_query(
     session_id: Optional[str] = Form(None),
     use_session_dirs: bool = Form(True),
     k: int = Form(5),
+    source: Optional[List[str]] = Form(None),
+    page: Optional[str] = Form(None),
 ) -> Any:
     try:
         if use_session_dirs and not session_id:
@@ -134,6 +533,7 @@ async def chat_query(
                 status_code=400,
                 detail="Session ID is required when using session directories.",
             )
+        pages = _page_range(page)
 
         # Prepare FAISS index path
         index_dir = (
@@ -144,11 +544,18 @@ async def chat_query(
                 status_code=404, detail=f"Index directory not found: {index_dir}"
             )
 
-        # Initialize LCEL-style RAG pipeline
-        rag = ConversationalRAG(session_id=session_id)
-        rag.load_retriever_from_faiss(index_dir)
+        with lease(index_dir):
+            # Initialize LCEL-style RAG pipeline
+            rag = ConversationalRAG(session_id=session_id)
+            await run_in_threadpool(
+                rag.load_retriever_from_faiss,
+                index_dir,
+                k=k,
+                sources=source or None,
+                pages=pages,
+            )
 
-        response = rag.invoke(question, chat_history=[])
+            response = await run_in_threadpool(rag.invoke, question, chat_history=[])
         return {
             "answer": response,
             "session_id": session_id,
@@ -161,6 +568,70 @@ async def chat_query(
         raise HTTPException(status_code=500, detail=f"Indexing failed: {e}")
 
 
+@app.post("/chat/query/batch")
+async def chat_query_batch(
+    questions: List[str] = Form(...),
+    session_id: Optional[str] = Form(None),
+    use_session_dirs: bool = Form(True),
+    k: int = Form(5),
+    source: Optional[List[str]] = Form(None),
+    page: Optional[str] = Form(None),
+    max_concurrency: Optional[int] = Form(None),
+) -> Any:
+    """
+    Answer many independent questions against one session. Results come back
+    in question order; a failed question carries an error instead of an answer.
+    """
+    max_questions = int(
+        load_config().get("chat", {}).get("batch", {}).get("max_questions", 500)
+    )
+    if len(questions) > max_questions:
+        raise HTTPException(
+            status_code=413, detail=f"At most {max_questions} questions per batch."
+        )
+    try:
+        if use_session_dirs and not session_id:
+            raise HTTPException(
+                status_code=400,
+                detail="Session ID is required when using session directories.",
+            )
+        pages = _page_range(page)
+        index_dir = (
+            os.path.join(FAISS_BASE, session_id) if use_session_dirs else FAISS_BASE
+        )
+        if not os.path.isdir(index_dir):
+            raise HTTPException(
+                status_code=404, detail=f"Index directory not found: {index_dir}"
+            )
+
+        with lease(index_dir):
+            rag = ConversationalRAG(session_id=session_id)
+            await run_in_threadpool(
+                rag.load_retriever_from_faiss,
+                index_dir,
+                k=k,
+                sources=source or None,
+                pages=pages,
+            )
+            answers = await rag.abatch(questions, max_concurrency=max_concurrency)
+        results = [
+            {"question": q, "error": str(a)}
+            if isinstance(a, Exception)
+            else {"question": q, "answer": a}
+            for q, a in zip(questions, answers)
+        ]
+        return {
+            "session_id": session_id,
+            "k": k,
+            "engine": "LCEL-RAG",
+            "results": results,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch query failed: {e}")
+
+
 # ---------- Helpers ----------
 class FastAPIFileAdapter:
     """Adapt FastAPI UploadFile -> .name + .getbuffer() API"""
@@ -168,15 +639,60 @@ class FastAPIFileAdapter:
     def __init__(self, uf: UploadFile):
         self._uf = uf
         self.name = uf.filename
+        self.size = uf.size if uf.size is not None else _spooled_size(uf.file)
 
     def getbuffer(self) -> bytes:
         self._uf.file.seek(0)
         return self._uf.file.read()
 
 
-def _read_pdf_via_handler(handler: DocumentHandler, path: str) -> str:
-    if hasattr(handler, "read_pdf"):
-        return handler.read_pdf(path)  # type: ignore
-    if hasattr(handler, "read_"):
-        return handler.read_(path)  # type: ignore
-    raise RuntimeError("DocHandler has neither read_pdf nor read_ method.")
+def _spooled_size(f) -> int:
+    position = f.tell()
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(position)
+    return size
+
+
+async def _admit(
+    endpoint: str, uploads: List[FastAPIFileAdapter], pages: int = 0
+) -> Callable[[], None]:
+    """
+    Wait for admission of the request's estimated cost; 503 + Retry-After if
+    busy. Returns the release callback, which is safe to call more than once.
+    """
+    controller = get_admission_controller()
+    if not controller.enabled:
+        return lambda: None
+    cost = estimate_cost(uploads, controller.cost_settings, pages)
+    try:
+        await controller.acquire(endpoint, cost)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    released = False
+
+    def release() -> None:
+        nonlocal released
+        if not released:
+            released = True
+            controller.release(endpoint, cost)
+
+    return release
+
+
+@asynccontextmanager
+async def _admitted(endpoint: str, uploads: List[FastAPIFileAdapter], pages: int = 0):
+    """Hold admission for the request's estimated cost; 503 + Retry-After if busy."""
+    release = await _admit(endpoint, uploads, pages)
+    try:
+        yield
+    finally:
+        release()
+
+
+def _cache_header(hit: bool) -> str:
+    return "HIT" if hit else "MISS"
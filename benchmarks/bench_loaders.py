@@ -0,0 +1,116 @@
+"""
+Compare the registry loaders in utils.document_ops against the LangChain
+loaders previously selected by DocumentIngestor.ingest_files.
+
+Usage:
+    python -m benchmarks.bench_loaders [--data-dir data] [--repeat 5]
+"""
+
+import argparse
+import hashlib
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from utils.document_ops import get_loader, supported_extensions
+
+
+def _legacy_loader(path: Path) -> Optional[Callable]:
+    """Return the loader the old if/elif chain would have used, if importable."""
+    ext = path.suffix.lower()
+    try:
+        if ext == ".pdf":
+            from langchain_community.document_loaders import PyPDFLoader
+
+            return lambda: PyPDFLoader(str(path)).load()
+        if ext == ".docx":
+            from langchain_community.document_loaders import Docx2txtLoader
+
+            return lambda: Docx2txtLoader(str(path)).load()
+        if ext == ".txt":
+            from langchain_community.document_loaders import TextLoader
+
+            return lambda: TextLoader(str(path)).load()
+        if ext == ".md":
+            from langchain_community.document_loaders.markdown import (
+                UnstructuredMarkdownLoader,
+            )
+
+            return lambda: UnstructuredMarkdownLoader(str(path)).load()
+    except ImportError:
+        return None
+    return None
+
+
+def _sample_files(data_dir: Path) -> List[Path]:
+    """Unique (by content) non-empty supported files under data_dir."""
+    seen = set()
+    files = []
+    exts = set(supported_extensions())
+    for path in sorted(data_dir.rglob("*")):
+        if not path.is_file() or path.suffix.lower() not in exts:
+            continue
+        data = path.read_bytes()
+        if not data:
+            continue
+        digest = hashlib.sha256(data).hexdigest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        files.append(path)
+    return files
+
+
+def _time(fn: Callable, repeat: int) -> Dict[str, float]:
+    pages = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        pages = len(fn())
+    elapsed = time.perf_counter() - start
+    return {
+        "pages": pages,
+        "seconds": elapsed / repeat,
+        "pages_per_sec": pages * repeat / elapsed,
+    }
+
+
+def run(data_dir: Path, repeat: int) -> List[Dict]:
+    rows = []
+    for path in _sample_files(data_dir):
+        row = {"file": str(path), "new": None, "legacy": None}
+        row["new"] = _time(lambda: get_loader(str(path)).load(), repeat)
+        legacy = _legacy_loader(path)
+        if legacy is not None:
+            try:
+                row["legacy"] = _time(legacy, repeat)
+            except Exception as e:  # missing optional parser backends
+                row["legacy_error"] = str(e)
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'file':<60} {'pages':>5} {'new p/s':>10} {'legacy p/s':>11} {'speedup':>8}"
+    )
+    for row in run(Path(args.data_dir), args.repeat):
+        new, legacy = row["new"], row["legacy"]
+        legacy_pps = f"{legacy['pages_per_sec']:.1f}" if legacy else "n/a"
+        speedup = (
+            f"{new['pages_per_sec'] / legacy['pages_per_sec']:.1f}x"
+            if legacy and legacy["pages_per_sec"]
+            else "-"
+        )
+        print(
+            f"{Path(row['file']).name[:60]:<60} {new['pages']:>5} "
+            f"{new['pages_per_sec']:>10.1f} {legacy_pps:>11} {speedup:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Request-path overhead of logging: the previous synchronous basicConfig file
+logger with eager f-strings versus the queue-backed JSON logger.
+
+Only the time spent in the calling thread is measured; that is what a request
+pays. Usage:
+    python -m benchmarks.bench_logging [--calls 20000]
+"""
+
+import argparse
+import logging
+import queue
+import tempfile
+import time
+from logging.handlers import QueueListener
+from pathlib import Path
+
+from logger.custom_logger import JsonFormatter, StructuredLogger, _LazyQueueHandler
+
+ANSWER = "The attention mechanism lets the model weigh tokens. " * 400  # ~20 KB
+
+
+class _Model:
+    """Stands in for an LLM client whose repr is costly to build."""
+
+    def __repr__(self):
+        return "ChatGroq(" + ", ".join(f"param_{i}={i}" for i in range(200)) + ")"
+
+
+def _legacy_logger(path: Path) -> logging.Logger:
+    logger = logging.getLogger("bench.legacy")
+    logger.propagate = False
+    handler = logging.FileHandler(path)
+    handler.setFormatter(
+        logging.Formatter(
+            "[ %(asctime)s ] %(levelname)s %(name)s (line:%(lineno)d) - %(message)s"
+        )
+    )
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def _queued_logger(path: Path):
+    base = logging.getLogger("bench.queued")
+    base.propagate = False
+    q: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=100000)
+    base.addHandler(_LazyQueueHandler(q))
+    base.setLevel(logging.INFO)
+    handler = logging.FileHandler(path)
+    handler.setFormatter(JsonFormatter())
+    listener = QueueListener(q, handler)
+    listener.start()
+    return StructuredLogger(base, {}), listener
+
+
+def _per_call_us(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    model = _Model()
+    session_id = "session_20250812_185207_d11f0495"
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = _legacy_logger(Path(tmp) / "legacy.log")
+        queued, listener = _queued_logger(Path(tmp) / "queued.log")
+        cases = {
+            "short message": (
+                lambda: legacy.info(f"Session initialized: {session_id}"),
+                lambda: queued.info("Session initialized: %s", session_id),
+            ),
+            "20KB answer": (
+                lambda: legacy.info(f"Answer returned in {session_id}: {ANSWER}"),
+                lambda: queued.info(
+                    "Answer returned", session_id=session_id, answer=ANSWER
+                ),
+            ),
+            "model repr": (
+                lambda: legacy.info(f"LLM loaded successfully: {model}"),
+                lambda: queued.info("LLM loaded successfully: %s", model),
+            ),
+            "disabled debug": (
+                lambda: legacy.debug(f"Chunk preview: {ANSWER}"),
+                lambda: queued.debug("Chunk preview: %s", ANSWER),
+            ),
+        }
+        print(f"{'case':<16} {'legacy us/call':>15} {'queued us/call':>15}")
+        for name, (old, new) in cases.items():
+            old_us = _per_call_us(old, args.calls)
+            new_us = _per_call_us(new, args.calls)
+            print(f"{name:<16} {old_us:>15.2f} {new_us:>15.2f}")
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main()
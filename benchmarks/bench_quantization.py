@@ -0,0 +1,133 @@
+"""
+Memory saved and recall@k lost by the reduced-precision session indexes in
+utils.vector_store (float16 / sq8, with and without float32 re-ranking).
+
+The corpus is synthetic: unit-norm 768-d vectors drawn around topic centroids,
+which matches the shape of text-embedding-004 output. Queries are drawn from the
+same mixture, so their neighbours sit in dense clusters where small distance
+errors reorder results. Ground truth comes from an exact float32 search.
+
+Usage:
+    python -m benchmarks.bench_quantization [--vectors 20000] [--k 5] [--out q.json]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import faiss
+import numpy as np
+
+from benchmarks.fakes import FakeEmbeddings
+from benchmarks.run import percentiles
+from utils.vector_store import SIDECAR_SUFFIX, build_vectorstore, load_vectorstore
+
+CONFIGS = [
+    {"precision": "float32", "rerank": False},
+    {"precision": "float16", "rerank": False},
+    {"precision": "float16", "rerank": True},
+    {"precision": "sq8", "rerank": False},
+    {"precision": "sq8", "rerank": True},
+]
+
+
+def synthetic_vectors(
+    n: int, dim: int, topics: int, seed: int, queries: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Corpus and query vectors drawn from the same topic mixture."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((topics, dim)).astype(np.float32)
+    labels = rng.integers(0, topics, n + queries)
+    noise = rng.standard_normal((n + queries, dim)).astype(np.float32)
+    vectors = centroids[labels] + 0.8 * noise
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors[:n], vectors[n:]
+
+
+def _ids(docs) -> List[int]:
+    return [int(doc.page_content.split()[-1]) for doc, _ in docs]
+
+
+def run(args) -> Dict:
+    vectors, queries = synthetic_vectors(
+        args.vectors, args.dim, args.topics, args.seed, args.queries
+    )
+    exact = faiss.IndexFlatL2(args.dim)
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+
+    text_embeddings = [(f"chunk {i}", v.tolist()) for i, v in enumerate(vectors)]
+    embeddings = FakeEmbeddings(dim=args.dim)
+    results = []
+    baseline_bytes = None
+    with tempfile.TemporaryDirectory(prefix="docportal_quant_") as tmp:
+        for cfg in CONFIGS:
+            settings = {**cfg, "rerank_factor": args.rerank_factor}
+            name = cfg["precision"] + ("+rerank" if cfg["rerank"] else "")
+            folder = Path(tmp) / name
+            start = time.perf_counter()
+            store = build_vectorstore(text_embeddings, embeddings, settings=settings)
+            build_s = time.perf_counter() - start
+            store.save_local(str(folder))
+            store = load_vectorstore(str(folder), embeddings)
+            if hasattr(store, "rerank_factor"):
+                store.rerank_factor = args.rerank_factor
+
+            index_bytes = (folder / "index.faiss").stat().st_size
+            sidecar = folder / f"index{SIDECAR_SUFFIX}"
+            sidecar_bytes = sidecar.stat().st_size if sidecar.exists() else 0
+            baseline_bytes = baseline_bytes or index_bytes
+
+            hits, latencies = 0, []
+            for q, expected in zip(queries, truth):
+                start = time.perf_counter()
+                docs = store.similarity_search_with_score_by_vector(
+                    q.tolist(), k=args.k
+                )
+                latencies.append(time.perf_counter() - start)
+                hits += len(set(_ids(docs)) & set(expected.tolist()))
+            results.append(
+                {
+                    "config": name,
+                    "index_bytes": index_bytes,
+                    "resident_saved_pct": round(
+                        100 * (1 - index_bytes / baseline_bytes), 1
+                    ),
+                    "sidecar_bytes_on_disk": sidecar_bytes,
+                    f"recall@{args.k}": round(hits / (args.k * len(queries)), 4),
+                    "build_s": round(build_s, 3),
+                    "query": percentiles(latencies),
+                }
+            )
+    return {"params": vars(args), "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=str, default=None)
+    args = parser.parse_args()
+
+    report = run(args)
+    print(f"{'config':<16}{'index MB':>10}{'saved %':>9}{'recall':>9}{'p50 ms':>9}")
+    for r in report["results"]:
+        print(
+            f"{r['config']:<16}{r['index_bytes'] / 2**20:>10.1f}"
+            f"{r['resident_saved_pct']:>9.1f}{r[f'recall@{args.k}']:>9.3f}"
+            f"{r['query'].get('p50_ms', 0):>9.2f}"
+        )
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Synthetic corpora of PDFs for offline benchmarks."""
+
+import random
+from pathlib import Path
+from typing import List
+
+import fitz  # PyMuPDF
+
+_VOCAB_SIZE = 5000
+
+
+def _vocabulary(rng: random.Random) -> List[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return [
+        "".join(rng.choice(letters) for _ in range(rng.randint(3, 10)))
+        for _ in range(_VOCAB_SIZE)
+    ]
+
+
+def generate_corpus(
+    out_dir: Path,
+    num_docs: int = 10,
+    pages_per_doc: int = 10,
+    words_per_page: int = 350,
+    seed: int = 0,
+) -> List[Path]:
+    """Write num_docs seeded PDFs into out_dir and return their paths."""
+    rng = random.Random(seed)
+    vocab = _vocabulary(rng)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for d in range(num_docs):
+        doc = fitz.open()
+        for _ in range(pages_per_doc):
+            page = doc.new_page()
+            words = rng.choices(vocab, k=words_per_page)
+            text = ". ".join(
+                " ".join(words[i : i + 12]) for i in range(0, len(words), 12)
+            )
+            page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=9)
+        path = out_dir / f"synthetic_{seed}_{d:04d}.pdf"
+        doc.save(path)
+        doc.close()
+        paths.append(path)
+    return paths
+
+
+def sample_questions(paths: List[Path], count: int, seed: int = 0) -> List[str]:
+    """Questions built from words that actually occur in the corpus."""
+    rng = random.Random(seed + 1)
+    words: List[str] = []
+    for path in paths[:5]:
+        with fitz.open(path) as doc:
+            words.extend(doc.load_page(0).get_text().split()[:200])
+    return [
+        "What does the document say about " + " ".join(rng.sample(words, 4)) + "?"
+        for _ in range(count)
+    ]
@@ -0,0 +1,37 @@
+"""Deterministic stand-ins for the provider-backed embedding model and LLM."""
+
+import time
+from typing import List, Optional
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from utils.local_embeddings import HashingEmbeddings
+
+
+class FakeEmbeddings(HashingEmbeddings):
+    """
+    Stand-in for the provider embedding API: local hashing embeddings plus an
+    optional per-call delay that models the network round trip.
+    """
+
+    def __init__(self, dim: int = 768, latency_s: float = 0.0):
+        super().__init__(dim=dim)
+        self.latency_s = latency_s
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return super().embed_query(text)
+
+
+def fake_llm(responses: Optional[List[str]] = None, latency_s: float = 0.0):
+    """Chat model that replays canned responses, optionally after a fixed delay."""
+    return FakeListChatModel(
+        responses=responses or ["This is a deterministic benchmark answer."],
+        sleep=latency_s or None,
+    )
@@ -0,0 +1,391 @@
+"""
+Load test of the API under concurrency without real provider calls.
+
+Starts benchmarks.stub_provider with the given latency and error model,
+starts api.main under uvicorn in a scratch directory with the Groq and
+Google clients pointed at the stub and the gateway rate limits lifted,
+waits for /ready, indexes a few chat sessions and then drives mixed
+/analyze, /compare, /chat/index and /chat/query traffic at a target rate
+(open loop: requests start on schedule whether or not earlier ones
+finished). Reports throughput, p50/p95/p99 latency and error rates per
+endpoint as JSON.
+
+Usage:
+    python -m benchmarks.load_test --rps 5 --duration 60 \\
+        --mix analyze=1,compare=1,index=1,query=6 --llm-latency lognormal:0.8:2.5
+
+Pass --app-url to drive an already running app instead; it must be pointed
+at a stub (or real providers) by the caller.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import yaml
+
+from benchmarks.corpus import generate_corpus, sample_questions
+from benchmarks.run import _git_commit, percentiles
+from benchmarks.stub_provider import StubServer, add_arguments, provider_from_args
+from utils.config_loader import load_config
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+ENDPOINTS = ("analyze", "compare", "index", "query")
+# LLM calls in flight per provider in the scratch config; the stub has no quota.
+STUB_MAX_CONCURRENCY = 64
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    latency_s: float
+    status: int  # 0 when no response arrived (timeout, connection error)
+    cache: Optional[str] = None
+    error: Optional[str] = None
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """ "analyze=1,query=6" -> relative weights per endpoint."""
+    mix: Dict[str, float] = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r}; expected one of {ENDPOINTS}")
+        mix[name] = float(weight or 1)
+    if not any(w > 0 for w in mix.values()):
+        raise ValueError("The traffic mix needs at least one positive weight")
+    return mix
+
+
+def summarize(samples: List[Sample], elapsed_s: float) -> Dict[str, Any]:
+    """Throughput, latency percentiles and error rates per endpoint and overall."""
+    by_endpoint: Dict[str, List[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample.endpoint].append(sample)
+    report = {
+        name: _summary(group, elapsed_s) for name, group in sorted(by_endpoint.items())
+    }
+    report["all"] = _summary(samples, elapsed_s)
+    return report
+
+
+def _summary(samples: List[Sample], elapsed_s: float) -> Dict[str, Any]:
+    ok = [s for s in samples if 200 <= s.status < 300]
+    errors = Counter(str(s.status or s.error) for s in samples if s not in ok)
+    summary = {
+        "requests": len(samples),
+        "ok": len(ok),
+        "error_rate": (len(samples) - len(ok)) / len(samples) if samples else 0.0,
+        "errors": dict(errors),
+        "throughput_rps": len(ok) / elapsed_s if elapsed_s else 0.0,
+        "latency": percentiles([s.latency_s for s in ok]),
+    }
+    cache = Counter(s.cache for s in ok if s.cache)
+    if cache:
+        summary["cache"] = dict(cache)
+    return summary
+
+
+class Workload:
+    """Builds the requests of each endpoint from a synthetic corpus."""
+
+    def __init__(self, paths: List[Path], questions: List[str], seed: int):
+        self.docs = [(p.name, p.read_bytes()) for p in paths]
+        self.questions = questions
+        self.sessions: List[str] = []
+        self.rng = random.Random(seed)
+
+    def pdf(self, field: str):
+        name, data = self.rng.choice(self.docs)
+        return (field, (name, data, "application/pdf"))
+
+    def request(self, endpoint: str) -> Dict[str, Any]:
+        if endpoint == "analyze":
+            return {"url": "/analyze", "files": [self.pdf("file")]}
+        if endpoint == "compare":
+            return {
+                "url": "/compare",
+                "files": [self.pdf("reference"), self.pdf("actual")],
+            }
+        if endpoint == "index":
+            return {"url": "/chat/index", "files": [self.pdf("files")]}
+        return {
+            "url": "/chat/query",
+            "data": {
+                "question": self.rng.choice(self.questions),
+                "session_id": self.rng.choice(self.sessions),
+            },
+        }
+
+
+async def _send(client: httpx.AsyncClient, endpoint: str, request: Dict) -> Sample:
+    start = time.perf_counter()
+    try:
+        response = await client.post(
+            request["url"], data=request.get("data"), files=request.get("files")
+        )
+    except httpx.HTTPError as e:
+        return Sample(endpoint, time.perf_counter() - start, 0, error=type(e).__name__)
+    return Sample(
+        endpoint,
+        time.perf_counter() - start,
+        response.status_code,
+        cache=response.headers.get("X-Cache"),
+    )
+
+
+async def create_sessions(client: httpx.AsyncClient, workload: Workload, count: int):
+    """Index count chat sessions of two documents each for /chat/query traffic."""
+    for _ in range(count):
+        files = [workload.pdf("files"), workload.pdf("files")]
+        response = await client.post("/chat/index", files=files)
+        response.raise_for_status()
+        workload.sessions.append(response.json()["session_id"])
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    workload: Workload,
+    mix: Dict[str, float],
+    rps: float,
+    duration_s: float,
+    max_in_flight: int,
+    poisson: bool = False,
+) -> Dict[str, Any]:
+    """
+    Start requests at rps for duration_s and wait for them to finish. A
+    request due while max_in_flight are outstanding is dropped and counted,
+    so an overloaded app shows up as drops instead of an ever-growing queue.
+    """
+    names = [n for n, w in mix.items() if w > 0]
+    weights = [mix[n] for n in names]
+    in_flight: set = set()
+    samples: List[Sample] = []
+    dropped: Counter = Counter()
+    start = time.perf_counter()
+    due = 0.0
+    while due < duration_s:
+        delay = start + due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        endpoint = workload.rng.choices(names, weights)[0]
+        if len(in_flight) >= max_in_flight:
+            dropped[endpoint] += 1
+        else:
+            task = asyncio.create_task(
+                _send(client, endpoint, workload.request(endpoint))
+            )
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            task.add_done_callback(lambda t: samples.append(t.result()))
+        due += workload.rng.expovariate(rps) if poisson else 1.0 / rps
+    if in_flight:
+        await asyncio.wait(set(in_flight))
+    elapsed = time.perf_counter() - start
+    return {
+        "elapsed_seconds": elapsed,
+        "target_rps": rps,
+        "offered_rps": (len(samples) + sum(dropped.values())) / duration_s,
+        "dropped": dict(dropped),
+        "endpoints": summarize(samples, elapsed),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def stub_config(workdir: Path) -> Path:
+    """
+    Write a copy of the app config to workdir without the llm_gateway rate
+    limits, which are sized for the real Groq quota and would otherwise be
+    what the run measures, and with more concurrent calls per provider.
+    """
+    config = load_config()
+    gateway = config.setdefault("llm_gateway", {})
+    providers = gateway.get("providers") or {}
+    for limits in (gateway.setdefault("default", {}), *providers.values()):
+        limits.pop("requests_per_minute", None)
+        limits.pop("tokens_per_minute", None)
+        limits["max_concurrency"] = max(
+            int(limits.get("max_concurrency", 8)), STUB_MAX_CONCURRENCY
+        )
+    path = workdir / "config.yaml"
+    path.write_text(yaml.safe_dump(config, sort_keys=False), encoding="utf-8")
+    return path
+
+
+def start_app(
+    workdir: Path, stub_url: str, workers: int, config: Optional[str] = None
+) -> Tuple[subprocess.Popen, str]:
+    """Run api.main under uvicorn in workdir with the providers pointed at the stub."""
+    port = _free_port()
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(
+            p for p in (str(REPO_ROOT), os.environ.get("PYTHONPATH")) if p
+        ),
+        "GROQ_API_BASE": stub_url,
+        "GOOGLE_API_BASE": stub_url,
+        "GROQ_API_KEY": "stub",
+        "GOOGLE_API_KEY": "stub",
+        "FAISS_BASE": str(workdir / "faiss_index"),
+        "UPLOAD_BASE": str(workdir / "data"),
+    }
+    if config:
+        env["CONFIG_PATH"] = str(Path(config).resolve())
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "api.main:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=workdir,
+        env=env,
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout_s: float) -> float:
+    """Poll /ready until 200; returns the seconds it took."""
+    start = time.perf_counter()
+    while True:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return time.perf_counter() - start
+        except httpx.HTTPError:
+            pass
+        if time.perf_counter() - start > timeout_s:
+            raise TimeoutError(f"App not ready after {timeout_s}s")
+        await asyncio.sleep(0.2)
+
+
+async def run_load(args, app_url: str, paths: List[Path]) -> Dict[str, Any]:
+    workload = Workload(
+        paths, sample_questions(paths, 200, seed=args.seed), seed=args.seed
+    )
+    mix = parse_mix(args.mix)
+    limits = httpx.Limits(max_connections=args.max_in_flight)
+    async with httpx.AsyncClient(
+        base_url=app_url, timeout=args.timeout, limits=limits
+    ) as client:
+        ready_s = await wait_ready(client, args.ready_timeout)
+        if mix.get("query", 0) > 0:
+            await create_sessions(client, workload, args.sessions)
+        results = await drive(
+            client,
+            workload,
+            mix,
+            args.rps,
+            args.duration,
+            args.max_in_flight,
+            poisson=args.poisson,
+        )
+    return {"ready_seconds": ready_s, **results}
+
+
+def run(args) -> Dict[str, Any]:
+    stub = None
+    app = None
+    with tempfile.TemporaryDirectory(prefix="docportal_load_") as tmp:
+        workdir = Path(tmp)
+        paths = generate_corpus(
+            workdir / "corpus",
+            num_docs=args.docs,
+            pages_per_doc=args.pages,
+            words_per_page=args.words,
+            seed=args.seed,
+        )
+        try:
+            app_url = args.app_url
+            if not app_url:
+                stub = StubServer(provider_from_args(args)).start()
+                config = args.config or str(stub_config(workdir))
+                app, app_url = start_app(workdir, stub.url, args.workers, config)
+            results = asyncio.run(run_load(args, app_url, paths))
+            if stub:
+                results["stub_provider"] = stub.provider.stats()
+        finally:
+            if app:
+                app.terminate()
+                app.wait(timeout=30)
+            if stub:
+                stub.stop()
+    return {
+        "meta": {
+            "git_commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": vars(args),
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rps", type=float, default=5.0, help="target request rate")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds")
+    parser.add_argument(
+        "--mix",
+        default="analyze=1,compare=1,index=1,query=6",
+        help="relative weights of analyze, compare, index and query",
+    )
+    parser.add_argument(
+        "--poisson", action="store_true", help="exponential gaps instead of fixed"
+    )
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=120.0, help="per request")
+    parser.add_argument("--sessions", type=int, default=3, help="chat sessions")
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--words", type=int, default=350, help="words per page")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--ready-timeout", type=float, default=120.0)
+    parser.add_argument(
+        "--config",
+        help="config.yaml for the app; by default a copy of the repo config "
+        "without the llm_gateway rate limits",
+    )
+    parser.add_argument("--app-url", help="drive a running app instead")
+    add_arguments(parser)
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2)
+    if args.out:
+        Path(args.out).write_text(report, encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
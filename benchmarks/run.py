@@ -0,0 +1,189 @@
+"""
+Offline benchmark for ingestion, indexing and query latency.
+
+Uses a synthetic PDF corpus, deterministic fake embeddings and a fake LLM, so
+no provider keys or network access are needed. Results are emitted as JSON
+so runs can be compared across commits.
+
+Usage:
+    python -m benchmarks.run --docs 20 --pages 10 --queries 200 --out bench.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from langchain_community.vectorstores import FAISS
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+import utils.parse_cache as parse_cache
+from benchmarks.corpus import generate_corpus, sample_questions
+from benchmarks.fakes import FakeEmbeddings, fake_llm
+from src.multi_doc_chat.retriever import ConversationalRAG
+from utils.document_ops import load_documents
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 and mean in milliseconds."""
+    if not samples:
+        return {}
+    ms = sorted(s * 1000 for s in samples)
+    if len(ms) == 1:
+        cuts = [ms[0]] * 99
+    else:
+        cuts = statistics.quantiles(ms, n=100, method="inclusive")
+    return {
+        "count": len(ms),
+        "mean_ms": statistics.fmean(ms),
+        "p50_ms": cuts[49],
+        "p95_ms": cuts[94],
+        "p99_ms": cuts[98],
+        "max_ms": ms[-1],
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(args) -> Dict:
+    results: Dict = {}
+    with tempfile.TemporaryDirectory(prefix="docportal_bench_") as tmp:
+        tmp_path = Path(tmp)
+        paths = generate_corpus(
+            tmp_path / "corpus",
+            num_docs=args.docs,
+            pages_per_doc=args.pages,
+            words_per_page=args.words,
+            seed=args.seed,
+        )
+        # Isolate the parse cache so "cold" really means cold.
+        parse_cache._default_cache = parse_cache.ParseCache(
+            str(tmp_path / "parse_cache")
+        )
+
+        docs, cold = _timed(lambda: load_documents(paths))
+        _, warm = _timed(lambda: load_documents(paths))
+        results["parse"] = {
+            "pages": len(docs),
+            "cold_seconds": cold,
+            "cold_pages_per_sec": len(docs) / cold,
+            "warm_seconds": warm,
+            "warm_pages_per_sec": len(docs) / warm,
+        }
+
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap
+        )
+        chunks, split_s = _timed(lambda: splitter.split_documents(docs))
+        results["split"] = {
+            "chunks": len(chunks),
+            "seconds": split_s,
+            "chunks_per_sec": len(chunks) / split_s,
+        }
+
+        embeddings = FakeEmbeddings(dim=args.dim, latency_s=args.embed_latency)
+        vectorstore, build_s = _timed(lambda: FAISS.from_documents(chunks, embeddings))
+        index_dir = tmp_path / "faiss_index"
+        _, save_s = _timed(lambda: vectorstore.save_local(str(index_dir)))
+        loaded, load_s = _timed(
+            lambda: FAISS.load_local(
+                str(index_dir), embeddings, allow_dangerous_deserialization=True
+            )
+        )
+        results["index"] = {
+            "vectors": loaded.index.ntotal,
+            "dim": args.dim,
+            "build_seconds": build_s,
+            "chunks_per_sec": len(chunks) / build_s,
+            "save_seconds": save_s,
+            "load_seconds": load_s,
+            "bytes_on_disk": sum(p.stat().st_size for p in index_dir.iterdir()),
+        }
+
+        retriever = loaded.as_retriever(
+            search_type="similarity", search_kwargs={"k": args.k}
+        )
+        questions = sample_questions(paths, args.queries, seed=args.seed)
+
+        retrieve_lat = []
+        for q in questions:
+            _, t = _timed(lambda: retriever.invoke(q))
+            retrieve_lat.append(t)
+        results["retrieve"] = percentiles(retrieve_lat)
+
+        rag = ConversationalRAG(
+            session_id="benchmark",
+            retriever=retriever,
+            llm=fake_llm(latency_s=args.llm_latency),
+        )
+        query_lat = []
+        for q in questions:
+            _, t = _timed(lambda: rag.invoke(q, chat_history=[]))
+            query_lat.append(t)
+        results["query"] = percentiles(query_lat)
+
+    return {
+        "meta": {
+            "git_commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": vars(args),
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--words", type=int, default=350, help="words per page")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument(
+        "--embed-latency", type=float, default=0.0, help="seconds per embedding call"
+    )
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.0, help="seconds per LLM call"
+    )
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2)
+    if args.out:
+        Path(args.out).write_text(report, encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Local stand-in for the Groq and Google APIs, for load tests that must not
+pay for provider calls.
+
+Serves the Groq chat completions endpoint and the Google Generative
+Language embedContent, batchEmbedContents and generateContent endpoints
+over plain HTTP. Every call waits for a delay drawn from a configurable
+distribution and fails with the given probability. LLM answers are shaped
+by the prompt: when it carries a JSON output schema (JsonOutputParser
+format instructions) the answer is an instance of that schema, otherwise
+a fixed sentence. Embeddings are local hashing embeddings.
+
+Point the app at it with:
+    GROQ_API_BASE=http://127.0.0.1:8765 GOOGLE_API_BASE=http://127.0.0.1:8765
+
+Usage:
+    python -m benchmarks.stub_provider --port 8765 \\
+        --llm-latency lognormal:0.8:2.5 --embed-latency fixed:0.05 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from utils.llm_gateway import CHARS_PER_TOKEN
+from utils.local_embeddings import HashingEmbeddings
+
+_SCHEMA = re.compile(r"Here is the output schema:\s*```\s*(\{.*?\})\s*```", re.DOTALL)
+DEFAULT_ANSWER = "The documents do not say more about this than the context above."
+
+
+class Latency:
+    """
+    Delay per call in seconds, from "fixed:S", "uniform:LOW:HIGH" or
+    "lognormal:P50:P95" (a long-tailed distribution with that median and p95).
+    """
+
+    def __init__(self, spec: str, rng: Optional[random.Random] = None):
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(":")] if params else []
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+        if kind not in expected or len(values) != expected[kind]:
+            raise ValueError(f"Invalid latency spec: {spec!r}")
+        if kind == "lognormal" and not 0 < values[0] <= values[1]:
+            raise ValueError(f"lognormal needs 0 < p50 <= p95: {spec!r}")
+        self.spec = spec
+        self.kind = kind
+        self.values = values
+        self.rng = rng or random.Random()
+
+    def sample(self) -> float:
+        if self.kind == "fixed":
+            return self.values[0]
+        if self.kind == "uniform":
+            return self.rng.uniform(*self.values)
+        p50, p95 = self.values
+        sigma = (math.log(p95) - math.log(p50)) / 1.6449
+        return self.rng.lognormvariate(math.log(p50), sigma)
+
+
+def example_for_schema(
+    schema: Dict[str, Any], defs: Optional[Dict[str, Any]] = None
+) -> Any:
+    """A minimal instance of a JSON schema as pydantic emits them."""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return example_for_schema(defs[schema["$ref"].split("/")[-1]], defs)
+    for combinator in ("anyOf", "oneOf", "allOf"):
+        if schema.get(combinator):
+            return example_for_schema(schema[combinator][0], defs)
+    kind = schema.get("type")
+    if kind == "object" or "properties" in schema:
+        return {
+            name: example_for_schema(prop, defs)
+            for name, prop in schema.get("properties", {}).items()
+        }
+    if kind == "array" or "items" in schema:
+        return [example_for_schema(schema.get("items", {}), defs)]
+    if kind in ("integer", "number"):
+        return 1
+    if kind == "boolean":
+        return True
+    return schema.get("title", "stub")
+
+
+def answer_for(prompt: str) -> str:
+    match = _SCHEMA.search(prompt)
+    if not match:
+        return DEFAULT_ANSWER
+    try:
+        schema = json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return DEFAULT_ANSWER
+    return json.dumps(example_for_schema(schema))
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+class StubProvider:
+    """Latency, error injection and call counts shared by the stub endpoints."""
+
+    def __init__(
+        self,
+        llm_latency: str = "fixed:0",
+        embed_latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        error_statuses: Sequence[int] = (429, 500, 503),
+        dim: int = 768,
+        seed: int = 0,
+    ):
+        rng = random.Random(seed)
+        self.latency = {
+            "llm": Latency(llm_latency, rng),
+            "embeddings": Latency(embed_latency, rng),
+        }
+        self.error_rate = error_rate
+        self.error_statuses = list(error_statuses)
+        self.rng = rng
+        self.embeddings = HashingEmbeddings(dim=dim)
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self._lock = threading.Lock()
+
+    async def call(self, api: str) -> Optional[JSONResponse]:
+        """Wait like the provider would; returns an error response to inject, if any."""
+        with self._lock:
+            self.calls[api] += 1
+            delay = self.latency[api].sample()
+            fail = self.rng.random() < self.error_rate
+            status = self.rng.choice(self.error_statuses) if fail else None
+            if fail:
+                self.errors[api] += 1
+        await asyncio.sleep(delay)
+        if status is None:
+            return None
+        headers = {"Retry-After": "1"} if status == 429 else None
+        body = {"error": {"code": status, "message": "Injected by stub_provider"}}
+        return JSONResponse(body, status_code=status, headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                api: {"calls": self.calls[api], "errors": self.errors[api]}
+                for api in self.latency
+            }
+
+
+def create_app(provider: StubProvider) -> FastAPI:
+    app = FastAPI(title="Stub provider")
+
+    @app.get("/stats")
+    def stats() -> Dict[str, Any]:
+        return provider.stats()
+
+    @app.post("/openai/v1/chat/completions")
+    async def groq_chat(request: Request):
+        body = await request.json()
+        error = await provider.call("llm")
+        if error is not None:
+            return error
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        answer = answer_for(prompt)
+        usage = {"prompt_tokens": _tokens(prompt), "completion_tokens": _tokens(answer)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": answer},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": usage,
+        }
+
+    @app.post("/{version}/models/{target}")
+    async def google(version: str, target: str, request: Request):
+        _, _, method = target.partition(":")
+        body = await request.json()
+        api = "llm" if method == "generateContent" else "embeddings"
+        error = await provider.call(api)
+        if error is not None:
+            return error
+        if method == "embedContent":
+            vector = provider.embeddings.embed_query(_parts_text(body.get("content")))
+            return {"embedding": {"values": vector}}
+        if method == "batchEmbedContents":
+            texts = [_parts_text(r.get("content")) for r in body.get("requests", [])]
+            vectors = provider.embeddings.embed_documents(texts)
+            return {"embeddings": [{"values": v} for v in vectors]}
+        if method == "generateContent":
+            prompt = "\n".join(_parts_text(c) for c in body.get("contents", []))
+            answer = answer_for(prompt)
+            return {
+                "candidates": [
+                    {
+                        "content": {"role": "model", "parts": [{"text": answer}]},
+                        "finishReason": "STOP",
+                        "index": 0,
+                    }
+                ],
+                "usageMetadata": {
+                    "promptTokenCount": _tokens(prompt),
+                    "candidatesTokenCount": _tokens(answer),
+                    "totalTokenCount": _tokens(prompt) + _tokens(answer),
+                },
+            }
+        return JSONResponse(
+            {"error": {"code": 404, "message": f"Unsupported method {method}"}},
+            status_code=404,
+        )
+
+    return app
+
+
+def _parts_text(content: Optional[Dict[str, Any]]) -> str:
+    parts: List[Dict[str, Any]] = (content or {}).get("parts", [])
+    return "\n".join(str(p.get("text", "")) for p in parts)
+
+
+class StubServer:
+    """Runs the stub app with uvicorn on a background thread."""
+
+    def __init__(self, provider: StubProvider, host: str = "127.0.0.1", port: int = 0):
+        self.provider = provider
+        config = uvicorn.Config(
+            create_app(provider), host=host, port=port, log_level="warning"
+        )
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(
+            target=self.server.run, name="stub-provider", daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.servers[0].sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, timeout: float = 10.0) -> "StubServer":
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError("Stub provider did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--llm-latency",
+        default="lognormal:0.8:2.5",
+        help='"fixed:S", "uniform:LOW:HIGH" or "lognormal:P50:P95" seconds',
+    )
+    parser.add_argument("--embed-latency", default="lognormal:0.05:0.2")
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="fraction of calls that fail"
+    )
+    parser.add_argument(
+        "--error-statuses",
+        default="429,500,503",
+        help="HTTP statuses injected failures use",
+    )
+    parser.add_argument("--dim", type=int, default=768, help="embedding dimension")
+
+
+def provider_from_args(args) -> StubProvider:
+    return StubProvider(
+        llm_latency=args.llm_latency,
+        embed_latency=args.embed_latency,
+        error_rate=args.error_rate,
+        error_statuses=[int(s) for s in args.error_statuses.split(",") if s],
+        dim=args.dim,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(provider_from_args(args)),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
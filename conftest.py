@@ -0,0 +1,17 @@
+# Keeps the caches and stores the tests exercise out of the repo's data/ dir.
+
+import pytest
+
+import utils.parse_cache as parse_cache
+import utils.reference_registry as reference_registry
+import utils.result_cache as result_cache
+
+
+@pytest.fixture(autouse=True)
+def _scratch_storage(tmp_path, monkeypatch):
+    monkeypatch.setenv("PARSE_CACHE_DIR", str(tmp_path / "parse_cache"))
+    monkeypatch.setenv("RESULT_CACHE_PATH", str(tmp_path / "result_cache.sqlite3"))
+    monkeypatch.setenv("REFERENCE_REGISTRY_DIR", str(tmp_path / "references"))
+    monkeypatch.setattr(parse_cache, "_default_cache", None)
+    monkeypatch.setattr(result_cache, "_default_cache", None)
+    monkeypatch.setattr(reference_registry, "_default_registry", None)
@@ -1,22 +1,184 @@
+import atexit
+import json
 import logging
 import os
-from datetime import datetime
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+# Keys LoggerAdapter forwards to Logger.log; any other keyword is a structured field.
+_LOGGING_KWARGS = {"exc_info", "stack_info", "stacklevel", "extra"}
+
+_configure_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_log_file_path: Optional[str] = None
+dropped_records = 0
+
+
+def _truncate(value: Any, limit: int) -> Any:
+    if isinstance(value, str) and len(value) > limit:
+        return f"{value[:limit]}...[truncated {len(value) - limit} chars]"
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; message and field values are truncated to max_chars."""
+
+    def __init__(self, max_chars: int = 2000):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(
+                record.created, timezone.utc
+            ).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "line": record.lineno,
+            # getMessage() merges args here, on the listener thread, not the caller's.
+            "message": _truncate(record.getMessage(), self.max_chars),
+        }
+        for key, value in (getattr(record, "fields", None) or {}).items():
+            if not isinstance(value, (str, int, float, bool, type(None))):
+                value = str(value)
+            payload[key] = _truncate(value, self.max_chars)
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler.prepare() formats the record in the calling thread; skip that so
+    message interpolation and JSON encoding happen on the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Never block the request path: drop the record if the listener falls behind.
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            global dropped_records
+            dropped_records += 1
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of INFO/DEBUG records for the configured logger-name
+    prefixes. Warnings and errors are never sampled out.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first so the most specific rule wins.
+        self.rates = sorted(rates.items(), key=lambda kv: len(kv[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        for prefix, rate in self.rates:
+            if record.name.startswith(prefix):
+                return random.random() < rate
+        return True
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """
+    Accepts structlog-style keyword fields, e.g. log.error("Invalid file", file_type=ext).
+    Fields are attached to the record and only serialized by the listener.
+    """
+
+    def process(self, msg, kwargs):
+        fields = {k: kwargs.pop(k) for k in list(kwargs) if k not in _LOGGING_KWARGS}
+        if fields:
+            extra = dict(kwargs.get("extra") or {})
+            extra["fields"] = fields
+            kwargs["extra"] = extra
+        return msg, kwargs
+
+
+def _load_logging_config() -> Dict[str, Any]:
+    try:
+        from utils.config_loader import load_config
+
+        return load_config().get("logging", {}) or {}
+    except Exception:
+        return {}
+
+
+def _configure(logs_dir: str) -> None:
+    """Install one queue-backed JSON file handler per process."""
+    global _listener, _queue_handler, _log_file_path
+    cfg = _load_logging_config()
+    level = os.getenv("LOG_LEVEL", cfg.get("level", "INFO")).upper()
+
+    os.makedirs(logs_dir, exist_ok=True)
+    log_file = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}_{os.getpid()}.log"
+    _log_file_path = os.path.join(logs_dir, log_file)
+
+    file_handler = logging.FileHandler(_log_file_path, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter(int(cfg.get("max_message_chars", 2000))))
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(
+        maxsize=int(cfg.get("queue_size", 10000))
+    )
+    queue_handler = _LazyQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(cfg.get("sampling") or {}))
+
+    # Not emitted by JsonFormatter; skipping them makes each LogRecord cheaper.
+    logging.logMultiprocessing = False
+    logging.logProcesses = False
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+    _queue_handler = queue_handler
+
+    _listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(flush)
+
+
+def flush() -> None:
+    """Drain queued records to disk and stop the listener thread (idempotent)."""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def _reset_after_fork() -> None:
+    """
+    A forked child inherits the queue handler but not the listener thread, so its
+    records would never be written. Drop both; the next CustomLogger() in the
+    child configures a fresh listener and log file.
+    """
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+    _listener = None
+    _queue_handler = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 
 class CustomLogger:
     def __init__(self, log_dir="logs"):
-        # Ensure logs directory exists
+        # Configuration happens once per process; later instances are free.
         self.logs_dir = os.path.join(os.getcwd(), log_dir)
-        os.makedirs(self.logs_dir, exist_ok=True)
-
-        log_file = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
-        self.log_file_path = os.path.join(self.logs_dir, log_file)
-
-        logging.basicConfig(
-            filename=self.log_file_path,
-            format="[ %(asctime)s ] %(levelname)s %(name)s (line:%(lineno)d) - %(message)s",
-            level=logging.INFO,
-        )
+        if _listener is None:
+            with _configure_lock:
+                if _listener is None:
+                    _configure(self.logs_dir)
+        self.log_file_path = _log_file_path
 
     def get_logger(self, name=__file__):
-        return logging.getLogger(os.path.basename(name))
+        return StructuredLogger(logging.getLogger(os.path.basename(name)), {})
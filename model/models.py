@@ -15,6 +15,14 @@ class Metadata(BaseModel):
     SentimentTone: str
 
 
+class DocumentSummary(BaseModel):
+    """The Metadata fields the LLM still fills when the rest is read locally."""
+
+    Summary: List[str]
+    Publisher: str
+    SentimentTone: str
+
+
 class ChangeFormat(BaseModel):
     Page: str
     Changes: str
@@ -26,6 +34,7 @@ class SummaryResponse(RootModel[list[ChangeFormat]]):
 
 class PromptType(str, Enum):
     DOCUMENT_ANALYSIS = "document_analysis"
+    DOCUMENT_SUMMARY = "document_summary"
     DOCUMENT_COMPARISON = "document_comparison"
     CONTEXTUALIZE_QUESTION = "contextualize_question"
     CONTEXT_QA = "context_qa"
@@ -11,6 +11,19 @@ Analyze this document:
 {document_text}
 """)
 
+document_summary_prompt = ChatPromptTemplate.from_template("""
+You are a highly capable assistant trained to summarize documents.
+The text below is a sample of a longer document: its opening pages, section
+headings and evenly spaced excerpts. Summarize the whole document from it,
+name its publisher if the text states one, and judge its overall tone.
+Return ONLY valid JSON matching the exact schema below.
+
+{format_instructions}
+
+Document sample:
+{document_text}
+""")
+
 document_comparison_prompt = ChatPromptTemplate.from_template("""
 You will be provided with content from two PDFs. Your tasks are as follows:
 
@@ -58,9 +71,20 @@ context_qa_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
+# Bump a prompt's version whenever its wording changes; cached LLM results
+# produced with an older version are then ignored.
+PROMPT_VERSIONS = {
+    "document_analysis": "1",
+    "document_summary": "1",
+    "document_comparison": "1",
+    "contextualize_question": "1",
+    "context_qa": "1",
+}
+
 # Central dictionary to register prompts
 PROMPT_REGISTRY = {
     "document_analysis": document_analysis_prompt,
+    "document_summary": document_summary_prompt,
     "document_comparison": document_comparison_prompt,
     "contextualize_question": contextualize_question_prompt,
     "context_qa": context_qa_prompt,
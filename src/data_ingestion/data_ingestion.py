@@ -4,15 +4,37 @@ import os
 import uuid
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
-import fitz  # PyMuPDF
 import shutil
-import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 
+from utils.config_loader import load_config
 from utils.model_loader import ModelLoader
+from utils.document_ops import load_documents, supported_extensions
+from utils.ingest_checkpoint import IngestCheckpoint
+from utils.index_store import (
+    ScopedRetriever,
+    current_generation,
+    get_index_cache,
+    load_generation,
+    publish_index,
+    read_metadata,
+    read_tombstones,
+    write_tombstones,
+    writer_lock,
+)
+from utils.parse_cache import ParsedDocument, parse_pdf, sha256_of
+from utils.storage_manager import is_leased, last_access
+from utils.metrics import CHUNKS, span
+from utils.near_dedup import collapse_near_duplicates
+from utils.vector_store import build_vectorstore
 from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 from logger.custom_logger import CustomLogger
 from exception.custom_exception import DocumentPortalException
 
@@ -21,25 +43,30 @@ SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".txt"}
 
 
 class FaissManager:
+    """
+    Loads, extends and publishes the FAISS index of one directory.
+    Ingested files are tracked by content hash in the metadata published with
+    each index generation, so re-sending a file costs no parsing or embedding.
+    """
+
     def __init__(self, index_dir: str, model_loader: Optional[ModelLoader] = None):
         try:
             self.log = CustomLogger().get_logger(__name__)
             self.index_dir = Path(index_dir)
             self.index_dir.mkdir(parents=True, exist_ok=True)
 
-            self.meta_path = self.index_dir / "ingested_meta.json"
-            self._meta: Dict[str, Any] = {"rows": {}}
-
-            if self.meta_path.exists():
-                self._meta = json.loads(self.meta_path.read_text(encoding="utf-8")) or {
-                    "rows": {}
-                }
-            else:
-                self.log.error(f"Metadata file not found: {self.meta_path}")
+            self._meta: Dict[str, Any] = {"files": {}}
+            self._tombstones: Dict[str, Dict[str, Any]] = {}
 
             self.model_loader = model_loader or ModelLoader()
             self.emb = self.model_loader.load_embeddings()
             self.vectorstore: Optional[FAISS] = None
+            self.checkpoint = IngestCheckpoint(self.index_dir)
+            self.batch_size = int(
+                self.model_loader.config.get("faiss_db", {}).get(
+                    "ingest_batch_size", 512
+                )
+            )
         except Exception as e:
             self.log.error(f"Error initializing FaissManager: {e}")
             raise DocumentPortalException(
@@ -48,9 +75,7 @@ class FaissManager:
 
     def _exists(self) -> bool:
         try:
-            return (self.index_dir / "index.faiss").exists() and (
-                self.index_dir / "index.pkl"
-            ).exists()
+            return current_generation(self.index_dir) is not None
         except Exception as e:
             self.log.error(f"Error checking existence: {e}")
             raise DocumentPortalException(f"Failed to check existence: {e}") from e
@@ -87,20 +112,256 @@ class FaissManager:
         except Exception as e:
             raise DocumentPortalException(f"Failed to generate fingerprint: {e}") from e
 
+    def has_file(self, content_hash: str) -> bool:
+        """True if the file is indexed and has not been removed since."""
+        entry = self._meta["files"].get(content_hash)
+        return entry is not None and entry.get("doc_id") not in self._tombstones
+
+    def file_chunks(self, content_hash: str) -> int:
+        return int(self._meta["files"].get(content_hash, {}).get("chunks", 0))
+
+    def live_files(self) -> Dict[str, Dict[str, Any]]:
+        return {h: f for h, f in self._meta["files"].items() if self.has_file(h)}
+
+    def remove_documents(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Tombstone the live files matching keys (file name or content hash).
+        Search stops returning their chunks at once; the rows stay in the index
+        until compact(). Callers hold writer_lock. Returns the removed files.
+        """
+        try:
+            keys = set(keys)
+            removed = {
+                h: f
+                for h, f in self.live_files().items()
+                if h in keys or f.get("name") in keys
+            }
+            if removed:
+                for entry in removed.values():
+                    self._tombstones[entry["doc_id"]] = {
+                        "chunks": int(entry.get("chunks", 0)),
+                        "compacted": False,
+                    }
+                write_tombstones(self.index_dir, self._tombstones)
+            return removed
+        except Exception as e:
+            self.log.error(f"Error removing documents: {e}")
+            raise DocumentPortalException(f"Failed to remove documents: {e}") from e
+
+    def compaction_due(self, ratio: float) -> bool:
+        """True once tombstoned chunks make up at least ratio of the index."""
+        pending = sum(
+            t["chunks"] for t in self._tombstones.values() if not t.get("compacted")
+        )
+        total = sum(int(f.get("chunks", 0)) for f in self._meta["files"].values())
+        return pending > 0 and pending >= ratio * total
+
+    def compact(self) -> int:
+        """
+        Drop the rows of tombstoned documents and publish the result. Readers
+        keep their loaded generation until the new one has been loaded in the
+        background, so their tombstones are kept (marked compacted) until the
+        next compaction. Callers hold writer_lock. Returns rows dropped.
+        """
+        try:
+            if self.vectorstore is None:
+                return 0
+            dead = {
+                doc_id
+                for doc_id, t in self._tombstones.items()
+                if not t.get("compacted")
+            }
+            if not dead:
+                return 0
+            store = self.vectorstore
+            doomed = [
+                _id
+                for _id in store.index_to_docstore_id.values()
+                if store.docstore.search(_id).metadata.get("doc_id") in dead
+            ]
+            with span("index_compact"):
+                if doomed:
+                    store.delete(doomed)
+                self._meta["files"] = {
+                    h: f
+                    for h, f in self._meta["files"].items()
+                    if f.get("doc_id") not in self._tombstones
+                }
+                self._save_meta()
+            self._tombstones = {
+                doc_id: {**t, "compacted": True}
+                for doc_id, t in self._tombstones.items()
+                if doc_id in dead
+            }
+            write_tombstones(self.index_dir, self._tombstones)
+            self.log.info(
+                "Compacted index",
+                index=str(self.index_dir),
+                documents=len(dead),
+                rows=len(doomed),
+            )
+            return len(doomed)
+        except Exception as e:
+            self.log.error(f"Error compacting index: {e}")
+            raise DocumentPortalException(f"Failed to compact index: {e}") from e
+
     def _save_meta(self):
+        """Publish the index together with the file metadata as a new generation."""
         try:
-            pass
+            with span("index_save"):
+                generation = publish_index(
+                    self.index_dir, self.vectorstore, metadata=self._meta
+                )
+            get_index_cache().prime(self.index_dir, generation, self.vectorstore)
         except Exception as e:
             self.log.error(f"Error saving metadata: {e}")
             raise DocumentPortalException(f"Failed to save metadata: {e}") from e
 
-    def load_or_create(self):
+    def load_or_create(self) -> Optional[FAISS]:
+        """
+        Load a private copy of the live index and its file metadata. Returns
+        None when the directory has no index yet; commit_staged creates it.
+        """
         try:
-            pass
+            if self._exists():
+                with span("index_load"):
+                    generation, self.vectorstore = load_generation(
+                        self.index_dir, self.emb
+                    )
+                self._meta = read_metadata(self.index_dir, generation)
+                self._meta.setdefault("files", {})
+            if any(h in self._meta["files"] for h in self.checkpoint.files):
+                # Published before the checkpoint could be cleared.
+                self.checkpoint.clear()
+            self._tombstones = dict(read_tombstones(self.index_dir))
+            return self.vectorstore
         except Exception as e:
             self.log.error(f"Error loading or creating: {e}")
             raise DocumentPortalException(f"Failed to load or create: {e}") from e
 
+    def stage_file(
+        self, content_hash: str, info: Dict[str, Any], chunks: List[Document]
+    ) -> None:
+        """Checkpoint a parsed file's chunks for the next commit_staged()."""
+        try:
+            self.checkpoint.stage_file(content_hash, info, chunks)
+        except Exception as e:
+            self.log.error(f"Error staging file: {e}")
+            raise DocumentPortalException(f"Failed to stage file: {e}") from e
+
+    def staged_files(self) -> Dict[str, Dict[str, Any]]:
+        """Files staged by an earlier update that failed before publishing."""
+        return {
+            h: {k: v for k, v in f.items() if k != "first_row"}
+            for h, f in self.checkpoint.files.items()
+        }
+
+    def commit_staged(self) -> Tuple[int, int]:
+        """
+        Embed the staged chunks, append them to the index, record their files
+        and publish. Embeddings are checkpointed every batch_size chunks, so a
+        failed update retried later embeds only what was not committed yet.
+        Returns (chunks added, chunks whose embeddings were already committed).
+        """
+        try:
+            checkpoint = self.checkpoint
+            if not checkpoint.files:
+                return 0, 0
+            docs = checkpoint.documents()
+            texts = [d.page_content for d in docs]
+            metadatas = [d.metadata for d in docs]
+            resumed = checkpoint.embedded
+            if resumed:
+                self.log.info(
+                    "Resuming index update",
+                    index=str(self.index_dir),
+                    chunks_done=resumed,
+                    chunks_total=len(texts),
+                    files_done=checkpoint.files_done(),
+                )
+            for start in range(resumed, len(texts), self.batch_size):
+                with span("embed"):
+                    vectors = self.emb.embed_documents(
+                        texts[start : start + self.batch_size]
+                    )
+                checkpoint.commit_batch(start, vectors)
+            if texts:
+                pairs = list(zip(texts, checkpoint.vectors().tolist()))
+                with span("index_build"):
+                    if self.vectorstore is None:
+                        self.vectorstore = build_vectorstore(
+                            pairs, self.emb, metadatas=metadatas
+                        )
+                    else:
+                        self.vectorstore.add_embeddings(pairs, metadatas=metadatas)
+            if self.vectorstore is not None:
+                self._meta["files"].update(self.staged_files())
+                self._save_meta()
+            checkpoint.clear()
+            return len(texts), resumed
+        except Exception as e:
+            self.log.error(f"Error adding documents: {e}")
+            raise DocumentPortalException(f"Failed to add documents: {e}") from e
+
+
+def _dedup_per_page(chunks: List[Document], settings: Dict[str, Any]) -> List[Document]:
+    by_page: Dict[Any, List[Document]] = {}
+    for chunk in chunks:
+        by_page.setdefault(chunk.metadata.get("page"), []).append(chunk)
+    kept = {
+        id(c)
+        for page_chunks in by_page.values()
+        for c in collapse_near_duplicates(page_chunks, settings)
+    }
+    return [c for c in chunks if id(c) in kept]
+
+
+_persist_pool: Optional[ThreadPoolExecutor] = None
+_persist_pool_lock = threading.Lock()
+_persist_pending = 0
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _persist_in_background(path: str, data: bytes, max_pending: int) -> bool:
+    """Queue the copy; False if max_pending copies (and their bytes) are queued."""
+    global _persist_pool, _persist_pending
+    with _persist_pool_lock:
+        if _persist_pending >= max_pending:
+            return False
+        _persist_pending += 1
+        if _persist_pool is None:
+            _persist_pool = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="upload-persist"
+            )
+    _persist_pool.submit(_persist_queued, path, data)
+    return True
+
+
+def _persist_queued(path: str, data: bytes) -> None:
+    global _persist_pending
+    try:
+        _persist_copy(path, data)
+    finally:
+        with _persist_pool_lock:
+            _persist_pending -= 1
+
+
+def _persist_copy(path: str, data: bytes) -> None:
+    try:
+        with span("upload_save"):
+            _write_atomic(path, data)
+    except Exception as e:
+        # The upload was already parsed from memory; losing the copy is not fatal.
+        CustomLogger().get_logger(__name__).warning(
+            "Background upload copy failed", path=path, error=str(e)
+        )
+
 
 class DocumentHandler:
     """
@@ -112,6 +373,10 @@ class DocumentHandler:
         self, data_dir: Optional[str] = None, session_id: Optional[str] = None
     ):
         self.log = CustomLogger().get_logger(__name__)
+        upload_cfg = load_config().get("analysis", {}).get("upload", {})
+        self.spool_threshold = int(upload_cfg.get("spool_threshold_bytes", 16 << 20))
+        self.persist = upload_cfg.get("persist", "async")
+        self.persist_max_pending = int(upload_cfg.get("persist_max_pending", 16))
         self.data_dir = data_dir or os.getenv(
             "DATA_STORAGE_PATH", os.path.join(os.getcwd(), "data", "document_analysis")
         )
@@ -135,9 +400,11 @@ class DocumentHandler:
                 raise ValueError("Invalid file type. Only PDFs are allowed.")
 
             save_path = os.path.join(self.session_path, filename)
-            with open(save_path, "wb") as f:
+            with span("upload_save"), open(save_path, "wb") as f:
                 if hasattr(uploaded_file, "read"):
                     f.write(uploaded_file.read())
+                elif hasattr(uploaded_file, "getbuffer"):
+                    f.write(uploaded_file.getbuffer())
                 else:
                     f.write(uploaded_file.get_buffer())
             self.log.info(
@@ -148,18 +415,61 @@ class DocumentHandler:
             self.log.error(f"Error saving PDF: {e}")
             raise DocumentPortalException(f"Failed to save PDF: {e}") from e
 
-    def read_pdf(self, pdf_path: str):
+    def open_upload(self, uploaded_file) -> Union[bytes, str]:
+        """
+        Return what read_pdf should parse for an uploaded PDF. Uploads up to
+        analysis.upload.spool_threshold_bytes stay in memory and are returned
+        as bytes, so parsing never waits on disk; the session copy is then
+        written in the background or skipped (analysis.upload.persist).
+        Larger uploads are saved to the session dir first and returned as a path.
+        """
+        size = getattr(uploaded_file, "size", None)
+        if size is not None and size > self.spool_threshold:
+            return self.save_pdf(uploaded_file)
+        try:
+            filename = os.path.basename(uploaded_file.name)
+            if not filename.lower().endswith(".pdf"):
+                self.log.error("Invalid file type", file_type=filename.split(".")[-1])
+                raise ValueError("Invalid file type. Only PDFs are allowed.")
+            if hasattr(uploaded_file, "getbuffer"):
+                data = bytes(uploaded_file.getbuffer())
+            else:
+                data = uploaded_file.read()
+        except Exception as e:
+            self.log.error(f"Error reading upload: {e}")
+            raise DocumentPortalException(f"Failed to read upload: {e}") from e
+
+        if len(data) > self.spool_threshold:  # size was not known up front
+            with span("upload_save"):
+                save_path = os.path.join(self.session_path, filename)
+                _write_atomic(save_path, data)
+            return save_path
+        if self.persist == "async":
+            save_path = os.path.join(self.session_path, filename)
+            if not _persist_in_background(save_path, data, self.persist_max_pending):
+                _persist_copy(save_path, data)  # queue full: write it now instead
+        self.log.info(
+            "PDF kept in memory",
+            file=filename,
+            bytes=len(data),
+            persist=self.persist,
+            session_id=self.session_id,
+        )
+        return data
+
+    def read_pdf(self, pdf_path: Union[str, bytes]):
+        """Extract page text from a saved PDF path or in-memory PDF bytes."""
         try:
-            text_chunks = []
-            with fitz.open(pdf_path) as doc:
-                for page_num in range(doc.page_count):
-                    page = doc.load_page(page_num)
-                    text_chunks.append(
-                        f"\n--- Page {page_num + 1} ---\n{page.get_text()}"
-                    )  # type: ignore
-            text = "\n".join(text_chunks)
+            with span("parse"):
+                parsed = parse_pdf(pdf_path)
+            text = parsed.as_text()
+            source = (
+                f"<{len(pdf_path)} bytes>"
+                if isinstance(pdf_path, (bytes, bytearray))
+                else pdf_path
+            )
             self.log.info(
-                f"PDF read successfully with pdf_path={pdf_path}, session_id={self.session_id}, pages={len(text_chunks)}"
+                f"PDF read successfully with pdf_path={source}, session_id={self.session_id}, pages={len(parsed.pages)}"
             )
             return text
         except Exception as e:
@@ -167,18 +477,274 @@ class DocumentHandler:
             raise DocumentPortalException(f"Failed to read PDF: {e}") from e
 
 
+@dataclass
+class IngestReport:
+    files_added: int = 0
+    files_skipped: int = 0
+    chunks_added: int = 0
+    chunks_skipped: int = 0
+    files_replaced: int = 0
+    chunks_removed: int = 0
+    files_resumed: int = 0
+    chunks_resumed: int = 0
+    chunks_deduplicated: int = 0
+
+
+_compacting: set = set()
+_compacting_lock = threading.Lock()
+
+
+def schedule_compaction(index_dir, model_loader: Optional[ModelLoader] = None) -> bool:
+    """
+    Compact index_dir on a background thread unless one is already running
+    for it. Queries keep using the loaded generation in the meantime.
+    """
+    key = str(Path(index_dir).resolve())
+    with _compacting_lock:
+        if key in _compacting:
+            return False
+        _compacting.add(key)
+
+    def run():
+        try:
+            with writer_lock(key):
+                fm = FaissManager(key, model_loader)
+                fm.load_or_create()
+                fm.compact()
+        except Exception as e:
+            CustomLogger().get_logger(__name__).error(
+                "Background compaction failed", index=key, error=str(e)
+            )
+        finally:
+            with _compacting_lock:
+                _compacting.discard(key)
+
+    threading.Thread(target=run, name="index-compact", daemon=True).start()
+    return True
+
+
 class ChatIngestor:
-    def __init__(self):
-        pass
+    """
+    Builds or extends the chat index of a session. Indexing into an existing
+    session appends: files whose content hash is already indexed are skipped
+    and only the chunks of new files are embedded. Removed and replaced files
+    are tombstoned and compacted away in the background.
+    """
+
+    def __init__(
+        self,
+        temp_base: str = "data",
+        faiss_base: str = "faiss_index",
+        use_session_dirs: bool = True,
+        session_id: Optional[str] = None,
+    ):
+        try:
+            self.log = CustomLogger().get_logger(__name__)
+            self.model_loader = ModelLoader()
+            self.use_session = use_session_dirs
+            self.session_id = (
+                session_id
+                or f"session_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex}"
+            )
+
+            self.temp_base = Path(temp_base)
+            self.faiss_base = Path(faiss_base)
+            self.temp_dir = self._resolve_dir(self.temp_base)
+            self.faiss_dir = self._resolve_dir(self.faiss_base)
+            faiss_cfg = self.model_loader.config.get("faiss_db", {})
+            self.compact_ratio = float(faiss_cfg.get("compact_tombstone_ratio", 0.2))
+            self.dedup: Dict[str, Any] = faiss_cfg.get("near_duplicates", {})
+            self.last_report = IngestReport()
+            self.log.info(
+                "ChatIngestor initialized",
+                session_id=self.session_id,
+                temp_dir=str(self.temp_dir),
+                faiss_dir=str(self.faiss_dir),
+            )
+        except Exception as e:
+            self.log.error(f"Error initializing ChatIngestor: {e}")
+            raise DocumentPortalException(
+                f"Failed to initialize ChatIngestor: {e}"
+            ) from e
 
-    def _resolve_dir(self):
-        pass
+    def _resolve_dir(self, base: Path) -> Path:
+        path = base / self.session_id if self.use_session else base
+        path.mkdir(parents=True, exist_ok=True)
+        return path
 
-    def _split(self):
-        pass
+    def _split(
+        self, docs: List[Document], chunk_size: int, chunk_overlap: int
+    ) -> List[Document]:
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        )
+        with span("split"):
+            return splitter.split_documents(docs)
+
+    def _save_files(self, uploaded_files) -> List[Tuple[Path, str, str]]:
+        """Save supported uploads; returns (path, original name, sha256) each."""
+        supported = set(supported_extensions())
+        saved = []
+        for uploaded_file in uploaded_files:
+            name = os.path.basename(uploaded_file.name)
+            ext = Path(name).suffix.lower()
+            if ext not in supported:
+                self.log.warning("Unsupported file type", file=name)
+                continue
+            if hasattr(uploaded_file, "getbuffer"):
+                data = bytes(uploaded_file.getbuffer())
+            else:
+                data = uploaded_file.read()
+            path = self.temp_dir / f"{uuid.uuid4().hex[:8]}{ext}"
+            with span("upload_save"), open(path, "wb") as f:
+                f.write(data)
+            saved.append((path, name, hashlib.sha256(data).hexdigest()))
+        return saved
+
+    def build_retriever(
+        self,
+        uploaded_files: Iterable,
+        *,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        k: int = 5,
+        replace: bool = False,
+    ):
+        """
+        Index uploaded_files into the session and return a retriever over the
+        whole index. With replace, indexed files with the same name as a new
+        upload are removed. Chunks that nearly duplicate an earlier chunk on
+        the same page of the same file are dropped before embedding
+        (faiss_db.near_duplicates); the kept chunk lists them in its
+        metadata. Files left staged by an
+        earlier call that failed are indexed too, reusing their chunks and
+        committed embeddings, so a retry (with or without the files) resumes
+        where it stopped. Counts of added, resumed, skipped, deduplicated and
+        replaced files and chunks are left in last_report.
+        """
+        try:
+            saved = self._save_files(uploaded_files)
+            report = IngestReport()
+            with writer_lock(self.faiss_dir):
+                fm = FaissManager(self.faiss_dir, self.model_loader)
+                fm.load_or_create()
+
+                # Files staged by an earlier attempt that failed are finished
+                # first; re-sending them costs no parsing.
+                staged = fm.staged_files()
+                new_files: Dict[str, Dict[str, Any]] = {}
+                new_chunks: List[Document] = []
+                skipped: List[str] = []
+                for path, name, content_hash in saved:
+                    if content_hash in staged:
+                        path.unlink(missing_ok=True)
+                        continue
+                    if fm.has_file(content_hash) or content_hash in new_files:
+                        skipped.append(content_hash)
+                        path.unlink(missing_ok=True)
+                        continue
+                    with span("parse"):
+                        docs = load_documents([path])
+                    doc_id = uuid.uuid4().hex
+                    for doc in docs:
+                        doc.metadata.update(
+                            file_name=name, content_hash=content_hash, doc_id=doc_id
+                        )
+                    new_chunks.extend(self._split(docs, chunk_size, chunk_overlap))
+                    new_files[content_hash] = {
+                        "doc_id": doc_id,
+                        "name": name,
+                        "ingested_at": datetime.now(timezone.utc).isoformat(),
+                    }
+
+                by_file: Dict[str, List[Document]] = {h: [] for h in new_files}
+                for chunk in new_chunks:
+                    by_file[chunk.metadata["content_hash"]].append(chunk)
+                if self.dedup.get("enabled", True):
+                    # Within each page of each file only: a dropped chunk is
+                    # indexed under its representative's file and page, so
+                    # source and page filters must see the same ones.
+                    with span("dedup"):
+                        by_file = {
+                            h: _dedup_per_page(chunks, self.dedup)
+                            for h, chunks in by_file.items()
+                        }
+                    report.chunks_deduplicated = len(new_chunks) - sum(
+                        len(chunks) for chunks in by_file.values()
+                    )
+                for content_hash, info in new_files.items():
+                    info["chunks"] = len(by_file[content_hash])
+                    fm.stage_file(content_hash, info, by_file[content_hash])
+
+                added_files = {**staged, **new_files}
+                if fm.vectorstore is None and not any(
+                    f["chunks"] for f in added_files.values()
+                ):
+                    fm.checkpoint.clear()
+                    raise ValueError("No valid documents loaded")
+                new_names = {f["name"] for f in added_files.values()}
+                outdated = [
+                    h
+                    for h, f in fm.live_files().items()
+                    if replace and f["name"] in new_names
+                ]
+                report.chunks_added, report.chunks_resumed = fm.commit_staged()
+                report.files_added = len(added_files)
+                report.files_resumed = len(staged)
+                report.files_skipped = len(skipped)
+                report.chunks_skipped = sum(fm.file_chunks(h) for h in skipped)
+                # Tombstoned only after the new versions are live, so there is
+                # no window in which neither version is searchable.
+                removed = fm.remove_documents(outdated)
+                report.files_replaced = len(removed)
+                report.chunks_removed = sum(f["chunks"] for f in removed.values())
+                if fm.compaction_due(self.compact_ratio):
+                    schedule_compaction(self.faiss_dir, self.model_loader)
+
+            CHUNKS.labels("chat_index").inc(report.chunks_added)
+            self.last_report = report
+            self.log.info(
+                "Chat index updated",
+                session_id=self.session_id,
+                index=str(self.faiss_dir),
+                **asdict(report),
+            )
+            return ScopedRetriever(
+                vectorstore=fm.vectorstore, index_dir=str(self.faiss_dir), k=k
+            )
+        except Exception as e:
+            self.log.error(f"Error building retriever: {e}")
+            raise DocumentPortalException(f"Failed to build retriever: {e}") from e
 
-    def build_retriever(self):
-        pass
+    def remove_documents(self, documents: Iterable[str]) -> Dict[str, Any]:
+        """
+        Remove documents, given by file name or content hash, from the session
+        index. They disappear from search immediately; their rows are dropped
+        by a background compaction once enough have accumulated.
+        """
+        try:
+            with writer_lock(self.faiss_dir):
+                fm = FaissManager(self.faiss_dir, self.model_loader)
+                if fm.load_or_create() is None:
+                    raise FileNotFoundError(f"No FAISS index in {self.faiss_dir}")
+                removed = fm.remove_documents(documents)
+                scheduled = False
+                if fm.compaction_due(self.compact_ratio):
+                    scheduled = schedule_compaction(self.faiss_dir, self.model_loader)
+            self.log.info(
+                "Documents removed",
+                session_id=self.session_id,
+                removed=len(removed),
+                compaction_scheduled=scheduled,
+            )
+            return {
+                "removed": sorted(f["name"] for f in removed.values()),
+                "chunks_removed": sum(f["chunks"] for f in removed.values()),
+                "compaction_scheduled": scheduled,
+            }
+        except Exception as e:
+            self.log.error(f"Error removing documents: {e}")
+            raise DocumentPortalException(f"Failed to remove documents: {e}") from e
 
 
 class DocumentComparator:
@@ -201,18 +767,22 @@ class DocumentComparator:
             f"DocumentComparator initialized session_path={self.session_path}"
         )
 
+    def save_uploaded_file(self, fobj) -> Path:
+        """Save one uploaded PDF into the session directory."""
+        if not fobj.name.lower().endswith(".pdf"):
+            raise ValueError("Only PDF files are allowed.")
+        out = self.session_path / fobj.name
+        with span("upload_save"), open(out, "wb") as f:
+            if hasattr(fobj, "read"):
+                f.write(fobj.read())
+            else:
+                f.write(fobj.getbuffer())
+        return out
+
     def save_uploaded_files(self, reference_file, actual_file) -> tuple[Path, Path]:
         try:
-            ref_path = self.session_path / reference_file.name
-            act_path = self.session_path / actual_file.name
-            for fobj, out in ((reference_file, ref_path), (actual_file, act_path)):
-                if not fobj.name.lower().endswith(".pdf"):
-                    raise ValueError("Only PDF files are allowed.")
-                with open(out, "wb") as f:
-                    if hasattr(fobj, "read"):
-                        f.write(fobj.read())
-                    else:
-                        f.write(fobj.getbuffer())
+            ref_path = self.save_uploaded_file(reference_file)
+            act_path = self.save_uploaded_file(actual_file)
             self.log.info(
                 f"Files saved reference={ref_path}, actual={act_path}, session={self.session_id}"
             )
@@ -237,21 +807,26 @@ class DocumentComparator:
             str: The extracted text from the PDF.
         """
         try:
-            with fitz.open(pdf_path) as doc:
-                if doc.is_encrypted:
-                    raise ValueError(f"PDF is encrypted: {pdf_path.name}")
-                parts = []
-                for page_num in range(doc.page_count):
-                    page = doc.load_page(page_num)
-                    text = page.get_text()  # type: ignore
-                    if text.strip():
-                        parts.append(f"\n --- Page {page_num + 1} --- \n{text}")
-            self.log.info(f"PDF read successfully file={pdf_path}, pages={len(parts)}")
-            return "\n".join(parts)
+            with span("parse"):
+                parsed = parse_pdf(pdf_path)
+            pages = sum(1 for page in parsed.pages if page.text.strip())
+            self.log.info(f"PDF read successfully file={pdf_path}, pages={pages}")
+            return _compare_text(parsed)
         except Exception as e:
             self.log.error(f"Error reading PDF file={pdf_path}, error={str(e)}")
             raise DocumentPortalException(f"Error reading PDF {str(e)}  ", e) from e
 
+    def _session_pdfs(self) -> list[Path]:
+        return [
+            file
+            for file in sorted(self.session_path.iterdir())
+            if file.is_file() and file.suffix.lower() == ".pdf"
+        ]
+
+    def document_hashes(self) -> list[str]:
+        """Content hashes of the session PDFs, in the order combine_documents uses."""
+        return [sha256_of(file) for file in self._session_pdfs()]
+
     def combine_documents(self) -> str:
         """Combine two PDF documents into a single document.
 
@@ -263,10 +838,9 @@ class DocumentComparator:
         """
         try:
             doc_parts = []
-            for file in sorted(self.session_path.iterdir()):
-                if file.is_file() and file.suffix.lower() == ".pdf":
-                    content = self.read_pdf(file)
-                    doc_parts.append(f"Document: {file.name}\n{content}")
+            for file in self._session_pdfs():
+                content = self.read_pdf(file)
+                doc_parts.append(f"Document: {file.name}\n{content}")
             combined_text = "\n\n".join(doc_parts)
             self.log.info(
                 f"Documents combined count={len(doc_parts)}, session={self.session_id}"
@@ -280,12 +854,27 @@ class DocumentComparator:
                 f"Error combining documents {str(e)}", e
             ) from e
 
+    def combine_parsed(self, documents: List[Tuple[str, ParsedDocument]]) -> str:
+        """Combine already parsed (name, document) pairs in the given order."""
+        combined_text = "\n\n".join(
+            f"Document: {name}\n{_compare_text(parsed)}" for name, parsed in documents
+        )
+        self.log.info(
+            f"Documents combined count={len(documents)}, session={self.session_id}"
+        )
+        return combined_text
+
     def clean_old_sessions(self, keep_latest: int = 3):
         try:
+            # Most recently accessed first; folder names do not reflect usage.
             sessions = sorted(
-                [f for f in self.base_dir.iterdir() if f.is_dir()], reverse=True
+                [f for f in self.base_dir.iterdir() if f.is_dir()],
+                key=last_access,
+                reverse=True,
             )
             for folder in sessions[keep_latest:]:
+                if folder == self.session_path or is_leased(folder):
+                    continue
                 shutil.rmtree(folder, ignore_errors=True)
                 self.log.info(f"Old session folder deleted path={str(folder)}")
         except Exception as e:
@@ -295,6 +884,15 @@ class DocumentComparator:
             ) from e
 
 
+def _compare_text(parsed: ParsedDocument) -> str:
+    """Non-empty pages with the page markers the comparison prompt is fed."""
+    return "\n".join(
+        f"\n --- Page {page.page + 1} --- \n{page.text}"
+        for page in parsed.pages
+        if page.text.strip()
+    )
+
+
 if __name__ == "__main__":
     from pathlib import Path
 
@@ -1,11 +1,42 @@
+import asyncio
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
 from utils.model_loader import ModelLoader
 from logger.custom_logger import CustomLogger
 from exception.custom_exception import DocumentPortalException
-from model.models import Metadata
+from model.models import DocumentSummary, Metadata
 from langchain_core.output_parsers import JsonOutputParser
 from langchain.output_parsers import OutputFixingParser
-from prompts.prompt_library import PROMPT_REGISTRY
+from prompts.prompt_library import PROMPT_REGISTRY, PROMPT_VERSIONS
+from utils.document_profile import (
+    NOT_AVAILABLE,
+    PROFILE_VERSION,
+    local_metadata,
+    sample_text,
+)
+from utils.parse_cache import ParsedDocument, parse_pdf
+from utils.result_cache import ResultCache, llm_result_key, schema_fingerprint
+from utils.metrics import LLMMetricsHandler, span
+
+# PyMuPDF is not thread-safe, so batch parsing fans out to worker processes.
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_workers = 0
+
+
+def _init_parse_worker() -> None:
+    CustomLogger()  # give the worker its own log listener
+
+
+def _get_parse_pool(workers: int) -> ProcessPoolExecutor:
+    global _parse_pool, _parse_pool_workers
+    if _parse_pool is None or _parse_pool_workers != workers:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=False)
+        _parse_pool = ProcessPoolExecutor(workers, initializer=_init_parse_worker)
+        _parse_pool_workers = workers
+    return _parse_pool
 
 
 class DocumentAnalyzer:
@@ -27,6 +58,25 @@ class DocumentAnalyzer:
             )
 
             self.prompt = PROMPT_REGISTRY["document_analysis"]
+            self.chain = self.prompt | self.llm.with_config(run_name="analyze")
+
+            # Fast path: metadata is read from the PDF itself and the LLM only
+            # summarizes a token-bounded sample of the text.
+            self.summary_parser = JsonOutputParser(pydantic_object=DocumentSummary)
+            self.summary_fixing_parser = OutputFixingParser.from_llm(
+                parser=self.summary_parser, llm=self.llm
+            )
+            self.summary_prompt = PROMPT_REGISTRY["document_summary"]
+            self.summary_chain = self.summary_prompt | self.llm.with_config(
+                run_name="analyze"
+            )
+            self.fast_path, self.max_sample_tokens = _fast_path_settings(
+                self.loader.config
+            )
+
+            batch_cfg = self.loader.config.get("analysis", {}).get("batch", {})
+            self.max_concurrency = int(batch_cfg.get("max_concurrency", 4))
+            self.parse_workers = int(batch_cfg.get("parse_workers", 2))
 
             self.log.info("DocumentAnalyzer initialized successfully")
         except Exception as e:
@@ -35,21 +85,77 @@ class DocumentAnalyzer:
                 "Failed to initialize DocumentAnalyzer", sys
             ) from e
 
+    @staticmethod
+    def cache_key(doc_hashes: List[str], loader: ModelLoader) -> str:
+        """Result-cache key for analyzing the documents with the given content hashes."""
+        fast_path, max_sample_tokens = _fast_path_settings(loader.config)
+        prompt_version = PROMPT_VERSIONS["document_analysis"]
+        if fast_path:
+            prompt_version = (
+                f"summary-{PROMPT_VERSIONS['document_summary']}"
+                f"-profile-{PROFILE_VERSION}-tokens-{max_sample_tokens}"
+            )
+        return llm_result_key(
+            "analyze",
+            doc_hashes,
+            loader.llm_identity(),
+            prompt_version,
+            schema_fingerprint(Metadata),
+        )
+
+    def analyze_pdf(self, source: Union[str, Path, bytes]) -> dict:
+        """Parse a PDF (path or bytes) and analyze it, on the fast path if enabled."""
+        with span("parse"):
+            parsed = parse_pdf(source)
+        if self.fast_path:
+            return self.analyze_parsed(parsed)
+        return self.analyze_document(parsed.as_text())
+
+    def analyze_parsed(self, parsed: ParsedDocument) -> dict:
+        """
+        Metadata for a parsed PDF with the descriptive fields read locally and
+        only a sampled excerpt sent to the LLM for the summary.
+        """
+        try:
+            with span("profile"):
+                local = local_metadata(parsed)
+                sample = sample_text(parsed, self.max_sample_tokens)
+            config = {"callbacks": [LLMMetricsHandler("analyze")]}
+            raw = self.summary_chain.invoke(
+                {
+                    "format_instructions": self.summary_parser.get_format_instructions(),
+                    "document_text": sample,
+                },
+                config=config,
+            )
+            with span("output_parse"):
+                summary = self.summary_fixing_parser.invoke(raw, config=config)
+            self.log.info(
+                "Fast-path metadata extraction successful",
+                pages=parsed.page_count,
+                text_chars=sum(len(p.text) for p in parsed.pages),
+                sample_chars=len(sample),
+            )
+            return _merge_metadata(local, summary)
+        except Exception as e:
+            self.log.error(f"Metadata analysis failed: {e}")
+            raise DocumentPortalException("Metadata extraction failed", sys) from e
+
     def analyze_document(self, document_text: str) -> dict:
         """
         Analyze a document's text and extract structured metadata & summary.
         """
         try:
-            chain = self.prompt | self.llm | self.fixing_parser
-
-            self.log.info("Meta-data analysis chain initialized")
-
-            response = chain.invoke(
+            config = {"callbacks": [LLMMetricsHandler("analyze")]}
+            raw = self.chain.invoke(
                 {
                     "format_instructions": self.parser.get_format_instructions(),
                     "document_text": document_text,
-                }
+                },
+                config=config,
             )
+            with span("output_parse"):
+                response = self.fixing_parser.invoke(raw, config=config)
 
             self.log.info(
                 f"Metadata extraction successful with keys={list(response.keys())}"
@@ -61,6 +167,152 @@ class DocumentAnalyzer:
             self.log.error(f"Metadata analysis failed: {e}")
             raise DocumentPortalException("Metadata extraction failed", sys) from e
 
+    def _llm_input(self, parsed: ParsedDocument) -> Tuple[Optional[dict], str]:
+        """(locally read metadata or None, text to send) for one parsed PDF."""
+        if not self.fast_path:
+            return None, parsed.as_text()
+        with span("profile"):
+            return local_metadata(parsed), sample_text(parsed, self.max_sample_tokens)
+
+    async def analyze_files(
+        self,
+        pdf_paths: Sequence[Union[str, Path]],
+        max_concurrency: Optional[int] = None,
+        cache: Optional[ResultCache] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Parse PDFs in parallel worker processes and analyze each one as soon
+        as it is parsed, at most max_concurrency LLM calls at a time.
+        Yields one record per file as soon as it completes:
+        {"index", "file", "status": "ok"|"error", "result"|"error", "cache"}.
+        With a result cache, previously analyzed documents are answered without
+        an LLM call and new results are stored.
+        """
+        loop = asyncio.get_running_loop()
+        names = [Path(p).name for p in pdf_paths]
+        parallel = self.parse_workers > 1 and len(pdf_paths) > 1
+        pool = _get_parse_pool(self.parse_workers) if parallel else None
+        serial = asyncio.Lock()
+        calls = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        if self.fast_path:
+            prompt, parser, fixing_parser = (
+                self.summary_prompt,
+                self.summary_parser,
+                self.summary_fixing_parser,
+            )
+        else:
+            prompt, parser, fixing_parser = self.prompt, self.parser, self.fixing_parser
+        chain = prompt | self.llm.with_config(run_name="analyze") | fixing_parser
+        config = {"callbacks": [LLMMetricsHandler("analyze")]}
+        format_instructions = parser.get_format_instructions()
+
+        async def _parse(index: int) -> ParsedDocument:
+            with span("parse"):
+                if pool is not None:
+                    return await loop.run_in_executor(
+                        pool, parse_pdf, str(pdf_paths[index])
+                    )
+                async with serial:
+                    return await asyncio.to_thread(parse_pdf, pdf_paths[index])
+
+        async def _analyze(index: int) -> Dict[str, Any]:
+            try:
+                parsed = await _parse(index)
+            except Exception as e:
+                self.log.error("Batch parse failed", file=names[index], error=str(e))
+                return _batch_record(index, names[index], error=e)
+            key = None
+            if cache is not None:
+                key = self.cache_key([parsed.sha256], self.loader)
+                cached = await asyncio.to_thread(cache.lookup, key, "analyze")
+                if cached is not None:
+                    return _batch_record(
+                        index, names[index], result=cached, cache="HIT"
+                    )
+            local, text = await asyncio.to_thread(self._llm_input, parsed)
+            try:
+                async with calls:
+                    result = await chain.ainvoke(
+                        {
+                            "format_instructions": format_instructions,
+                            "document_text": text,
+                        },
+                        config=config,
+                    )
+            except Exception as e:
+                self.log.error(
+                    "Batch metadata analysis failed", file=names[index], error=str(e)
+                )
+                return _batch_record(index, names[index], error=e)
+            if local is not None:
+                result = _merge_metadata(local, result)
+            if cache is not None and key is not None:
+                await asyncio.to_thread(cache.store, key, "analyze", result)
+            return _batch_record(
+                index,
+                names[index],
+                result=result,
+                cache=None if cache is None else "MISS",
+            )
+
+        self.log.info(
+            "Batch metadata analysis started",
+            documents=len(pdf_paths),
+            max_concurrency=max_concurrency or self.max_concurrency,
+        )
+        tasks = [asyncio.ensure_future(_analyze(i)) for i in range(len(pdf_paths))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+_default_analyzer: Optional[DocumentAnalyzer] = None
+
+
+def get_document_analyzer() -> DocumentAnalyzer:
+    """Process-wide analyzer; its LLM client and chains are built once."""
+    global _default_analyzer
+    if _default_analyzer is None:
+        _default_analyzer = DocumentAnalyzer()
+    return _default_analyzer
+
+
+def _fast_path_settings(config: Dict[str, Any]) -> Tuple[bool, int]:
+    fast_cfg = config.get("analysis", {}).get("fast_path", {})
+    return bool(fast_cfg.get("enabled", True)), int(
+        fast_cfg.get("max_sample_tokens", 3000)
+    )
+
+
+def _merge_metadata(local: Dict[str, Any], summary: Dict[str, Any]) -> dict:
+    """Locally read fields plus the LLM's, in Metadata field order."""
+    fields = {**local, **{k: summary.get(k) for k in DocumentSummary.model_fields}}
+    fields["Publisher"] = fields["Publisher"] or NOT_AVAILABLE
+    return {name: fields.get(name) for name in Metadata.model_fields}
+
+
+def _batch_record(
+    index: int,
+    file: str,
+    result: Optional[dict] = None,
+    error: Optional[Exception] = None,
+    cache: Optional[str] = None,
+) -> Dict[str, Any]:
+    if error is not None:
+        return {"index": index, "file": file, "status": "error", "error": str(error)}
+    record: Dict[str, Any] = {
+        "index": index,
+        "file": file,
+        "status": "ok",
+        "result": result,
+    }
+    if cache is not None:
+        record["cache"] = cache
+    return record
+
 
 if __name__ == "__main__":
     analyzer = DocumentAnalyzer()
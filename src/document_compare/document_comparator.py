@@ -1,4 +1,5 @@
 import sys
+from typing import List, Optional
 from dotenv import load_dotenv
 import pandas as pd
 from langchain_core.output_parsers import JsonOutputParser
@@ -6,8 +7,10 @@ from langchain.output_parsers import OutputFixingParser
 from utils.model_loader import ModelLoader
 from logger.custom_logger import CustomLogger
 from exception.custom_exception import DocumentPortalException
-from prompts.prompt_library import PROMPT_REGISTRY
+from prompts.prompt_library import PROMPT_REGISTRY, PROMPT_VERSIONS
 from model.models import SummaryResponse, PromptType
+from utils.metrics import LLMMetricsHandler, span
+from utils.result_cache import llm_result_key, schema_fingerprint
 
 
 class DocumentComparatorLLM:
@@ -21,8 +24,19 @@ class DocumentComparatorLLM:
             parser=self.parser, llm=self.llm
         )
         self.prompt = PROMPT_REGISTRY[PromptType.DOCUMENT_COMPARISON.value]
-        self.chain = self.prompt | self.llm | self.parser
-        self.log.info(f"DocumentComparatorLLM initialized model={self.llm}")
+        self.chain = self.prompt | self.llm.with_config(run_name="compare")
+        self.log.info("DocumentComparatorLLM initialized model=%s", self.llm)
+
+    @staticmethod
+    def cache_key(doc_hashes: List[str], loader: ModelLoader) -> str:
+        """Result-cache key for comparing documents in the given (reference, actual) order."""
+        return llm_result_key(
+            "compare",
+            doc_hashes,
+            loader.llm_identity(),
+            PROMPT_VERSIONS[PromptType.DOCUMENT_COMPARISON.value],
+            schema_fingerprint(SummaryResponse),
+        )
 
     def compare_documents(self, combined_docs: str) -> pd.DataFrame:
         """
@@ -35,8 +49,12 @@ class DocumentComparatorLLM:
             }
 
             self.log.info("Invoking document comparison LLM chain")
-            response = self.chain.invoke(inputs)
-            self.log.info(f"Chain invoked successfully: {str(response)[:200]}")
+            raw = self.chain.invoke(
+                inputs, config={"callbacks": [LLMMetricsHandler("compare")]}
+            )
+            with span("output_parse"):
+                response = self.parser.invoke(raw)
+            self.log.info("Chain invoked successfully", response=response)
             return self._format_response(response)
         except Exception as e:
             self.log.error("Error in compare_documents", error=str(e))
@@ -51,3 +69,14 @@ class DocumentComparatorLLM:
             raise DocumentPortalException(
                 f"Error formatting response: {sys} from {e}"
             ) from e
+
+
+_default_comparator: Optional[DocumentComparatorLLM] = None
+
+
+def get_document_comparator_llm() -> DocumentComparatorLLM:
+    """Process-wide comparator; its LLM client and chain are built once."""
+    global _default_comparator
+    if _default_comparator is None:
+        _default_comparator = DocumentComparatorLLM()
+    return _default_comparator
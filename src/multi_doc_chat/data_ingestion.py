@@ -4,16 +4,15 @@ from logger.custom_logger import CustomLogger
 from utils.model_loader import ModelLoader
 from datetime import datetime
 import uuid
-from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, TextLoader
-from langchain_community.document_loaders.markdown import (
-    UnstructuredMarkdownLoader as MarkdownLoader,
-)
+from utils.document_ops import get_loader, supported_extensions
+from utils.metrics import CHUNKS, span
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
+from utils.index_store import publish_index
+from utils.vector_store import build_vectorstore
 
 
 class DocumentIngestor:
-    SUPPORTED_FILE_TYPES = [".pdf", ".docx", ".txt", ".md"]
+    SUPPORTED_FILE_TYPES = supported_extensions()
 
     def __init__(
         self,
@@ -61,29 +60,22 @@ class DocumentIngestor:
                 unique_filename = f"{uuid.uuid4().hex[:8]}{ext}"
                 temp_path = self.session_temp_dir / unique_filename
 
-                with open(temp_path, "wb") as f:
+                with span("upload_save"), open(temp_path, "wb") as f:
                     f.write(uploaded_file.read())
                 self.log.info(
                     f"Saved uploaded file to: {temp_path} in {self.session_id}"
                 )
 
-                if ext == ".pdf":
-                    self.log.info(f"Processing PDF file: {temp_path}")
-                    loader = PyPDFLoader(str(temp_path))
-                elif ext == ".docx":
-                    self.log.info(f"Processing DOCX file: {temp_path}")
-                    loader = Docx2txtLoader(str(temp_path))
-                elif ext == ".txt":
-                    self.log.info(f"Processing TXT file: {temp_path}")
-                    loader = TextLoader(str(temp_path))
-                elif ext == ".md":
-                    self.log.info(f"Processing MD file: {temp_path}")
-                    loader = MarkdownLoader(str(temp_path))
-                else:
+                loader = get_loader(str(temp_path))
+                if loader is None:
                     self.log.warning(f"Unsupported file type: {ext}")
                     continue
+                self.log.info(
+                    f"Processing {ext} file with {type(loader).__name__}: {temp_path}"
+                )
 
-                docs = loader.load()
+                with span("parse"):
+                    docs = loader.load()
                 if docs:
                     documents.extend(docs)
                     self.log.info(f"Loaded {len(docs)} documents from {temp_path}")
@@ -119,7 +111,9 @@ class DocumentIngestor:
             splitter = RecursiveCharacterTextSplitter(
                 chunk_size=1000, chunk_overlap=300
             )
-            chunks = splitter.split_documents(documents)
+            with span("split"):
+                chunks = splitter.split_documents(documents)
+            CHUNKS.labels("multi_doc_chat").inc(len(chunks))
             self.log.info(f"Created {len(chunks)} chunks in {self.session_id}.")
 
             # Validate chunks
@@ -128,8 +122,17 @@ class DocumentIngestor:
                 raise DocumentPortalException("No chunks created from documents")
 
             embeddings = self.model_loader.load_embeddings()
-            vectorstore = FAISS.from_documents(chunks, embeddings)
-            vectorstore.save_local(str(self.session_faiss_dir))
+            texts = [c.page_content for c in chunks]
+            with span("embed"):
+                vectors = embeddings.embed_documents(texts)
+            with span("index_build"):
+                vectorstore = build_vectorstore(
+                    list(zip(texts, vectors)),
+                    embeddings,
+                    metadatas=[c.metadata for c in chunks],
+                )
+            with span("index_save"):
+                publish_index(self.session_faiss_dir, vectorstore)
             self.log.info(
                 f"Created FAISS vector store at {self.session_faiss_dir} in {self.session_id}."
             )
@@ -1,32 +1,39 @@
+import asyncio
 import sys
 import os
 from operator import itemgetter
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Tuple, Union
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.messages import BaseMessage
 from exception.custom_exception import DocumentPortalException
 from logger.custom_logger import CustomLogger
 from model.models import PromptType
 from prompts.prompt_library import PROMPT_REGISTRY
+from utils.config_loader import load_config
 from utils.model_loader import ModelLoader
-from langchain_community.vectorstores import FAISS
+from utils.metrics import LLMMetricsHandler, span
+from utils.index_store import ScopedRetriever, get_index_cache
 
 
 class ConversationalRAG:
-    def __init__(self, session_id: str, retriever=None):
+    def __init__(self, session_id: str, retriever=None, llm=None):
         try:
             self.log = CustomLogger().get_logger(__name__)
             self.session_id = session_id
-            self.llm = self._load_llm()
+            self.llm = llm or self._load_llm()
             self.contextualize_prompt = PROMPT_REGISTRY[
                 PromptType.CONTEXTUALIZE_QUESTION.value
             ]
             self.qa_prompt = PROMPT_REGISTRY[PromptType.CONTEXT_QA.value]
+            self.batch_concurrency = int(
+                load_config().get("chat", {}).get("batch", {}).get("max_concurrency", 8)
+            )
 
-            if retriever is None:
-                raise ValueError("Retriever is required")
+            # The retriever may also be attached later via load_retriever_from_faiss.
             self.retriever = retriever
-            self._build_lcel_chain()
+            self.lcel_chain = None
+            if self.retriever is not None:
+                self._build_lcel_chain()
             self.log.info(
                 f"ConversationalRAG initialized successfully with session_id={session_id}"
             )
@@ -35,20 +42,33 @@ class ConversationalRAG:
             self.log.error(f"Error initializing ConversationalRAG: {e}")
             raise DocumentPortalException("Failed to initialize ConversationalRAG")
 
-    def load_retriever_from_faiss(self, index_path: str):
+    def load_retriever_from_faiss(
+        self,
+        index_path: str,
+        k: int = 5,
+        sources: Optional[List[str]] = None,
+        pages: Optional[Tuple[int, int]] = None,
+    ):
         """
         Load a FAISS vectorstore from disk and convert to retriever.
+        sources (file names) and pages (0-based, inclusive) restrict the search
+        itself; removed documents are skipped until compaction drops them.
         """
         try:
             embeddings = ModelLoader().load_embeddings()
             if not os.path.exists(index_path):
                 raise FileNotFoundError(f"FAISS index not found at {index_path}")
 
-            vectorstore = FAISS.load_local(
-                index_path, embeddings, allow_dangerous_deserialization=True
-            )
-            self.retriever = vectorstore.as_retriever(
-                search_type="similarity", search_kwargs={"k": 5}
+            with span("index_load"):
+                # Cached per process; a newer published generation is loaded in
+                # the background while this one keeps serving.
+                vectorstore = get_index_cache().get(index_path, embeddings)
+            self.retriever = ScopedRetriever(
+                vectorstore=vectorstore,
+                index_dir=str(index_path),
+                k=k,
+                sources=sources,
+                pages=pages,
             )
             self.log.info(f"FAISS retriever loaded successfully in {self.session_id}")
             self._build_lcel_chain()
@@ -73,16 +93,24 @@ class ConversationalRAG:
             str: _description_
         """
         try:
+            if self.lcel_chain is None:
+                raise ValueError(
+                    "RAG chain not initialized; call load_retriever_from_faiss() first"
+                )
             chat_history = chat_history or []
             payload = {"input": user_input, "chat_history": chat_history}
-            answer = self.lcel_chain.invoke(payload)
+            answer = self.lcel_chain.invoke(
+                payload, config={"callbacks": [LLMMetricsHandler("chat")]}
+            )
             if not answer:
                 self.log.warning(
                     f"No answer returned from LCEL chain in {self.session_id}"
                 )
                 return "No answer found"
             self.log.info(
-                f"Answer returned from LCEL chain in {self.session_id}: {answer}"
+                "Answer returned from LCEL chain",
+                session_id=self.session_id,
+                answer=answer,
             )
             return answer
         except Exception as e:
@@ -91,13 +119,79 @@ class ConversationalRAG:
                 "Failed to invoke ConversationalRAG", sys
             ) from e
 
+    def _batch_inputs(self, questions: List[str]) -> List[Dict[str, Any]]:
+        if hasattr(self.retriever, "retrieve_batch"):
+            docs = self.retriever.retrieve_batch(questions)
+        else:
+            docs = self.retriever.batch(questions)
+        return [
+            {"context": self._format_docs(d), "input": q, "chat_history": []}
+            for q, d in zip(questions, docs)
+        ]
+
+    def _batch_config(self, max_concurrency: Optional[int]) -> Dict[str, Any]:
+        return {
+            "max_concurrency": max_concurrency or self.batch_concurrency,
+            "callbacks": [LLMMetricsHandler("chat")],
+        }
+
+    @staticmethod
+    def _batch_answers(answers: List[Any]) -> List[Union[str, Exception]]:
+        return [
+            a if isinstance(a, Exception) else a or "No answer found" for a in answers
+        ]
+
+    def batch(
+        self, questions: List[str], max_concurrency: Optional[int] = None
+    ) -> List[Union[str, Exception]]:
+        """
+        Answer independent questions (no chat history) in input order. All
+        questions are embedded in one call and searched in one FAISS call,
+        then answered with at most max_concurrency LLM calls in flight. A
+        failed question yields its exception instead of failing the batch.
+        """
+        try:
+            if self.lcel_chain is None:
+                raise ValueError(
+                    "RAG chain not initialized; call load_retriever_from_faiss() first"
+                )
+            answers = self.answer_chain.batch(
+                self._batch_inputs(questions),
+                config=self._batch_config(max_concurrency),
+                return_exceptions=True,
+            )
+            return self._batch_answers(answers)
+        except Exception as e:
+            self.log.error(f"Error in ConversationalRAG batch: {e}")
+            raise DocumentPortalException("Failed to run batch questions", sys) from e
+
+    async def abatch(
+        self, questions: List[str], max_concurrency: Optional[int] = None
+    ) -> List[Union[str, Exception]]:
+        """Async form of batch(); retrieval runs in a worker thread."""
+        try:
+            if self.lcel_chain is None:
+                raise ValueError(
+                    "RAG chain not initialized; call load_retriever_from_faiss() first"
+                )
+            inputs = await asyncio.to_thread(self._batch_inputs, questions)
+            answers = await self.answer_chain.abatch(
+                inputs,
+                config=self._batch_config(max_concurrency),
+                return_exceptions=True,
+            )
+            return self._batch_answers(answers)
+        except Exception as e:
+            self.log.error(f"Error in ConversationalRAG batch: {e}")
+            raise DocumentPortalException("Failed to run batch questions", sys) from e
+
     def _load_llm(self):
         try:
             llm = ModelLoader().load_llm()
             if not llm:
                 self.log.error("LLM not loaded")
                 raise ValueError("LLM not loaded")
-            self.log.info(f"LLM loaded successfully: {llm} in {self.session_id}")
+            self.log.info("LLM loaded successfully: %s in %s", llm, self.session_id)
             return llm
         except Exception as e:
             self.log.error(f"Error loading LLM: {e}")
@@ -115,20 +209,20 @@ class ConversationalRAG:
                     "chat_history": itemgetter("chat_history"),
                 }
                 | self.contextualize_prompt
-                | self.llm
+                | self.llm.with_config(run_name="question_rewriter")
                 | StrOutputParser()
             )
             retrieve_docs = question_rewriter | self.retriever | self._format_docs
-            self.lcel_chain = (
-                {
-                    "context": retrieve_docs,
-                    "input": itemgetter("input"),
-                    "chat_history": itemgetter("chat_history"),
-                }
-                | self.qa_prompt
-                | self.llm
+            self.answer_chain = (
+                self.qa_prompt
+                | self.llm.with_config(run_name="answer")
                 | StrOutputParser()
             )
+            self.lcel_chain = {
+                "context": retrieve_docs,
+                "input": itemgetter("input"),
+                "chat_history": itemgetter("chat_history"),
+            } | self.answer_chain
             self.log.info(f"LCEL chain built successfully in {self.session_id}")
         except Exception as e:
             self.log.error(f"Error building LCEL chain: {e}")
@@ -5,9 +5,11 @@ from logger.custom_logger import CustomLogger
 from utils.model_loader import ModelLoader
 from datetime import datetime
 import uuid
-from langchain_community.document_loaders import PyPDFLoader
+from utils.document_ops import FitzPDFLoader
+from utils.metrics import CHUNKS, span
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
+from utils.index_store import publish_index
+from utils.vector_store import build_vectorstore
 
 
 class SingleDocIngestor:
@@ -39,11 +41,12 @@ class SingleDocIngestor:
                 unique_filename = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.pdf"
                 temp_path = self.data_dir / unique_filename
 
-                with open(temp_path, "wb") as f_out:
+                with span("upload_save"), open(temp_path, "wb") as f_out:
                     f_out.write(uploaded_file.read())
                 self.log.info(f"File saved to {temp_path}")
-                loader = PyPDFLoader(str(temp_path))
-                docs = loader.load()
+                loader = FitzPDFLoader(str(temp_path))
+                with span("parse"):
+                    docs = loader.load()
                 documents.extend(docs)
             self.log.info(f"Successfully ingested {len(documents)} documents.")
             return self._create_retriever(documents)
@@ -63,17 +66,28 @@ class SingleDocIngestor:
             splitter = RecursiveCharacterTextSplitter(
                 chunk_size=1000, chunk_overlap=300
             )
-            chunks = splitter.split_documents(documents)
+            with span("split"):
+                chunks = splitter.split_documents(documents)
+            CHUNKS.labels("single_doc_chat").inc(len(chunks))
             self.log.info(f"Successfully created retriever with {len(chunks)} chunks.")
 
             embeddings = self.model_loader.load_embeddings()
-            vector_store = FAISS.from_documents(documents=chunks, embedding=embeddings)
+            texts = [c.page_content for c in chunks]
+            with span("embed"):
+                vectors = embeddings.embed_documents(texts)
+            with span("index_build"):
+                vector_store = build_vectorstore(
+                    list(zip(texts, vectors)),
+                    embeddings,
+                    metadatas=[c.metadata for c in chunks],
+                )
             self.log.info(
                 f"Successfully created FAISS vector store with {len(chunks)} chunks."
             )
 
             # Save the vector store to disk
-            vector_store.save_local(str(self.faiss_dir))
+            with span("index_save"):
+                publish_index(self.faiss_dir, vector_store)
             self.log.info(f"FAISS vector store saved to {self.faiss_dir}")
 
             retriever = vector_store.as_retriever(
@@ -8,7 +8,7 @@ from logger.custom_logger import CustomLogger
 from model.models import PromptType
 from prompts.prompt_library import PROMPT_REGISTRY
 from utils.model_loader import ModelLoader
-from langchain_community.vectorstores import FAISS
+from utils.index_store import get_index_cache, live_search_kwargs
 from langchain_community.chat_message_histories import ChatMessageHistory
 
 
@@ -63,7 +63,7 @@ class ConversationRAG:
     def _load_llm(self):
         try:
             llm = ModelLoader().load_llm()
-            self.log.info(f"LLM loaded successfully: {llm}")
+            self.log.info("LLM loaded successfully: %s", llm)
             return llm
         except Exception as e:
             self.log.error(f"Error loading LLM: {e}")
@@ -78,14 +78,15 @@ class ConversationRAG:
 
     def load_retriever_from_faiss(self, index_path: str):
         try:
-            embedding_model = ModelLoader().load_embedding_model()
+            embedding_model = ModelLoader().load_embeddings()
             if not os.path.isdir(index_path):
                 self.log.error(f"FAISS index path does not exist: {index_path}")
                 raise FileExistsError(f"FAISS index path does not exist: {index_path}")
-            vector_store = FAISS.load_local(index_path, embedding_model)
+            vector_store = get_index_cache().get(index_path, embedding_model)
             self.log.info(f"FAISS vector store loaded successfully from: {index_path}")
             return vector_store.as_retriever(
-                search_type="similarity", search_kwargs={"k": 5}
+                search_type="similarity",
+                search_kwargs=live_search_kwargs(index_path, 5),
             )
 
         except Exception as e:
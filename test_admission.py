@@ -0,0 +1,182 @@
+# Tests for admission control of upload-heavy requests (utils/admission.py)
+
+import asyncio
+
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+
+import utils.admission as admission
+from src.data_ingestion.data_ingestion import DocumentHandler
+from utils.admission import AdmissionController, AdmissionRejected, estimate_cost
+
+COST = {"request_bytes": 100, "upload_byte_multiplier": 2, "page_bytes": 1000}
+
+
+class Upload:
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+
+    def getbuffer(self):
+        pytest.fail("upload read before admission")
+
+
+def _pdf_bytes(pages):
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"page {i}")
+    return doc.tobytes()
+
+
+def _controller(**overrides):
+    config = {
+        "memory_budget_bytes": 1000,
+        "max_queue": 4,
+        "max_wait_seconds": 5,
+        "retry_after_seconds": 7,
+        "endpoints": {"compare": {"max_concurrency": 1}},
+        **overrides,
+    }
+    return AdmissionController(config)
+
+
+def test_cost_grows_with_upload_size_and_known_pages_without_reading():
+    uploads = [Upload("a.pdf", 400), Upload("b.txt", 50)]
+
+    assert estimate_cost(uploads, COST) == 100 + 2 * 450
+    assert estimate_cost([Upload("a.pdf", 50)], COST, pages=2) == 2200
+
+
+def test_requests_over_the_endpoint_limit_wait_for_a_slot():
+    controller = _controller()
+
+    async def scenario():
+        await controller.acquire("compare", 10)
+        waiting = asyncio.create_task(controller.acquire("compare", 10))
+        await controller.acquire("chat_index", 10)  # other endpoints proceed
+        await asyncio.sleep(0.05)
+        assert not waiting.done() and controller.stats()["queued"] == 1
+        controller.release("compare", 10)
+        await asyncio.wait_for(waiting, 1)
+        return controller.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["active"] == {"compare": 1, "chat_index": 1}
+    assert stats["in_use_bytes"] == 20 and stats["queued"] == 0
+
+
+def test_memory_budget_queues_in_order_and_admits_oversized_requests_alone():
+    controller = _controller(endpoints={})
+    order = []
+
+    async def request(name, cost):
+        await controller.acquire("analyze", cost)
+        order.append(name)
+
+    async def scenario():
+        await controller.acquire("analyze", 600)
+        big = asyncio.create_task(request("big", 5000))
+        await asyncio.sleep(0.01)
+        small = asyncio.create_task(request("small", 100))
+        await asyncio.sleep(0.05)
+        assert order == []  # small must not overtake the waiting big request
+        controller.release("analyze", 600)
+        await asyncio.wait_for(big, 1)
+        assert not small.done()
+        controller.release("analyze", 5000)
+        await asyncio.wait_for(small, 1)
+
+    asyncio.run(scenario())
+    assert order == ["big", "small"]
+
+
+def test_full_queue_and_expired_waits_are_rejected_with_retry_after():
+    controller = _controller(max_queue=1, max_wait_seconds=0.05)
+
+    async def scenario():
+        await controller.acquire("compare", 10)
+        waiting = asyncio.create_task(controller.acquire("compare", 10))
+        await asyncio.sleep(0.01)
+        with pytest.raises(AdmissionRejected) as full:
+            await controller.acquire("compare", 10)
+        with pytest.raises(AdmissionRejected) as expired:
+            await waiting
+        return full.value, expired.value
+
+    full, expired = asyncio.run(scenario())
+    assert (full.reason, full.retry_after) == ("queue_full", 7)
+    assert expired.reason == "timeout"
+    assert controller.stats()["queued"] == 0
+    assert controller.stats()["rejected"] == {"queue_full": 1, "timeout": 1}
+
+
+def test_busy_compare_returns_503_before_doing_any_work(monkeypatch):
+    controller = _controller(max_queue=0)
+    controller.active["compare"] = 1
+    monkeypatch.setattr(admission, "_default_controller", controller)
+    import api.main as main
+
+    monkeypatch.setattr(
+        main, "DocumentComparator", lambda: pytest.fail("admitted while busy")
+    )
+    pdf = _pdf_bytes(1)
+
+    response = TestClient(main.app).post(
+        "/compare",
+        files={
+            "reference": ("a.pdf", pdf, "application/pdf"),
+            "actual": ("b.pdf", pdf, "application/pdf"),
+        },
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+
+
+def test_busy_batch_returns_503_before_saving_uploads(monkeypatch):
+    controller = _controller(
+        max_queue=0, endpoints={"analyze_batch": {"max_concurrency": 1}}
+    )
+    controller.active["analyze_batch"] = 1
+    monkeypatch.setattr(admission, "_default_controller", controller)
+    import api.main as main
+
+    monkeypatch.setattr(
+        main, "DocumentHandler", lambda: pytest.fail("admitted while busy")
+    )
+
+    response = TestClient(main.app).post(
+        "/analyze/batch",
+        files=[("files", ("a.pdf", _pdf_bytes(1), "application/pdf"))],
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+
+
+def test_batch_holds_admission_until_the_stream_ends(monkeypatch, tmp_path):
+    controller = _controller(endpoints={})
+    monkeypatch.setattr(admission, "_default_controller", controller)
+    import api.main as main
+
+    seen = []
+
+    class Analyzer:
+        async def analyze_files(self, paths, max_concurrency=None, cache=None):
+            seen.append(controller.stats()["active"])
+            yield {"index": 0, "file": "a.pdf", "status": "ok", "result": {}}
+
+    monkeypatch.setattr(main, "get_document_analyzer", Analyzer)
+    monkeypatch.setattr(
+        main, "DocumentHandler", lambda: DocumentHandler(data_dir=str(tmp_path))
+    )
+
+    response = TestClient(main.app).post(
+        "/analyze/batch",
+        files=[("files", ("a.pdf", _pdf_bytes(1), "application/pdf"))],
+    )
+
+    assert response.status_code == 200
+    assert seen == [{"analyze_batch": 1}]
+    assert controller.stats()["active"] == {} and controller.in_use == 0
@@ -0,0 +1,131 @@
+# Tests for batch metadata extraction in src/document_analyzer/data_analysis.py
+
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import fitz
+import pytest
+
+from benchmarks.fakes import fake_llm
+from utils.model_loader import ModelLoader
+from utils.result_cache import ResultCache
+
+METADATA = json.dumps(
+    {
+        "Summary": ["A short report."],
+        "Title": "Report",
+        "Author": ["Jane Doe"],
+        "DateCreated": "2024-01-01",
+        "LastModifiedDate": "2024-01-02",
+        "Publisher": "Not Available",
+        "Language": "English",
+        "PageCount": 1,
+        "SentimentTone": "Neutral",
+    }
+)
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setattr(
+        ModelLoader, "load_llm", lambda self: fake_llm([METADATA], latency_s=0.3)
+    )
+    from src.document_analyzer.data_analysis import DocumentAnalyzer
+
+    return DocumentAnalyzer()
+
+
+def _collect(agen):
+    async def run():
+        return [item async for item in agen]
+
+    return asyncio.run(run())
+
+
+def _pdf(path, text):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    doc.save(path)
+    return path
+
+
+def test_analyze_files_runs_llm_calls_concurrently(analyzer, tmp_path):
+    paths = [_pdf(tmp_path / f"{name}.pdf", name) for name in "abcd"]
+
+    start = time.perf_counter()
+    records = _collect(analyzer.analyze_files(paths, max_concurrency=4))
+    elapsed = time.perf_counter() - start
+
+    assert sorted(r["index"] for r in records) == [0, 1, 2, 3]
+    assert all(r["result"]["Summary"] == ["A short report."] for r in records)
+    assert elapsed < 4 * 0.3  # serial LLM calls would take at least 1.2s
+
+
+def test_analyze_files_streams_errors_and_uses_cache(analyzer, tmp_path):
+    good = _pdf(tmp_path / "good.pdf", "Quarterly report")
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"%PDF-not really")
+    cache = ResultCache({"path": str(tmp_path / "results.sqlite3")})
+
+    first = _collect(analyzer.analyze_files([good, broken], cache=cache))
+    by_file = {record["file"]: record for record in first}
+    assert by_file["good.pdf"]["status"] == "ok"
+    assert by_file["good.pdf"]["cache"] == "MISS"
+    assert by_file["broken.pdf"]["status"] == "error"
+
+    second = _collect(analyzer.analyze_files([good], cache=cache))
+    assert second == [
+        {
+            "index": 0,
+            "file": "good.pdf",
+            "status": "ok",
+            "result": by_file["good.pdf"]["result"],
+            "cache": "HIT",
+        }
+    ]
+
+
+def test_analyze_files_yields_before_every_file_is_parsed(
+    analyzer, tmp_path, monkeypatch
+):
+    import src.document_analyzer.data_analysis as data_analysis
+
+    real_parse = data_analysis.parse_pdf
+
+    def parse(path):
+        if Path(path).name == "slow.pdf":
+            time.sleep(1.0)
+        return real_parse(path)
+
+    monkeypatch.setattr(data_analysis, "parse_pdf", parse)
+    analyzer.parse_workers = 1
+    paths = [_pdf(tmp_path / "fast.pdf", "a"), _pdf(tmp_path / "slow.pdf", "b")]
+
+    async def first_record():
+        start = time.perf_counter()
+        async for record in analyzer.analyze_files(paths):
+            return record, time.perf_counter() - start
+
+    record, elapsed = asyncio.run(first_record())
+
+    assert record["file"] == "fast.pdf" and record["status"] == "ok"
+    assert elapsed < 1.0  # not held back by the slow parse
+
+
+def test_batch_rejects_non_positive_max_concurrency(tmp_path):
+    from fastapi.testclient import TestClient
+
+    import api.main as main
+
+    pdf = _pdf(tmp_path / "a.pdf", "a").read_bytes()
+    response = TestClient(main.app).post(
+        "/analyze/batch",
+        files=[("files", ("a.pdf", pdf, "application/pdf"))],
+        data={"max_concurrency": "0"},
+    )
+
+    assert response.status_code == 422
@@ -0,0 +1,97 @@
+# Tests for batch questions in ConversationalRAG (src/multi_doc_chat/retriever.py)
+
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from src.data_ingestion.data_ingestion import ChatIngestor
+from src.multi_doc_chat.retriever import ConversationalRAG
+from utils.local_embeddings import HashingEmbeddings
+
+
+class Upload:
+    def __init__(self, name, data):
+        self.name = name
+        self._data = data
+
+    def getbuffer(self):
+        return self._data
+
+
+class EchoLLM:
+    """Answers with the question it was asked and tracks calls in flight."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.inflight = self.peak = 0
+
+    def _answer(self, prompt):
+        return AIMessage(content=f"answer to: {prompt.to_messages()[-1].content}")
+
+    async def _aanswer(self, prompt):
+        self.inflight += 1
+        self.peak = max(self.peak, self.inflight)
+        await asyncio.sleep(self.delay)
+        self.inflight -= 1
+        return self._answer(prompt)
+
+    def runnable(self):
+        return RunnableLambda(self._answer, afunc=self._aanswer)
+
+
+@pytest.fixture
+def session(monkeypatch, tmp_path):
+    monkeypatch.setenv("EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setattr("utils.model_loader.load_dotenv", lambda: None)
+    ingestor = ChatIngestor(
+        temp_base=str(tmp_path / "data"), faiss_base=str(tmp_path / "faiss")
+    )
+    text = " ".join(f"Clause {i} covers topic {i}." for i in range(200)).encode()
+    ingestor.build_retriever([Upload("terms.txt", text)], chunk_size=200)
+    return ingestor
+
+
+def test_batch_embeds_once_and_answers_in_order(session, monkeypatch):
+    calls = {"documents": 0, "query": 0}
+    embed_documents = HashingEmbeddings.embed_documents
+    embed_query = HashingEmbeddings.embed_query
+
+    def count(kind, original):
+        def wrapper(self, arg):
+            calls[kind] += 1
+            return original(self, arg)
+
+        return wrapper
+
+    monkeypatch.setattr(
+        HashingEmbeddings, "embed_documents", count("documents", embed_documents)
+    )
+    monkeypatch.setattr(HashingEmbeddings, "embed_query", count("query", embed_query))
+    llm = EchoLLM()
+    rag = ConversationalRAG(session_id="s", llm=llm.runnable())
+    rag.load_retriever_from_faiss(str(session.faiss_dir), k=3)
+    questions = [f"What does clause {i} cover?" for i in range(12)]
+
+    answers = asyncio.run(rag.abatch(questions, max_concurrency=3))
+
+    assert [a.rsplit(": ", 1)[-1] for a in answers] == questions
+    assert calls == {"documents": 1, "query": 0}
+    assert 1 < llm.peak <= 3
+
+
+def test_batch_reports_failures_per_question(session):
+    def flaky(prompt):
+        if "clause 1?" in prompt.to_messages()[-1].content:
+            raise RuntimeError("provider timeout")
+        return AIMessage(content="ok")
+
+    rag = ConversationalRAG(session_id="s", llm=RunnableLambda(flaky))
+    rag.load_retriever_from_faiss(str(session.faiss_dir))
+
+    answers = rag.batch([f"What does clause {i}?" for i in range(3)])
+
+    assert answers[0] == answers[2] == "ok"
+    assert isinstance(answers[1], RuntimeError)
@@ -0,0 +1,187 @@
+# Tests for incremental session indexing (append, remove, replace) in src/data_ingestion/data_ingestion.py
+
+import time
+
+import pytest
+
+from utils.index_store import (
+    current_generation,
+    live_search_kwargs,
+    load_generation,
+    read_metadata,
+    read_tombstones,
+)
+from utils.local_embeddings import HashingEmbeddings
+from src.data_ingestion.data_ingestion import schedule_compaction
+
+
+class Upload:
+    def __init__(self, name, data):
+        self.name = name
+        self._data = data
+
+    def getbuffer(self):
+        return self._data
+
+
+@pytest.fixture
+def make_ingestor(monkeypatch, tmp_path):
+    monkeypatch.setenv("EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setattr("utils.model_loader.load_dotenv", lambda: None)
+    from src.data_ingestion.data_ingestion import ChatIngestor
+
+    def make(session_id=None):
+        return ChatIngestor(
+            temp_base=str(tmp_path / "data"),
+            faiss_base=str(tmp_path / "faiss"),
+            session_id=session_id,
+        )
+
+    return make
+
+
+def _text(topic, n=40):
+    return (f"{topic} sentence number {{}}. " * n).format(*range(n)).encode()
+
+
+def test_reindexing_a_session_only_embeds_new_files(make_ingestor, monkeypatch):
+    embedded = []
+    original = HashingEmbeddings.embed_documents
+    monkeypatch.setattr(
+        HashingEmbeddings,
+        "embed_documents",
+        lambda self, texts: embedded.extend(texts) or original(self, texts),
+    )
+    first = make_ingestor()
+    first.build_retriever([Upload("a.txt", _text("alpha"))], chunk_size=200)
+    added_first = first.last_report.chunks_added
+    assert added_first > 1 and len(embedded) == added_first
+
+    again = make_ingestor(first.session_id)
+    retriever = again.build_retriever(
+        [Upload("a-copy.txt", _text("alpha")), Upload("b.txt", _text("beta"))],
+        chunk_size=200,
+    )
+    report = again.last_report
+
+    assert report.files_added == report.files_skipped == 1
+    assert report.chunks_skipped == added_first
+    assert len(embedded) == added_first + report.chunks_added
+    assert retriever.vectorstore.index.ntotal == added_first + report.chunks_added
+    assert current_generation(again.faiss_dir) == "gen-000002"
+    files = read_metadata(again.faiss_dir)["files"]
+    assert sorted(f["name"] for f in files.values()) == ["a.txt", "b.txt"]
+
+
+def test_resending_only_known_files_keeps_the_index(make_ingestor):
+    first = make_ingestor()
+    first.build_retriever([Upload("a.txt", _text("alpha"))], chunk_size=200)
+
+    again = make_ingestor(first.session_id)
+    again.build_retriever(
+        [Upload("a.txt", _text("alpha")), Upload("a.txt", _text("alpha"))]
+    )
+
+    assert again.last_report.chunks_added == 0
+    assert again.last_report.files_skipped == 2
+    assert current_generation(again.faiss_dir) == "gen-000001"
+    _, store = load_generation(again.faiss_dir, HashingEmbeddings())
+    assert store.index.ntotal == first.last_report.chunks_added
+
+
+def _search(index_dir, query, k=50):
+    _, store = load_generation(index_dir, HashingEmbeddings())
+    docs = store.similarity_search(query, **live_search_kwargs(index_dir, k))
+    return {d.metadata["file_name"] for d in docs}, store.index.ntotal
+
+
+def test_removed_documents_vanish_at_once_and_compact_in_background(
+    make_ingestor,
+):
+    ingestor = make_ingestor()
+    ingestor.compact_ratio = 1.0  # only compact when asked below
+    ingestor.build_retriever(
+        [Upload("a.txt", _text("alpha")), Upload("b.txt", _text("beta"))],
+        chunk_size=200,
+    )
+    total = ingestor.last_report.chunks_added
+    files = read_metadata(ingestor.faiss_dir)["files"].values()
+    doc_id = next(f["doc_id"] for f in files if f["name"] == "a.txt")
+
+    result = ingestor.remove_documents(["a.txt"])
+    assert result["removed"] == ["a.txt"] and not result["compaction_scheduled"]
+    names, ntotal = _search(ingestor.faiss_dir, "alpha sentence")
+    assert names == {"b.txt"} and ntotal == total  # hidden, rows still there
+
+    assert schedule_compaction(ingestor.faiss_dir)
+    deadline = time.monotonic() + 10
+    while not read_tombstones(ingestor.faiss_dir)[doc_id]["compacted"]:
+        assert time.monotonic() < deadline, "compaction never published"
+        time.sleep(0.01)
+    names, ntotal = _search(ingestor.faiss_dir, "alpha sentence")
+    assert names == {"b.txt"}
+    assert ntotal == total - result["chunks_removed"]
+    assert [f["name"] for f in read_metadata(ingestor.faiss_dir)["files"].values()] == [
+        "b.txt"
+    ]
+
+
+def test_replace_swaps_in_the_new_version(make_ingestor):
+    ingestor = make_ingestor()
+    ingestor.build_retriever([Upload("a.txt", _text("alpha"))], chunk_size=200)
+
+    again = make_ingestor(ingestor.session_id)
+    again.build_retriever(
+        [Upload("a.txt", _text("gamma"))], chunk_size=200, replace=True
+    )
+
+    assert again.last_report.files_replaced == 1
+    assert again.last_report.chunks_removed == ingestor.last_report.chunks_added
+    _, store = load_generation(again.faiss_dir, HashingEmbeddings())
+    docs = store.similarity_search(
+        "alpha sentence", **live_search_kwargs(again.faiss_dir, 5)
+    )
+    assert len(docs) == 5
+    assert all("gamma" in d.page_content for d in docs)
+
+
+def test_failed_update_resumes_from_the_last_committed_batch(
+    make_ingestor, monkeypatch
+):
+    embedded, fail_after = [], [3]
+    original = HashingEmbeddings.embed_documents
+
+    def flaky(self, texts):
+        if fail_after[0] == 0:
+            raise RuntimeError("provider unavailable")
+        fail_after[0] -= 1
+        embedded.append(len(texts))
+        return original(self, texts)
+
+    monkeypatch.setattr(HashingEmbeddings, "embed_documents", flaky)
+    ingestor = make_ingestor()
+    ingestor.model_loader.config["faiss_db"]["ingest_batch_size"] = 10
+    uploads = [Upload("a.txt", _text("alpha")), Upload("b.txt", _text("beta"))]
+
+    with pytest.raises(Exception, match="provider unavailable"):
+        ingestor.build_retriever(uploads, chunk_size=200)
+    assert current_generation(ingestor.faiss_dir) is None
+    assert embedded == [10, 10, 10]
+
+    fail_after[0] = 100
+    retry = make_ingestor(ingestor.session_id)
+    retry.model_loader.config["faiss_db"]["ingest_batch_size"] = 10
+    monkeypatch.setattr(
+        "src.data_ingestion.data_ingestion.load_documents",
+        lambda paths: pytest.fail("staged file parsed again"),
+    )
+    retry.build_retriever([], chunk_size=200)
+
+    report = retry.last_report
+    assert report.files_added == report.files_resumed == 2
+    assert report.chunks_resumed == 30 and report.chunks_added > 30
+    assert sum(embedded) == report.chunks_added
+    meta = read_metadata(retry.faiss_dir)
+    assert sorted(f["name"] for f in meta["files"].values()) == ["a.txt", "b.txt"]
+    assert not (retry.faiss_dir / "ingest").exists()
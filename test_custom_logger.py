@@ -0,0 +1,74 @@
+# Tests for the queue-backed JSON logger in logger/custom_logger.py
+
+import json
+import logging
+import queue
+from logging.handlers import QueueListener
+
+from logger.custom_logger import (
+    JsonFormatter,
+    SamplingFilter,
+    StructuredLogger,
+    _LazyQueueHandler,
+)
+
+
+def _logger(tmp_path, name, max_chars=50, sampling=None, start=True):
+    base = logging.getLogger(name)
+    base.propagate = False
+    base.setLevel(logging.INFO)
+    q = queue.Queue()
+    handler = _LazyQueueHandler(q)
+    handler.addFilter(SamplingFilter(sampling or {}))
+    base.addHandler(handler)
+    out = logging.FileHandler(tmp_path / f"{name}.log", encoding="utf-8")
+    out.setFormatter(JsonFormatter(max_chars=max_chars))
+    listener = QueueListener(q, out)
+    if start:
+        listener.start()
+    return StructuredLogger(base, {}), listener, tmp_path / f"{name}.log"
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_structured_fields_and_truncation(tmp_path):
+    log, listener, path = _logger(tmp_path, "t.fields")
+    log.info("Loaded %s pages", 3, session_id="s1", answer="x" * 500)
+    log.error("Invalid file type", file_type="exe")
+    listener.stop()
+
+    first, second = _records(path)
+    assert first["message"] == "Loaded 3 pages"
+    assert first["session_id"] == "s1"
+    assert first["answer"].startswith("x" * 50 + "...[truncated 450 chars]")
+    assert second["level"] == "ERROR" and second["file_type"] == "exe"
+
+
+def test_arguments_are_formatted_off_the_calling_thread(tmp_path):
+    calls = []
+
+    class Expensive:
+        def __str__(self):
+            calls.append(1)
+            return "expensive"
+
+    # Listener not running yet: anything formatted now was formatted by the caller.
+    log, listener, path = _logger(tmp_path, "t.lazy", start=False)
+    log.debug("skipped %s", Expensive())  # below level: never formatted
+    log.info("kept %s", Expensive())
+    assert calls == []
+    listener.start()
+    listener.stop()
+    assert calls == [1]
+    assert _records(path)[0]["message"] == "kept expensive"
+
+
+def test_sampling_never_drops_warnings(tmp_path):
+    log, listener, path = _logger(tmp_path, "t.sampled", sampling={"t.sampled": 0.0})
+    for _ in range(20):
+        log.info("noise")
+    log.warning("important")
+    listener.stop()
+    assert [r["message"] for r in _records(path)] == ["important"]
@@ -0,0 +1,93 @@
+# Tests for in-memory upload parsing in DocumentHandler (src/data_ingestion/data_ingestion.py)
+
+import time
+from pathlib import Path
+
+import pytest
+
+import utils.parse_cache as parse_cache
+from src.data_ingestion.data_ingestion import DocumentHandler
+
+SAMPLE_PDF = Path("data/document_compare/Long_Report_V1.pdf")
+
+
+class Upload:
+    def __init__(self, name, data, size=None):
+        self.name = name
+        self.size = size
+        self._data = data
+
+    def getbuffer(self):
+        return self._data
+
+
+@pytest.fixture
+def handler(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        parse_cache, "_default_cache", parse_cache.ParseCache(str(tmp_path / "cache"))
+    )
+    return DocumentHandler(data_dir=str(tmp_path / "uploads"))
+
+
+def test_small_upload_is_parsed_from_memory(handler, monkeypatch):
+    handler.persist = "never"
+    opened = []
+    real_open = parse_cache.fitz.open
+    monkeypatch.setattr(
+        parse_cache.fitz,
+        "open",
+        lambda *args, **kwargs: opened.append(kwargs) or real_open(*args, **kwargs),
+    )
+    data = SAMPLE_PDF.read_bytes()
+
+    source = handler.open_upload(Upload("report.pdf", data, size=len(data)))
+
+    assert source == data
+    assert "--- Page 1 ---" in handler.read_pdf(source)
+    assert opened and "stream" in opened[0]
+    assert not any(Path(handler.session_path).iterdir())
+
+
+def test_in_memory_upload_is_copied_in_the_background(handler):
+    data = SAMPLE_PDF.read_bytes()
+
+    handler.open_upload(Upload("report.pdf", data))
+
+    copy = Path(handler.session_path) / "report.pdf"
+    deadline = time.monotonic() + 5
+    while not copy.exists():
+        assert time.monotonic() < deadline, "background copy never written"
+        time.sleep(0.01)
+    assert copy.read_bytes() == data
+
+
+def test_copy_is_written_inline_when_the_queue_is_full(handler, monkeypatch):
+    import src.data_ingestion.data_ingestion as data_ingestion
+
+    monkeypatch.setattr(
+        data_ingestion, "_persist_queued", lambda *a: pytest.fail("queued")
+    )
+    handler.persist_max_pending = 0
+    data = SAMPLE_PDF.read_bytes()
+
+    handler.open_upload(Upload("report.pdf", data))
+
+    assert (Path(handler.session_path) / "report.pdf").read_bytes() == data
+
+
+@pytest.mark.parametrize("known_size", [True, False])
+def test_large_upload_is_spooled_to_disk(handler, known_size):
+    data = SAMPLE_PDF.read_bytes()
+    handler.spool_threshold = len(data) - 1
+
+    source = handler.open_upload(
+        Upload("report.pdf", data, size=len(data) if known_size else None)
+    )
+
+    assert source == str(Path(handler.session_path) / "report.pdf")
+    assert Path(source).read_bytes() == data
+
+
+def test_non_pdf_upload_is_rejected(handler):
+    with pytest.raises(Exception, match="Only PDFs"):
+        handler.open_upload(Upload("notes.txt", b"hello"))
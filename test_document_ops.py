@@ -0,0 +1,45 @@
+# Tests for the loader registry in utils/document_ops.py
+
+from pathlib import Path
+
+from utils.document_ops import (
+    FitzPDFLoader,
+    PlainTextLoader,
+    get_loader,
+    sniff_mime,
+    supported_extensions,
+)
+
+SAMPLE_PDF = Path("data/document_compare/Long_Report_V1.pdf")
+
+
+def test_supported_extensions():
+    assert set(supported_extensions()) >= {".pdf", ".docx", ".txt", ".md"}
+
+
+def test_pdf_loader_is_page_aware():
+    loader = get_loader(str(SAMPLE_PDF))
+    assert isinstance(loader, FitzPDFLoader)
+    docs = loader.load()
+    assert docs
+    assert [d.metadata["page"] for d in docs] == list(range(len(docs)))
+    assert docs[0].metadata["total_pages"] == len(docs)
+
+
+def test_sniffed_mime_wins_over_extension(tmp_path):
+    mislabelled = tmp_path / "report.txt"
+    mislabelled.write_bytes(SAMPLE_PDF.read_bytes())
+    assert sniff_mime(str(mislabelled)) == "application/pdf"
+    assert isinstance(get_loader(str(mislabelled)), FitzPDFLoader)
+
+
+def test_text_loader_decodes_large_and_non_utf8_files(tmp_path):
+    big = tmp_path / "notes.md"
+    big.write_text("héllo wörld\n" * 20000, encoding="utf-8")
+    loader = get_loader(str(big))
+    assert isinstance(loader, PlainTextLoader)
+    assert loader.load()[0].page_content == "héllo wörld\n" * 20000
+
+    latin = tmp_path / "latin.txt"
+    latin.write_bytes("café".encode("latin-1"))
+    assert get_loader(str(latin)).load()[0].page_content == "café"
@@ -0,0 +1,150 @@
+# Tests for local metadata and sampled-text analysis (utils/document_profile.py)
+
+import json
+import re
+
+import fitz
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+import utils.parse_cache as parse_cache
+from utils.document_profile import (
+    detect_language,
+    local_metadata,
+    parse_pdf_date,
+    sample_text,
+)
+from utils.llm_gateway import CHARS_PER_TOKEN
+from utils.model_loader import ModelLoader
+from utils.parse_cache import parse_pdf
+
+SUMMARY = json.dumps(
+    {
+        "Summary": ["An annual report."],
+        "Publisher": "Acme Press",
+        "SentimentTone": "Neutral",
+    }
+)
+
+SENTENCE = "The committee reviewed the results of the year and the plans for growth. "
+
+
+def _pdf(path, pages=40, metadata=None):
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"{number + 1}. Section {number + 1} Overview")
+        page.insert_textbox(fitz.Rect(72, 100, 520, 780), SENTENCE * 12, fontsize=9)
+    doc.set_metadata(metadata or {})
+    doc.save(path)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def parse_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        parse_cache, "_default_cache", parse_cache.ParseCache(str(tmp_path / "cache"))
+    )
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("D:20240131120500+01'00'", "2024-01-31T12:05:00+01:00"),
+        ("D:20240131120500Z", "2024-01-31T12:05:00+00:00"),
+        ("D:20240131", "2024-01-31"),
+        ("yesterday", "Not Available"),
+        (None, "Not Available"),
+    ],
+)
+def test_pdf_dates_are_converted_to_iso(value, expected):
+    assert parse_pdf_date(value) == expected
+
+
+def test_language_is_detected_from_script_or_stopwords():
+    assert detect_language(SENTENCE * 3) == "English"
+    assert (
+        detect_language(
+            "Le comité a examiné les résultats de l'année et les plans " * 3
+        )
+        == "French"
+    )
+    assert detect_language("Годовой отчёт компании") == "Russian"
+    assert detect_language("12 34 56") == "Not Available"
+
+
+def test_metadata_is_read_from_the_pdf(tmp_path):
+    path = _pdf(
+        tmp_path / "report.pdf",
+        pages=3,
+        metadata={
+            "title": "Annual Report",
+            "author": "Jane Doe; John Roe",
+            "creationDate": "D:20240105093000Z",
+        },
+    )
+
+    metadata = local_metadata(parse_pdf(path))
+
+    assert metadata == {
+        "Title": "Annual Report",
+        "Author": ["Jane Doe", "John Roe"],
+        "DateCreated": "2024-01-05T09:30:00+00:00",
+        "LastModifiedDate": "2024-01-05T09:30:00+00:00",
+        "Language": "English",
+        "PageCount": 3,
+    }
+
+
+def test_sample_is_bounded_and_covers_the_whole_document(tmp_path):
+    parsed = parse_pdf(_pdf(tmp_path / "report.pdf"))
+
+    sample = sample_text(parsed, max_tokens=1000)
+
+    assert len(sample) <= 1000 * CHARS_PER_TOKEN
+    assert len(sample) < len(parsed.as_text()) / 4
+    assert "--- Page 1 ---" in sample
+    assert "p40: 40. Section 40 Overview" in sample
+    excerpts = [int(p) for p in re.findall(r"--- Excerpt, page (\d+) ---", sample)]
+    assert len(excerpts) > 2 and min(excerpts) <= 10 and max(excerpts) >= 30
+
+    short = parse_pdf(_pdf(tmp_path / "short.pdf", pages=1))
+    assert sample_text(short, max_tokens=1000) == short.as_text()
+
+
+def test_fast_path_sends_only_the_sample_to_the_llm(tmp_path, monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    prompts = []
+
+    def answer(prompt):
+        prompts.append(prompt.to_string())
+        return AIMessage(content=SUMMARY)
+
+    monkeypatch.setattr(ModelLoader, "load_llm", lambda self: RunnableLambda(answer))
+    from src.document_analyzer.data_analysis import DocumentAnalyzer
+
+    analyzer = DocumentAnalyzer()
+    analyzer.max_sample_tokens = 1000
+    path = _pdf(tmp_path / "report.pdf", metadata={"author": "Jane Doe"})
+
+    result = analyzer.analyze_pdf(path)
+
+    assert list(result) == [
+        "Summary",
+        "Title",
+        "Author",
+        "DateCreated",
+        "LastModifiedDate",
+        "Publisher",
+        "Language",
+        "PageCount",
+        "SentimentTone",
+    ]
+    assert result["Summary"] == ["An annual report."]
+    assert result["Publisher"] == "Acme Press"
+    assert result["Author"] == ["Jane Doe"]
+    assert result["PageCount"] == 40
+    assert len(prompts) == 1
+    assert len(prompts[0]) < len(parse_pdf(path).as_text()) / 4
@@ -0,0 +1,80 @@
+# Tests for generation-based session index publishing in utils/index_store.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_community.vectorstores import FAISS
+
+from benchmarks.fakes import FakeEmbeddings
+from utils.index_store import (
+    CURRENT_FILE,
+    IndexCache,
+    current_generation,
+    load_generation,
+    publish_index,
+)
+
+DIM = 32
+
+
+def _store(texts):
+    return FAISS.from_texts(texts, FakeEmbeddings(dim=DIM, latency_s=0))
+
+
+def _texts(store):
+    return sorted(doc.page_content for doc in store.docstore._dict.values())
+
+
+def test_publish_swaps_pointer_and_prunes_old_generations(tmp_path):
+    publish_index(tmp_path, _store(["one"]), keep_generations=2)
+    publish_index(tmp_path, _store(["two"]), keep_generations=2)
+    publish_index(tmp_path, _store(["three"]), keep_generations=2)
+
+    assert (tmp_path / CURRENT_FILE).read_text() == "gen-000003"
+    assert sorted(p.name for p in tmp_path.glob("gen-*")) == [
+        "gen-000002",
+        "gen-000003",
+    ]
+    assert not list(tmp_path.glob(".staging-*"))
+    generation, store = load_generation(tmp_path, FakeEmbeddings(dim=DIM))
+    assert generation == "gen-000003"
+    assert _texts(store) == ["three"]
+
+
+def test_legacy_layout_loads_until_first_publish(tmp_path):
+    _store(["legacy"]).save_local(str(tmp_path))
+
+    assert current_generation(tmp_path) == "legacy"
+    assert _texts(load_generation(tmp_path, FakeEmbeddings(dim=DIM))[1]) == ["legacy"]
+
+    publish_index(tmp_path, _store(["fresh"]))
+    assert not (tmp_path / "index.faiss").exists()
+    assert current_generation(tmp_path) == "gen-000001"
+
+
+def test_cache_serves_loaded_index_while_reloading_in_background(tmp_path):
+    emb = FakeEmbeddings(dim=DIM)
+    cache = IndexCache(max_entries=4)
+    publish_index(tmp_path, _store(["old"]))
+    first = cache.get(tmp_path, emb)
+    assert cache.get(tmp_path, emb) is first
+
+    publish_index(tmp_path, _store(["new"]))
+    assert cache.get(tmp_path, emb) is first  # no blocking reload
+
+    deadline = time.monotonic() + 10
+    while (current := cache.get(tmp_path, emb)) is first:
+        assert time.monotonic() < deadline, "background reload never landed"
+        time.sleep(0.01)
+    assert _texts(current) == ["new"]
+
+
+def test_concurrent_publishers_get_distinct_generations(tmp_path):
+    stores = [_store([f"doc {i}"]) for i in range(6)]
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        generations = list(
+            pool.map(lambda s: publish_index(tmp_path, s, keep_generations=10), stores)
+        )
+
+    assert len(set(generations)) == 6
+    assert current_generation(tmp_path) == max(generations)
@@ -0,0 +1,167 @@
+# Tests for the shared LLM gateway in utils/llm_gateway.py
+
+import asyncio
+import threading
+import time
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from utils.llm_gateway import LLMGateway, TokenBucket
+
+
+class StubProvider(BaseChatModel):
+    """Local stand-in for a provider: echoes the prompt after a fixed delay."""
+
+    latency_s: float = 0.1
+    calls: int = 0
+    in_flight: int = 0
+    peak: int = 0
+    fail: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _record(self, messages: List[BaseMessage]) -> ChatResult:
+        message = AIMessage(
+            content=f"echo: {messages[-1].content}",
+            usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, **kwargs: Any):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.latency_s)
+        self.in_flight -= 1
+        if self.fail:
+            raise RuntimeError("provider down")
+        return self._record(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.latency_s)
+        self.in_flight -= 1
+        if self.fail:
+            raise RuntimeError("provider down")
+        return self._record(messages)
+
+
+def _gateway(**provider):
+    return LLMGateway({"providers": {"stub": provider}})
+
+
+def test_concurrency_limit_applies_to_async_batches():
+    stub = StubProvider()
+    llm = _gateway(max_concurrency=2).wrap(stub, "stub")
+
+    results = asyncio.run(llm.abatch([f"q{i}" for i in range(6)]))
+
+    assert [r.content for r in results] == [f"echo: q{i}" for i in range(6)]
+    assert stub.calls == 6
+    assert stub.peak == 2
+
+
+def test_identical_in_flight_prompts_are_coalesced():
+    stub = StubProvider(latency_s=0.2)
+    llm = _gateway(max_concurrency=8).wrap(stub, "stub")
+    results = []
+
+    def ask():
+        results.append(llm.invoke("same question").content)
+
+    threads = [threading.Thread(target=ask) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["echo: same question"] * 5
+    assert stub.calls == 1
+
+    llm.invoke("same question")  # nothing in flight any more
+    assert stub.calls == 2
+
+
+def test_token_bucket_reserves_ahead_and_refills():
+    bucket = TokenBucket(per_minute=60, capacity=2)
+    now = bucket.updated
+
+    assert bucket.reserve(1, now=now) == 0.0
+    assert bucket.reserve(1, now=now) == 0.0
+    assert bucket.reserve(1, now=now) == 1.0  # one request per second
+    assert bucket.reserve(1, now=now) == 2.0  # queued behind the previous one
+    assert bucket.reserve(1, now=now + 4) == 0.0
+
+
+def test_token_budget_is_settled_with_reported_usage():
+    gateway = _gateway(max_concurrency=4, tokens_per_minute=600)
+    llm = gateway.wrap(StubProvider(latency_s=0), "stub")
+
+    llm.invoke("hi")  # estimated at 1 token, provider reports 15
+
+    tpm = gateway.limits("stub").tpm
+    assert 584 <= tpm.tokens < 586  # 600 - 15, plus a few ms of refill
+
+
+def test_cancelled_leader_waiting_for_a_slot_does_not_strand_followers():
+    stub = StubProvider(latency_s=0.2)
+    gateway = _gateway(max_concurrency=1)
+    llm = gateway.wrap(stub, "stub")
+
+    async def scenario():
+        busy = asyncio.create_task(llm.ainvoke("other"))
+        await asyncio.sleep(0.01)
+        leader = asyncio.create_task(llm.ainvoke("same"))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(llm.ainvoke("same"))
+        await asyncio.sleep(0.01)
+        leader.cancel()  # still queued for the only slot
+        answer = await asyncio.wait_for(follower, 2)
+        await busy
+        again = await asyncio.wait_for(llm.ainvoke("same"), 2)
+        return leader, answer.content, again.content
+
+    leader, answer, again = asyncio.run(scenario())
+
+    assert leader.cancelled()
+    assert answer == again == "echo: same"
+    assert gateway._inflight == {}
+    assert gateway.limits("stub").slots.in_use == 0
+
+
+def test_cancelled_follower_leaves_the_leader_untouched():
+    stub = StubProvider(latency_s=0.1)
+    gateway = _gateway(max_concurrency=4)
+    llm = gateway.wrap(stub, "stub")
+
+    async def scenario():
+        leader = asyncio.create_task(llm.ainvoke("same"))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(llm.ainvoke("same"))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        return (await leader).content, follower
+
+    answer, follower = asyncio.run(scenario())
+
+    assert answer == "echo: same" and follower.cancelled()
+    assert stub.calls == 1 and gateway._inflight == {}
+
+
+def test_failed_calls_refund_their_token_reservation():
+    gateway = _gateway(max_concurrency=4, tokens_per_minute=600)
+    llm = gateway.wrap(StubProvider(latency_s=0, fail=True), "stub")
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            llm.invoke("x" * 400)  # estimated at 100 tokens each
+
+    assert gateway.limits("stub").tpm.tokens >= 599
@@ -0,0 +1,132 @@
+# Tests for hedged routing between LLM providers in utils/llm_router.py
+
+import asyncio
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from utils.llm_gateway import LLMGateway
+from utils.llm_router import HedgedChatModel, HedgePolicy, LatencyTracker
+
+
+class DelayedProvider(BaseChatModel):
+    """Local stand-in for a provider that answers after an injected delay."""
+
+    name_tag: str
+    delay_s: float = 0.0
+    fail: bool = False
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "delayed"
+
+    def _result(self) -> ChatResult:
+        if self.fail:
+            raise RuntimeError(f"{self.name_tag} unavailable")
+        message = AIMessage(content=f"from {self.name_tag}")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, **kwargs: Any):
+        self.calls += 1
+        time.sleep(self.delay_s)
+        return self._result()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay_s)
+        return self._result()
+
+
+def _hedged(primary, secondary, **policy):
+    policy = HedgePolicy(LatencyTracker(), **{"initial_deadline": 0.1, **policy})
+    return HedgedChatModel(
+        primary=primary,
+        secondary=secondary,
+        primary_name="groq",
+        secondary_name="google",
+        policy=policy,
+    )
+
+
+def test_fast_primary_is_never_hedged():
+    secondary = DelayedProvider(name_tag="google")
+    llm = _hedged(DelayedProvider(name_tag="groq", delay_s=0.01), secondary)
+
+    assert llm.invoke("hi").content == "from groq"
+    assert secondary.calls == 0
+
+
+def test_slow_primary_is_hedged_to_secondary():
+    llm = _hedged(
+        DelayedProvider(name_tag="groq", delay_s=1.0),
+        DelayedProvider(name_tag="google", delay_s=0.05),
+    )
+
+    start = time.perf_counter()
+    assert llm.invoke("hi").content == "from google"
+    assert time.perf_counter() - start < 0.5
+
+    start = time.perf_counter()
+    assert asyncio.run(llm.ainvoke("hi")).content == "from google"
+    assert time.perf_counter() - start < 0.5
+
+
+def test_failed_primary_fails_over_without_waiting_for_deadline():
+    llm = _hedged(
+        DelayedProvider(name_tag="groq", fail=True),
+        DelayedProvider(name_tag="google"),
+        initial_deadline=5.0,
+    )
+
+    start = time.perf_counter()
+    assert llm.invoke("hi").content == "from google"
+    assert time.perf_counter() - start < 1.0
+
+
+def test_cancelled_losing_leg_does_not_block_coalesced_repeats():
+    gateway = LLMGateway(
+        {"coalesce": True, "providers": {"groq": {"max_concurrency": 1}}}
+    )
+    busy = gateway.wrap(DelayedProvider(name_tag="busy", delay_s=0.3), "groq")
+    primary = DelayedProvider(name_tag="groq", delay_s=0.01)
+    llm = _hedged(
+        gateway.wrap(primary, "groq"),
+        gateway.wrap(DelayedProvider(name_tag="google", delay_s=0.05), "google"),
+    )
+
+    async def scenario():
+        hog = asyncio.create_task(busy.ainvoke("other"))
+        await asyncio.sleep(0.01)
+        # Both groq legs (a leader and its coalesced follower) are still
+        # queued for the only slot when google wins and they are cancelled.
+        first = await asyncio.gather(llm.ainvoke("hi"), llm.ainvoke("hi"))
+        await hog
+        second = await asyncio.wait_for(llm.ainvoke("hi"), 2)
+        return [m.content for m in first], second.content
+
+    first, second = asyncio.run(scenario())
+
+    assert first == ["from google", "from google"]
+    assert second == "from groq" and primary.calls == 1
+    assert gateway._inflight == {}
+    assert gateway.limits("groq").slots.in_use == 0
+
+
+def test_deadline_follows_rolling_percentile():
+    tracker = LatencyTracker(window=100)
+    policy = HedgePolicy(
+        tracker, percentile=90, min_samples=10, initial_deadline=8.0, max_deadline=5.0
+    )
+    assert policy.deadline("groq") == 8.0  # not enough samples yet
+
+    for i in range(1, 101):
+        tracker.record("groq", i / 100)  # 0.01s .. 1.00s
+    assert policy.deadline("groq") == 0.9
+
+    for _ in range(100):
+        tracker.record("groq", 60.0)
+    assert policy.deadline("groq") == 5.0  # clamped
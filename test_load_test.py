@@ -0,0 +1,87 @@
+# Tests for the load-testing harness (benchmarks/load_test.py, benchmarks/stub_provider.py)
+
+import json
+import random
+import statistics
+
+import pytest
+import yaml
+from fastapi.testclient import TestClient
+from langchain_core.output_parsers import JsonOutputParser
+
+from benchmarks.load_test import Sample, parse_mix, stub_config, summarize
+from benchmarks.stub_provider import Latency, StubProvider, create_app
+from model.models import DocumentSummary, SummaryResponse
+
+
+def test_lognormal_latency_matches_its_median_and_p95():
+    latency = Latency("lognormal:0.5:2.0", random.Random(0))
+    samples = [latency.sample() for _ in range(20000)]
+    cuts = statistics.quantiles(samples, n=100)
+    assert cuts[49] == pytest.approx(0.5, rel=0.05)
+    assert cuts[94] == pytest.approx(2.0, rel=0.1)
+    assert Latency("fixed:0.25").sample() == 0.25
+    with pytest.raises(ValueError):
+        Latency("gamma:1")
+
+
+@pytest.mark.parametrize("model", [SummaryResponse, DocumentSummary])
+def test_stub_answers_match_the_requested_output_schema(model):
+    client = TestClient(create_app(StubProvider()))
+    instructions = JsonOutputParser(pydantic_object=model).get_format_instructions()
+
+    response = client.post(
+        "/openai/v1/chat/completions",
+        json={"model": "m", "messages": [{"role": "user", "content": instructions}]},
+    )
+
+    answer = response.json()["choices"][0]["message"]["content"]
+    model.model_validate(json.loads(answer))
+
+
+def test_stub_serves_google_embeddings_and_injects_errors():
+    provider = StubProvider(error_rate=1.0, error_statuses=[429], dim=16)
+    client = TestClient(create_app(provider))
+    failed = client.post(
+        "/v1beta/models/text-embedding-004:embedContent",
+        json={"content": {"parts": [{"text": "hello"}]}},
+    )
+    assert failed.status_code == 429 and failed.headers["Retry-After"] == "1"
+
+    provider.error_rate = 0.0
+    batch = client.post(
+        "/v1beta/models/text-embedding-004:batchEmbedContents",
+        json={"requests": [{"content": {"parts": [{"text": t}]}} for t in "ab"]},
+    ).json()
+    assert [len(e["values"]) for e in batch["embeddings"]] == [16, 16]
+    assert provider.stats()["embeddings"] == {"calls": 2, "errors": 1}
+
+
+def test_summary_reports_errors_and_percentiles_per_endpoint():
+    samples = [Sample("query", 0.1 * i, 200) for i in range(1, 11)]
+    samples += [
+        Sample("analyze", 0.5, 200, cache="MISS"),
+        Sample("analyze", 0.2, 503),
+        Sample("analyze", 120.0, 0, error="ReadTimeout"),
+    ]
+
+    report = summarize(samples, elapsed_s=10.0)
+
+    assert report["query"]["throughput_rps"] == 1.0
+    assert report["query"]["latency"]["p50_ms"] == pytest.approx(550)
+    assert report["analyze"]["errors"] == {"503": 1, "ReadTimeout": 1}
+    assert report["analyze"]["error_rate"] == pytest.approx(2 / 3)
+    assert report["analyze"]["cache"] == {"MISS": 1}
+    assert report["all"]["requests"] == 13
+    assert parse_mix("analyze=1,query=6") == {"analyze": 1.0, "query": 6.0}
+    with pytest.raises(ValueError):
+        parse_mix("upload=1")
+
+
+def test_stub_config_lifts_the_gateway_rate_limits(tmp_path):
+    config = yaml.safe_load(stub_config(tmp_path).read_text(encoding="utf-8"))
+
+    groq = config["llm_gateway"]["providers"]["groq"]
+    assert "requests_per_minute" not in groq and "tokens_per_minute" not in groq
+    assert groq["max_concurrency"] >= 64
+    assert config["admission"] and config["faiss_db"]  # the rest is unchanged
@@ -0,0 +1,62 @@
+# Tests for the local embedding backends selected through ModelLoader.load_embeddings
+
+import numpy as np
+import pytest
+
+from exception.custom_exception import DocumentPortalException
+from utils.local_embeddings import HashingEmbeddings
+from utils.model_loader import ModelLoader
+
+
+def test_hashing_embeddings_are_normalized_and_deterministic():
+    emb = HashingEmbeddings(dim=256, batch_size=2)
+    texts = ["Quarterly revenue grew", "Revenue grew quarterly", "", "cats and dogs"]
+
+    vectors = emb.embed_array(texts)
+
+    assert vectors.shape == (4, 256)
+    assert vectors.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(vectors[[0, 1, 3]], axis=1), 1.0)
+    assert not vectors[2].any()  # empty text embeds to zeros
+    np.testing.assert_array_equal(
+        vectors, HashingEmbeddings(dim=256).embed_array(texts)
+    )
+    np.testing.assert_allclose(emb.embed_query(texts[0]), vectors[0], rtol=1e-6)
+
+
+def test_hashing_embeddings_rank_overlapping_text_higher():
+    emb = HashingEmbeddings()
+    query = np.array(emb.embed_query("what was the quarterly revenue growth"))
+    docs = np.array(
+        emb.embed_documents(
+            [
+                "The weather in Paris was mild this spring.",
+                "Quarterly revenue growth reached twelve percent.",
+            ]
+        )
+    )
+
+    scores = docs @ query
+    assert scores[1] > scores[0]
+
+
+def test_local_embeddings_need_no_google_key(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.setattr("utils.model_loader.load_dotenv", lambda: None)
+
+    embeddings = ModelLoader().load_embeddings()
+
+    assert isinstance(embeddings, HashingEmbeddings)
+    assert len(embeddings.embed_query("hello")) == 1024
+
+
+def test_google_embeddings_still_require_key(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_PROVIDER", "google")
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.setattr("utils.model_loader.load_dotenv", lambda: None)
+
+    with pytest.raises(DocumentPortalException):
+        ModelLoader()
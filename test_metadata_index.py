@@ -0,0 +1,78 @@
+# Tests for source/page pre-filtered retrieval (utils/metadata_index.py, ScopedRetriever)
+
+import numpy as np
+import pytest
+
+from benchmarks.fakes import FakeEmbeddings
+from utils.index_store import (
+    ScopedRetriever,
+    load_generation,
+    publish_index,
+    write_tombstones,
+)
+from utils.metadata_index import MetadataIndex
+from utils.vector_store import build_vectorstore
+
+DIM = 64
+
+
+def _store(precision):
+    emb = FakeEmbeddings(dim=DIM)
+    texts, metadatas = [], []
+    for name in ("report.pdf", "memo.pdf"):
+        for page in range(10):
+            for part in range(3):
+                texts.append(f"{name} page {page} revenue part {part}")
+                metadatas.append(
+                    {"file_name": name, "page": page, "doc_id": name.split(".")[0]}
+                )
+    vectors = emb.embed_documents(texts)
+    settings = {"precision": precision, "rerank": True, "rerank_factor": 4}
+    return build_vectorstore(
+        list(zip(texts, vectors)), emb, metadatas=metadatas, settings=settings
+    )
+
+
+@pytest.fixture(params=["float32", "sq8"])
+def index_dir(request, tmp_path):
+    publish_index(tmp_path, _store(request.param))
+    return tmp_path
+
+
+def _retrieve(index_dir, **kwargs):
+    _, store = load_generation(index_dir, FakeEmbeddings(dim=DIM))
+    retriever = ScopedRetriever(vectorstore=store, index_dir=str(index_dir), **kwargs)
+    return retriever.invoke("memo.pdf page 4 revenue")
+
+
+def test_bitmaps_are_saved_with_each_generation(index_dir):
+    _, store = load_generation(index_dir, FakeEmbeddings(dim=DIM))
+    index = store.metadata_index
+
+    assert isinstance(index, MetadataIndex) and index.ntotal == 60
+    assert sorted(index.sources) == ["memo.pdf", "report.pdf"]
+    bits = np.unpackbits(index.mask(pages=(2, 3)), bitorder="little")[:60]
+    assert bits.sum() == 12
+
+
+def test_source_and_page_filters_restrict_the_search(index_dir):
+    docs = _retrieve(index_dir, k=5, sources=["report.pdf"], pages=(7, 8))
+
+    assert len(docs) == 5
+    assert {d.metadata["file_name"] for d in docs} == {"report.pdf"}
+    assert {d.metadata["page"] for d in docs} <= {7, 8}
+
+
+def test_narrow_filter_still_returns_every_matching_chunk(index_dir):
+    docs = _retrieve(index_dir, k=10, sources=["report.pdf"], pages=(9, 9))
+    assert len(docs) == 3
+
+    assert _retrieve(index_dir, k=5, sources=["missing.pdf"]) == []
+
+
+def test_tombstoned_documents_are_excluded_by_the_selector(index_dir):
+    write_tombstones(index_dir, {"memo": {"chunks": 30, "compacted": False}})
+
+    docs = _retrieve(index_dir, k=8)
+    assert len(docs) == 8
+    assert {d.metadata["file_name"] for d in docs} == {"report.pdf"}
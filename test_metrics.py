@@ -0,0 +1,40 @@
+# Tests for the stage tracing helpers in utils/metrics.py
+
+import pytest
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from benchmarks.fakes import fake_llm
+from utils.metrics import (
+    STAGE_ERRORS,
+    LLMMetricsHandler,
+    server_timing,
+    span,
+    start_trace,
+)
+
+
+def test_spans_are_recorded_in_the_request_trace():
+    trace = start_trace()
+    with span("parse"):
+        pass
+    with pytest.raises(ValueError):
+        with span("split"):
+            raise ValueError("boom")
+    assert [stage for stage, _ in trace] == ["parse", "split"]
+    assert STAGE_ERRORS.labels("split")._value.get() >= 1
+    assert server_timing(trace).startswith("parse;dur=")
+
+
+def test_llm_calls_are_labelled_by_run_name():
+    trace = start_trace()
+    chain = (
+        ChatPromptTemplate.from_template("{q}")
+        | fake_llm(["ok"]).with_config(run_name="answer")
+        | StrOutputParser()
+    )
+    assert (
+        chain.invoke({"q": "hi"}, config={"callbacks": [LLMMetricsHandler("chat")]})
+        == "ok"
+    )
+    assert [stage for stage, _ in trace] == ["llm.answer"]
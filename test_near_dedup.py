@@ -0,0 +1,171 @@
+# Tests for near-duplicate chunk elimination (utils/near_dedup.py, ChatIngestor)
+
+import random
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.data_ingestion.data_ingestion import ChatIngestor
+from utils.index_store import ScopedRetriever
+from utils.local_embeddings import HashingEmbeddings
+from utils.near_dedup import (
+    collapse_near_duplicates,
+    minhash_signatures,
+    near_duplicate_of,
+)
+
+DISCLAIMER = (
+    "This document is confidential and intended solely for the addressee. "
+    "Any disclosure, copying or distribution is prohibited and may be unlawful. "
+) * 2
+
+
+def _random_text(rng, words=120):
+    return " ".join(f"term{rng.randrange(5000)}" for _ in range(words))
+
+
+def test_signatures_estimate_jaccard_similarity():
+    rng = random.Random(0)
+    base = _random_text(rng, 200).split()
+    edited = base[:190] + [f"edit{i}" for i in range(10)]
+
+    sig = minhash_signatures([" ".join(base), " ".join(edited), _random_text(rng)])
+
+    assert sig.shape == (3, 64)
+    assert (sig[0] == sig[1]).mean() > 0.8
+    assert (sig[0] == sig[2]).mean() < 0.1
+    assert np.array_equal(sig[:1], minhash_signatures([" ".join(base)]))
+
+
+def test_only_near_identical_rows_point_to_an_earlier_representative():
+    rng = random.Random(1)
+    unique = [_random_text(rng) for _ in range(200)]
+    texts = unique + [f"{DISCLAIMER} Page {i}." for i in range(50)]
+
+    representative = near_duplicate_of(minhash_signatures(texts), threshold=0.8)
+
+    assert np.array_equal(representative[:200], np.arange(200))
+    boilerplate = representative[200:]
+    assert (boilerplate != np.arange(200, 250)).sum() >= 45
+    assert set(boilerplate) <= set(range(200, 250))
+
+
+def test_kept_chunks_record_the_duplicates_they_stand_for():
+    chunks = [
+        Document(
+            page_content=f"{DISCLAIMER} Page footer.",
+            metadata={"file_name": name, "page": page, "doc_id": name[0]},
+        )
+        for name in ("a.pdf", "b.pdf")
+        for page in range(3)
+    ]
+    chunks.append(Document(page_content="Payment is due within 30 days."))
+
+    kept = collapse_near_duplicates(chunks)
+
+    assert [c.page_content for c in kept] == [
+        chunks[0].page_content,
+        "Payment is due within 30 days.",
+    ]
+    assert kept[0].metadata["duplicate_count"] == 5
+    assert kept[0].metadata["duplicates"][-1] == {
+        "file_name": "b.pdf",
+        "page": 2,
+        "doc_id": "b",
+    }
+
+
+class Upload:
+    def __init__(self, name, data):
+        self.name = name
+        self._data = data
+
+    def getbuffer(self):
+        return self._data
+
+
+def _contracts(count, seed=2):
+    rng = random.Random(seed)
+    return [
+        Upload(
+            f"contract{i}.txt",
+            "\n\n".join(
+                part for _ in range(3) for part in (_random_text(rng, 30), DISCLAIMER)
+            ).encode(),
+        )
+        for i in range(count)
+    ]
+
+
+def _ingestor(monkeypatch, tmp_path):
+    monkeypatch.setenv("EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setattr("utils.model_loader.load_dotenv", lambda: None)
+    return ChatIngestor(
+        temp_base=str(tmp_path / "data"), faiss_base=str(tmp_path / "faiss")
+    )
+
+
+def test_ingest_embeds_boilerplate_once_per_file(monkeypatch, tmp_path):
+    embedded = []
+    original = HashingEmbeddings.embed_documents
+    monkeypatch.setattr(
+        HashingEmbeddings,
+        "embed_documents",
+        lambda self, texts: embedded.extend(texts) or original(self, texts),
+    )
+    ingestor = _ingestor(monkeypatch, tmp_path)
+
+    retriever = ingestor.build_retriever(_contracts(2), chunk_size=400, chunk_overlap=0)
+
+    report = ingestor.last_report
+    assert report.chunks_deduplicated == 4
+    assert len(embedded) == report.chunks_added == 8
+    hits = retriever.vectorstore.similarity_search("confidential disclosure", k=2)
+    assert [h.metadata["duplicate_count"] for h in hits] == [2, 2]
+    assert {h.metadata["file_name"] for h in hits} == {"contract0.txt", "contract1.txt"}
+
+
+def test_boilerplate_survives_removing_the_file_it_was_first_seen_in(
+    monkeypatch, tmp_path
+):
+    ingestor = _ingestor(monkeypatch, tmp_path)
+    retriever = ingestor.build_retriever(_contracts(2), chunk_size=400, chunk_overlap=0)
+
+    ingestor.remove_documents(["contract0.txt"])
+    scoped = ScopedRetriever(
+        vectorstore=retriever.vectorstore,
+        index_dir=str(ingestor.faiss_dir),
+        k=1,
+        sources=["contract1.txt"],
+    )
+
+    hits = scoped.invoke("confidential disclosure")
+    assert hits and hits[0].page_content.strip() == DISCLAIMER.strip()
+    assert hits[0].metadata["file_name"] == "contract1.txt"
+
+
+def test_boilerplate_repeated_across_pages_stays_reachable_by_page(
+    monkeypatch, tmp_path
+):
+    import fitz
+
+    doc = fitz.open()
+    rng = random.Random(3)
+    for text in (_random_text(rng, 30), DISCLAIMER, DISCLAIMER):
+        doc.new_page().insert_textbox(fitz.Rect(50, 50, 550, 800), text)
+    ingestor = _ingestor(monkeypatch, tmp_path)
+    retriever = ingestor.build_retriever(
+        [Upload("contract.pdf", doc.tobytes())], chunk_size=400, chunk_overlap=0
+    )
+
+    scoped = ScopedRetriever(
+        vectorstore=retriever.vectorstore,
+        index_dir=str(ingestor.faiss_dir),
+        k=1,
+        pages=(2, 2),
+    )
+
+    hits = scoped.invoke("confidential disclosure")
+    assert hits and hits[0].metadata["page"] == 2
+    assert "confidential" in hits[0].page_content
@@ -0,0 +1,34 @@
+# Tests for the shared parsed-text cache in utils/parse_cache.py
+
+from pathlib import Path
+
+import utils.parse_cache as parse_cache
+from utils.parse_cache import ParseCache, parse_pdf
+
+SAMPLE_PDF = Path("data/document_compare/Long_Report_V1.pdf")
+
+
+def test_pdf_is_parsed_once_per_content_hash(tmp_path, monkeypatch):
+    cache = ParseCache(str(tmp_path))
+    first = parse_pdf(SAMPLE_PDF, cache=cache)
+    assert first.page_count == len(first.pages) > 0
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("PDF re-parsed despite cache entry")
+
+    monkeypatch.setattr(parse_cache.fitz, "open", _fail)
+    # Same bytes under a different name/source still hit the cache.
+    copy = tmp_path / "renamed.pdf"
+    copy.write_bytes(SAMPLE_PDF.read_bytes())
+    for source in (SAMPLE_PDF, copy, SAMPLE_PDF.read_bytes()):
+        again = parse_pdf(source, cache=cache)
+        assert again.sha256 == first.sha256
+        assert [p.text for p in again.pages] == [p.text for p in first.pages]
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    parsed = parse_pdf(SAMPLE_PDF, cache=cache)
+    cache._path(parsed.sha256).write_bytes(b"not gzip")
+    assert cache.get(parsed.sha256) is None
+    assert parse_pdf(SAMPLE_PDF, cache=cache).page_count == parsed.page_count
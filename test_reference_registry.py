@@ -0,0 +1,124 @@
+# Tests for stored comparison references (utils/reference_registry.py, /compare)
+
+import functools
+import json
+
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+
+import utils.parse_cache as parse_cache
+import utils.reference_registry as reference_registry
+from benchmarks.fakes import fake_llm
+from utils.model_loader import ModelLoader
+from utils.reference_registry import ReferenceRegistry
+from utils.result_cache import ResultCache
+
+
+def _pdf_bytes(*pages):
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 72), text)
+    return doc.tobytes()
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        parse_cache, "_default_cache", parse_cache.ParseCache(str(tmp_path / "cache"))
+    )
+    return ReferenceRegistry(str(tmp_path / "references"))
+
+
+def test_versions_are_stored_once_per_content(registry):
+    v1 = _pdf_bytes("Term 1: pay in 30 days", "Term 2: ship in 5 days")
+    v2 = _pdf_bytes("Term 1: pay in 45 days", "Term 2: ship in 5 days")
+
+    first, created = registry.add("Supply Contract.pdf", v1)
+    assert created and first["reference_id"] == "Supply-Contract"
+    assert first["version"] == 1 and first["page_count"] == 2
+    assert registry.add("renamed.pdf", v1, "Supply-Contract") == (first, False)
+
+    second, created = registry.add("Supply Contract.pdf", v2)
+    assert created and second["version"] == 2
+    assert second["page_hashes"][1] == first["page_hashes"][1]
+    assert second["page_hashes"][0] != first["page_hashes"][0]
+    assert registry.get("Supply-Contract") == second
+    assert registry.get("Supply-Contract", 1) == first
+    assert [r["versions"] for r in registry.list()] == [2]
+
+
+def test_loading_a_reference_does_not_parse_it_again(registry, monkeypatch):
+    registry.add("contract.pdf", _pdf_bytes("Term 1: pay in 30 days"))
+    monkeypatch.setattr(
+        parse_cache.fitz, "open", lambda *a, **k: pytest.fail("reference re-parsed")
+    )
+
+    record, parsed = registry.load("contract")
+
+    assert parsed.sha256 == record["sha256"]
+    assert "pay in 30 days" in parsed.pages[0].text
+
+
+def test_unknown_or_invalid_references_are_rejected(registry):
+    with pytest.raises(KeyError):
+        registry.get("missing")
+    with pytest.raises(ValueError):
+        registry.add("contract.pdf", _pdf_bytes("x"), "../escape")
+    with pytest.raises(ValueError):
+        registry.add("contract.txt", b"hello")
+
+
+def test_compare_against_a_stored_reference(registry, tmp_path, monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    rows = [{"Page": "1", "Changes": "Payment term changed from 30 to 45 days"}]
+    monkeypatch.setattr(
+        ModelLoader, "load_llm", lambda self: fake_llm([json.dumps(rows)])
+    )
+    monkeypatch.setattr(reference_registry, "_default_registry", registry)
+    import api.main as main
+
+    monkeypatch.setattr(
+        main, "get_result_cache", lambda: ResultCache({"path": str(tmp_path / "r.db")})
+    )
+    monkeypatch.setattr(
+        main,
+        "DocumentComparator",
+        functools.partial(main.DocumentComparator, str(tmp_path / "compare")),
+    )
+    client = TestClient(main.app)
+    reference = _pdf_bytes("Term 1: pay in 30 days")
+    stored = client.post(
+        "/compare/references",
+        files={"file": ("contract.pdf", reference, "application/pdf")},
+    ).json()
+    assert stored["created"] and stored["reference_id"] == "contract"
+
+    changed = client.post(
+        "/compare",
+        data={"reference_id": "contract"},
+        files={
+            "actual": (
+                "new.pdf",
+                _pdf_bytes("Term 1: pay in 45 days"),
+                "application/pdf",
+            )
+        },
+    )
+    assert changed.status_code == 200
+    assert changed.json()["rows"] == rows
+
+    same = client.post(
+        "/compare",
+        data={"reference_id": "contract"},
+        files={"actual": ("copy.pdf", reference, "application/pdf")},
+    )
+    assert same.json()["rows"] == [{"Page": "1", "Changes": "NO CHANGE"}]
+
+    missing = client.post(
+        "/compare",
+        data={"reference_id": "nope"},
+        files={"actual": ("new.pdf", reference, "application/pdf")},
+    )
+    assert missing.status_code == 404
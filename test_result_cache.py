@@ -0,0 +1,72 @@
+# Tests for the persistent LLM result cache in utils/result_cache.py
+
+import time
+
+from model.models import Metadata, SummaryResponse
+from utils.result_cache import ResultCache, llm_result_key, schema_fingerprint
+
+
+def _cache(tmp_path, **overrides):
+    cfg = {
+        "path": str(tmp_path / "results.sqlite3"),
+        "ttl_hours": 1,
+        "max_bytes": 10**6,
+    }
+    cfg.update(overrides)
+    return ResultCache(cfg)
+
+
+def test_get_or_compute_reports_hits(tmp_path):
+    cache = _cache(tmp_path)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"Title": "Attention"}
+
+    assert cache.get_or_compute("k", "analyze", compute) == (
+        {"Title": "Attention"},
+        False,
+    )
+    assert cache.get_or_compute("k", "analyze", compute) == (
+        {"Title": "Attention"},
+        True,
+    )
+    assert len(calls) == 1
+
+
+def test_expired_entries_are_misses(tmp_path, monkeypatch):
+    cache = _cache(tmp_path)
+    cache.put("k", "analyze", [1, 2])
+    later = time.time() + 2 * 3600
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert cache.get("k") is None
+
+
+def test_size_eviction_drops_least_recently_used(tmp_path):
+    cache = _cache(tmp_path, max_bytes=250)
+    cache.put("a", "compare", "x" * 100)
+    cache.put("b", "compare", "y" * 100)
+    assert cache.get("a") is not None  # "a" becomes the most recently used
+    cache.put("c", "compare", "z" * 100)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_key_depends_on_documents_model_prompt_and_schema():
+    base = dict(
+        namespace="analyze",
+        doc_hashes=["h1"],
+        llm_identity="groq:m:temperature=0",
+        prompt_version="1",
+        schema=schema_fingerprint(Metadata),
+    )
+    key = llm_result_key(**base)
+    assert key == llm_result_key(**base)
+    for field, value in (
+        ("doc_hashes", ["h2"]),
+        ("llm_identity", "google:m:temperature=0"),
+        ("prompt_version", "2"),
+        ("schema", schema_fingerprint(SummaryResponse)),
+    ):
+        assert llm_result_key(**{**base, field: value}) != key
@@ -0,0 +1,68 @@
+# Tests for the storage lifecycle sweeper in utils/storage_manager.py
+
+import os
+import time
+
+from utils.config_loader import load_config
+from utils.storage_manager import StorageSweeper, lease
+
+
+def _session(base, name, size, age_seconds):
+    d = base / name
+    d.mkdir(parents=True)
+    (d / "file.bin").write_bytes(b"x" * size)
+    past = time.time() - age_seconds
+    for p in (d / "file.bin", d):
+        os.utime(p, (past, past))
+    return d
+
+
+def _sweeper(base, **area):
+    return StorageSweeper(
+        {"min_idle_seconds": 60, "areas": {"test": {"path": str(base), **area}}}
+    )
+
+
+def test_ttl_and_quota_evict_least_recently_accessed(tmp_path):
+    old = _session(tmp_path, "session_b", 100, 3 * 3600)
+    cold = _session(tmp_path, "session_a", 100, 2 * 3600)
+    warm = _session(tmp_path, "session_c", 100, 1800)
+    fresh = _session(tmp_path, "session_d", 100, 10)
+    sample = tmp_path / "sample.pdf"
+    sample.write_bytes(b"y" * 1000)
+
+    sweeper = _sweeper(tmp_path, ttl_hours=2.5, max_bytes=250)
+    reclaimed = sweeper.sweep_once()["test"]
+
+    # old: TTL; cold: quota (oldest remaining); warm + fresh fit the quota.
+    assert not old.exists() and not cold.exists()
+    assert warm.exists() and fresh.exists() and sample.exists()
+    assert reclaimed == 200
+    assert sweeper.stats()["evicted_entries"] == {"test": 2}
+
+
+def test_leased_and_recently_used_sessions_are_skipped(tmp_path):
+    busy = _session(tmp_path, "session_busy", 100, 3 * 3600)
+    recent = _session(tmp_path, "session_recent", 100, 3 * 3600)
+    sweeper = _sweeper(tmp_path, ttl_hours=1)
+
+    os.utime(recent)  # accessed just now, e.g. by another worker
+    with lease(busy):
+        os.utime(busy, (0, 0))  # stale mtime but still in use
+        sweeper.sweep_once()
+        assert busy.exists()
+    assert recent.exists()
+    assert sweeper.stats()["reclaimed_bytes"] == {"test": 0}
+
+
+def test_root_level_index_generations_are_not_evicted(tmp_path):
+    # Session-less ingestors publish gen-* and CURRENT at the faiss_index root.
+    area = load_config()["storage"]["areas"]["faiss_index"]
+    live = _session(tmp_path, "gen-000001", 100, 30 * 24 * 3600)
+    (tmp_path / "CURRENT").write_text("gen-000001")
+    stale = _session(tmp_path, "session_old", 100, 30 * 24 * 3600)
+
+    _sweeper(tmp_path, **{**area, "path": str(tmp_path), "max_bytes": 0}).sweep_once()
+
+    assert live.exists() and (tmp_path / "CURRENT").exists()
+    assert not stale.exists()
@@ -0,0 +1,73 @@
+# Tests for reduced-precision session indexes in utils/vector_store.py
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from benchmarks.bench_quantization import synthetic_vectors
+from benchmarks.fakes import FakeEmbeddings
+from utils.vector_store import (
+    SIDECAR_SUFFIX,
+    RerankingFAISS,
+    build_vectorstore,
+    load_vectorstore,
+)
+
+DIM = 64
+
+
+def _corpus(n=500):
+    vectors, queries = synthetic_vectors(n, DIM, topics=10, seed=0, queries=20)
+    text_embeddings = [(f"chunk {i}", v.tolist()) for i, v in enumerate(vectors)]
+    return text_embeddings, queries
+
+
+def _top(store, query, k=5):
+    docs = store.similarity_search_with_score_by_vector(query.tolist(), k=k)
+    return [doc.page_content for doc, _ in docs]
+
+
+def test_sq8_index_round_trips_and_matches_exact_ranking(tmp_path):
+    text_embeddings, queries = _corpus()
+    emb = FakeEmbeddings(dim=DIM)
+    settings = {"precision": "sq8", "rerank": True, "rerank_factor": 4}
+
+    exact = FAISS.from_embeddings(text_embeddings, emb)
+    store = build_vectorstore(text_embeddings, emb, settings=settings)
+    store.save_local(str(tmp_path))
+    loaded = load_vectorstore(str(tmp_path), emb)
+
+    assert isinstance(loaded, RerankingFAISS)
+    assert isinstance(loaded.exact, np.memmap)
+    assert (tmp_path / f"index{SIDECAR_SUFFIX}").exists()
+    for query in queries:
+        assert _top(loaded, query) == _top(exact, query)
+
+
+def test_float32_setting_builds_a_plain_flat_index(tmp_path):
+    text_embeddings, _ = _corpus(50)
+    emb = FakeEmbeddings(dim=DIM)
+    settings = {"precision": "float32", "rerank": True, "rerank_factor": 4}
+
+    build_vectorstore(text_embeddings, emb, settings=settings).save_local(str(tmp_path))
+
+    assert type(load_vectorstore(str(tmp_path), emb)) is FAISS
+    assert not (tmp_path / f"index{SIDECAR_SUFFIX}").exists()
+
+
+def test_sidecar_follows_adds_and_deletes():
+    text_embeddings, _ = _corpus(50)
+    emb = FakeEmbeddings(dim=DIM)
+    settings = {"precision": "float16", "rerank": True, "rerank_factor": 2}
+    store = build_vectorstore(text_embeddings, emb, settings=settings)
+
+    ids = store.add_texts(["quarterly revenue report"])
+    assert store.exact.shape == (51, DIM)
+    assert _top(store, np.array(emb.embed_query("quarterly revenue report")), 1) == [
+        "quarterly revenue report"
+    ]
+
+    store.delete([store.index_to_docstore_id[0], ids[0]])
+    assert store.exact.shape == (49, DIM) == (store.index.ntotal, DIM)
+    np.testing.assert_array_equal(
+        store.exact[0], np.asarray(text_embeddings[1][1], dtype=np.float32)
+    )
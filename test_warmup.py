@@ -0,0 +1,127 @@
+# Tests for the startup warm-up (utils/warmup.py, /ready) and shared model clients
+
+import os
+import threading
+
+from fastapi.testclient import TestClient
+
+import src.document_analyzer.data_analysis as data_analysis
+import src.document_compare.document_comparator as document_comparator
+from benchmarks.fakes import fake_llm
+from utils.model_loader import ModelLoader
+from utils.warmup import Warmup, recent_index_dirs
+
+
+def _fail():
+    raise RuntimeError("provider down")
+
+
+def test_only_required_steps_gate_readiness():
+    optional = Warmup()
+    optional.run([("models", lambda: None, True), ("providers", _fail, False)])
+    assert optional.ready
+    assert optional.status()["steps"]["providers"]["error"] == "provider down"
+
+    required = Warmup()
+    required.run([("models", _fail, True), ("indexes", lambda: 3, False)])
+    status = required.status()
+    assert not required.ready and status["status"] == "failed"
+    assert status["steps"]["indexes"] == {
+        "status": "ok",
+        "required": False,
+        "result": 3,
+        "seconds": status["steps"]["indexes"]["seconds"],
+    }
+
+
+def test_status_reports_warming_until_steps_finish():
+    release = threading.Event()
+    warmup = Warmup()
+    thread = threading.Thread(
+        target=warmup.run, args=([("models", release.wait, True)],)
+    )
+    thread.start()
+    try:
+        assert warmup.status()["status"] == "warming"
+        assert not warmup.ready
+    finally:
+        release.set()
+        thread.join()
+    assert warmup.status()["status"] == "ready"
+
+
+def test_recent_index_dirs_are_the_most_recently_used(tmp_path):
+    for age, name in enumerate(["newest", "middle", "oldest"]):
+        index_dir = tmp_path / f"session_{name}"
+        index_dir.mkdir()
+        (index_dir / "CURRENT").write_text("gen-000001")
+        os.utime(index_dir, (1000 - age, 1000 - age))
+    (tmp_path / "session_empty").mkdir()
+
+    assert [d.name for d in recent_index_dirs(str(tmp_path), 2)] == [
+        "session_newest",
+        "session_middle",
+    ]
+    assert recent_index_dirs(str(tmp_path / "missing"), 2) == []
+
+
+def test_loaders_share_one_client_per_configuration(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setenv("EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setattr("utils.model_loader.load_dotenv", lambda: None)
+    first, second = ModelLoader(), ModelLoader()
+    assert first.load_embeddings() is second.load_embeddings()
+
+    second.config["embedding_model"]["hashing"] = {"dim": 64}
+    assert second.load_embeddings() is not first.load_embeddings()
+
+
+def test_ready_turns_200_once_warm_up_finishes(monkeypatch, tmp_path):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setenv("EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setattr(ModelLoader, "load_llm", lambda self: fake_llm(["OK"]))
+    monkeypatch.setattr(data_analysis, "_default_analyzer", None)
+    monkeypatch.setattr(document_comparator, "_default_comparator", None)
+    import api.main as main
+
+    config = main.load_config()
+    config["storage"]["enabled"] = False
+    monkeypatch.setattr(main, "load_config", lambda: config)
+    monkeypatch.setattr(main, "FAISS_BASE", str(tmp_path))
+
+    with TestClient(main.app) as client:
+        main.app.state.warmup.wait(timeout=30)
+        response = client.get("/ready")
+
+    assert response.status_code == 200
+    steps = response.json()["steps"]
+    assert {name: step["status"] for name, step in steps.items()} == {
+        "embeddings": "ok",
+        "llm": "ok",
+        "analyzer": "ok",
+        "comparator": "ok",
+        "indexes": "ok",
+        "providers": "ok",
+    }
+    assert data_analysis._default_analyzer is not None
+
+
+def test_missing_api_keys_fail_readiness_not_startup(monkeypatch, tmp_path):
+    for key in ("GOOGLE_API_KEY", "GROQ_API_KEY", "EMBEDDING_PROVIDER"):
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setattr("utils.model_loader.load_dotenv", lambda: None)
+    import api.main as main
+
+    monkeypatch.setattr(main, "FAISS_BASE", str(tmp_path))
+
+    with TestClient(main.app) as client:
+        main.app.state.warmup.wait(timeout=30)
+        health = client.get("/health")
+        ready = client.get("/ready")
+
+    assert health.status_code == 200
+    assert ready.status_code == 503
+    body = ready.json()
+    assert body["status"] == "failed"
+    assert "Missing environment variables" in body["steps"]["embeddings"]["error"]
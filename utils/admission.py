@@ -0,0 +1,179 @@
+import asyncio
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Iterable, Optional
+
+from logger.custom_logger import CustomLogger
+from utils.config_loader import load_config
+from utils.metrics import ADMISSION_INFLIGHT_BYTES, ADMISSION_REJECTED, ADMISSION_WAIT
+
+log = CustomLogger().get_logger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """The request did not fit and should be retried after retry_after seconds."""
+
+    def __init__(self, endpoint: str, reason: str, retry_after: int):
+        super().__init__(f"Server busy ({reason}) for {endpoint}; retry later.")
+        self.endpoint = endpoint
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def estimate_cost(
+    uploads: Iterable[Any], settings: Dict[str, Any], pages: int = 0
+) -> int:
+    """
+    Estimated peak working memory in bytes of processing uploads (objects
+    with .size) plus `pages` already-parsed pages: a base per request, a
+    multiple of the upload size and a per-page share for extracted text,
+    chunks and vectors. Nothing is read, so it is cheap to call before
+    admission.
+    """
+    total_bytes = sum(upload.size or 0 for upload in uploads)
+    return (
+        int(settings.get("request_bytes", 8 << 20))
+        + int(float(settings.get("upload_byte_multiplier", 3)) * total_bytes)
+        + pages * int(settings.get("page_bytes", 512 << 10))
+    )
+
+
+class _Waiter:
+    __slots__ = ("endpoint", "cost", "loop", "future", "granted")
+
+    def __init__(self, endpoint: str, cost: int, loop: asyncio.AbstractEventLoop):
+        self.endpoint = endpoint
+        self.cost = cost
+        self.loop = loop
+        self.future: asyncio.Future = loop.create_future()
+        self.granted = False
+
+
+def _hand_over(waiter: _Waiter) -> None:
+    if not waiter.future.done():
+        waiter.future.set_result(None)
+
+
+class AdmissionController:
+    """
+    Admits upload-heavy requests against a per-endpoint concurrency limit and
+    a per-process budget of estimated working memory. Requests that do not
+    fit wait in one bounded FIFO queue for at most max_wait_seconds; a full
+    queue or an expired wait is rejected with a Retry-After hint, so a burst
+    is shed early instead of every admitted request slowing down together.
+    A request costing more than the whole budget is admitted only when
+    nothing else holds memory.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        cfg = config if config is not None else load_config().get("admission", {})
+        self.enabled = cfg.get("enabled", True)
+        self.memory_budget = int(cfg.get("memory_budget_bytes", 1 << 30))
+        self.max_queue = int(cfg.get("max_queue", 32))
+        self.max_wait = float(cfg.get("max_wait_seconds", 15))
+        self.retry_after = int(cfg.get("retry_after_seconds", 5))
+        self.limits = {
+            name: int(endpoint.get("max_concurrency", 0))
+            for name, endpoint in (cfg.get("endpoints") or {}).items()
+        }
+        self.cost_settings: Dict[str, Any] = cfg.get("cost") or {}
+        self.in_use = 0
+        self.active: Counter = Counter()
+        self.rejected: Counter = Counter()
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+
+    def _blocked_by(self, endpoint: str, cost: int) -> Optional[str]:
+        limit = self.limits.get(endpoint, 0)
+        if limit and self.active[endpoint] >= limit:
+            return "concurrency"
+        if self.in_use and self.in_use + cost > self.memory_budget:
+            return "memory"
+        return None
+
+    def _grant(self, waiter: _Waiter) -> None:
+        waiter.granted = True
+        self.active[waiter.endpoint] += 1
+        self.in_use += waiter.cost
+        ADMISSION_INFLIGHT_BYTES.set(self.in_use)
+
+    def _dispatch(self) -> None:
+        """Admit queued requests in order. Caller holds the lock."""
+        for waiter in list(self._waiters):
+            if waiter.loop.is_closed():
+                self._waiters.remove(waiter)
+                continue
+            reason = self._blocked_by(waiter.endpoint, waiter.cost)
+            if reason == "concurrency":
+                continue  # other endpoints may still proceed
+            if reason == "memory":
+                break  # later requests must not starve this one
+            self._waiters.remove(waiter)
+            self._grant(waiter)
+            waiter.loop.call_soon_threadsafe(_hand_over, waiter)
+
+    def _reject(self, endpoint: str, reason: str) -> AdmissionRejected:
+        self.rejected[reason] += 1
+        ADMISSION_REJECTED.labels(endpoint, reason).inc()
+        log.warning(
+            "Request rejected by admission control",
+            endpoint=endpoint,
+            reason=reason,
+            in_use_bytes=self.in_use,
+            queued=len(self._waiters),
+        )
+        return AdmissionRejected(endpoint, reason, self.retry_after)
+
+    async def acquire(self, endpoint: str, cost: int) -> None:
+        """Wait until the request fits; raises AdmissionRejected if it will not soon."""
+        start = time.perf_counter()
+        waiter = _Waiter(endpoint, cost, asyncio.get_running_loop())
+        with self._lock:
+            self._waiters.append(waiter)
+            self._dispatch()
+            if not waiter.granted and len(self._waiters) > self.max_queue:
+                self._waiters.remove(waiter)
+                raise self._reject(endpoint, "queue_full")
+        try:
+            if not waiter.granted:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                if not waiter.granted:
+                    self._waiters.remove(waiter)
+                    self._dispatch()
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise self._reject(endpoint, "timeout") from e
+                    raise
+            if isinstance(e, asyncio.CancelledError):
+                self.release(endpoint, cost)  # granted as the caller went away
+                raise
+        ADMISSION_WAIT.labels(endpoint).observe(time.perf_counter() - start)
+
+    def release(self, endpoint: str, cost: int) -> None:
+        with self._lock:
+            self.active[endpoint] -= 1
+            self.in_use -= cost
+            ADMISSION_INFLIGHT_BYTES.set(self.in_use)
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "memory_budget_bytes": self.memory_budget,
+                "in_use_bytes": self.in_use,
+                "active": {k: v for k, v in self.active.items() if v},
+                "queued": len(self._waiters),
+                "rejected": dict(self.rejected),
+            }
+
+
+_default_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global _default_controller
+    if _default_controller is None:
+        _default_controller = AdmissionController()
+    return _default_controller
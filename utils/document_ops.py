@@ -0,0 +1,172 @@
+import codecs
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+from exception.custom_exception import DocumentPortalException
+from logger.custom_logger import CustomLogger
+from utils.parse_cache import parse_pdf
+
+log = CustomLogger().get_logger(__name__)
+
+# Bytes read per step when decoding text files; keeps memory flat for large uploads.
+TEXT_READ_BLOCK = 1 << 16
+
+
+class FitzPDFLoader(BaseLoader):
+    """
+    Page-aware PDF loader backed by PyMuPDF through the shared parse cache.
+    Emits one Document per page with the same metadata keys as PyPDFLoader.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = str(file_path)
+
+    def lazy_load(self) -> Iterator[Document]:
+        parsed = parse_pdf(self.file_path)
+        for page in parsed.pages:
+            yield Document(
+                page_content=page.text,
+                metadata={
+                    "source": self.file_path,
+                    "page": page.page,
+                    "page_label": page.label,
+                    "total_pages": parsed.page_count,
+                },
+            )
+
+
+class PlainTextLoader(BaseLoader):
+    """
+    Lightweight loader for .txt and .md files.
+    Decodes the file incrementally instead of reading it whole, and falls back
+    to latin-1 when the content is not valid UTF-8.
+    """
+
+    def __init__(self, file_path: str, encoding: str = "utf-8-sig"):
+        self.file_path = str(file_path)
+        self.encoding = encoding
+
+    def _decode(self, encoding: str, errors: str = "strict") -> str:
+        decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+        parts: List[str] = []
+        with open(self.file_path, "rb") as f:
+            head = f.read(TEXT_READ_BLOCK)
+            if len(head) < TEXT_READ_BLOCK:
+                return head.decode(encoding, errors=errors)
+            parts.append(decoder.decode(head))
+            while block := f.read(TEXT_READ_BLOCK):
+                parts.append(decoder.decode(block))
+        parts.append(decoder.decode(b"", final=True))
+        return "".join(parts)
+
+    def lazy_load(self) -> Iterator[Document]:
+        try:
+            text = self._decode(self.encoding)
+        except UnicodeDecodeError:
+            log.warning(f"Non UTF-8 content, falling back to latin-1: {self.file_path}")
+            text = self._decode("latin-1", errors="replace")
+        yield Document(page_content=text, metadata={"source": self.file_path})
+
+
+def _docx_loader(file_path: str) -> BaseLoader:
+    # Imported lazily: docx2txt is only needed when a .docx is actually uploaded.
+    from langchain_community.document_loaders import Docx2txtLoader
+
+    return Docx2txtLoader(file_path)
+
+
+LoaderFactory = Callable[[str], BaseLoader]
+
+# Extension -> loader and sniffed MIME type -> loader.
+LOADER_REGISTRY: Dict[str, LoaderFactory] = {}
+MIME_LOADER_REGISTRY: Dict[str, LoaderFactory] = {}
+
+PDF_MIME = "application/pdf"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+TEXT_MIME = "text/plain"
+
+
+def register_loader(
+    factory: LoaderFactory,
+    extensions: Iterable[str] = (),
+    mime_types: Iterable[str] = (),
+) -> LoaderFactory:
+    """
+    Register a loader factory for the given extensions and MIME types.
+    Later registrations override earlier ones, so callers can swap a loader
+    without touching the ingestors.
+    """
+    for ext in extensions:
+        LOADER_REGISTRY[ext.lower()] = factory
+    for mime in mime_types:
+        MIME_LOADER_REGISTRY[mime] = factory
+    return factory
+
+
+register_loader(FitzPDFLoader, extensions=[".pdf"], mime_types=[PDF_MIME])
+register_loader(_docx_loader, extensions=[".docx"], mime_types=[DOCX_MIME])
+register_loader(PlainTextLoader, extensions=[".txt", ".md"], mime_types=[TEXT_MIME])
+
+
+def supported_extensions() -> List[str]:
+    return sorted(LOADER_REGISTRY)
+
+
+def sniff_mime(file_path: str) -> Optional[str]:
+    """
+    Guess the MIME type from the leading bytes of the file.
+    Returns None when the content does not match any known signature.
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(2048)
+    if head.startswith(b"%PDF-"):
+        return PDF_MIME
+    if head.startswith(b"PK\x03\x04"):
+        try:
+            with zipfile.ZipFile(file_path) as zf:
+                if "word/document.xml" in zf.namelist():
+                    return DOCX_MIME
+        except zipfile.BadZipFile:
+            return None
+        return None
+    if b"\x00" not in head:
+        return TEXT_MIME
+    return None
+
+
+def get_loader(file_path: str) -> Optional[BaseLoader]:
+    """
+    Resolve a loader for the file. The sniffed MIME type wins over the
+    extension so that mislabelled uploads still reach the right parser.
+    """
+    path = str(file_path)
+    mime = sniff_mime(path)
+    factory = MIME_LOADER_REGISTRY.get(mime) if mime else None
+    if factory is None:
+        factory = LOADER_REGISTRY.get(Path(path).suffix.lower())
+    return factory(path) if factory else None
+
+
+def load_documents(paths: Iterable[Path]) -> List[Document]:
+    """Load every supported file in paths, skipping unsupported ones."""
+    documents: List[Document] = []
+    try:
+        for path in paths:
+            loader = get_loader(str(path))
+            if loader is None:
+                log.warning(f"Unsupported file type: {path}")
+                continue
+            docs = loader.load()
+            if docs:
+                documents.extend(docs)
+                log.info(f"Loaded {len(docs)} documents from {path}")
+            else:
+                log.warning(f"No content loaded from file: {path}")
+        return documents
+    except Exception as e:
+        log.error(f"Error loading documents: {e}")
+        raise DocumentPortalException(f"Failed to load documents: {e}") from e
@@ -0,0 +1,204 @@
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from utils.llm_gateway import CHARS_PER_TOKEN
+from utils.parse_cache import ParsedDocument
+
+NOT_AVAILABLE = "Not Available"
+EXCERPT_CHARS = 600
+
+# Bump whenever local_metadata or sample_text change what they produce so
+# cached analyses made by the older logic are ignored.
+PROFILE_VERSION = "1"
+
+_PDF_DATE = re.compile(
+    r"^D?:?(\d{4})(\d{2})?(\d{2})?(\d{2})?(\d{2})?(\d{2})?"
+    r"(?:([Zz])|([+-])(\d{2})'?(\d{2})?'?)?"
+)
+
+_STOPWORD_LISTS = {
+    "English": "the of and to in is that for it with as was on be by are this from at or an which",
+    "French": "le la les de des et est un une du que en dans pour pas qui sur au avec par",
+    "German": "der die das und ist nicht mit den von zu ein eine dem auf auch sich für des im",
+    "Spanish": "el la los las de que y en un una es por con para del se no al como",
+    "Portuguese": "o a os as de que e em um uma do da para com não por se dos das",
+    "Italian": "il lo la gli le di che e un una per non con del della sono nel alla è",
+    "Dutch": "de het een en van is dat niet op te zijn met voor ook aan er maar",
+}
+_STOPWORDS = {lang: set(words.split()) for lang, words in _STOPWORD_LISTS.items()}
+
+# Scripts that identify a language without looking at words.
+_SCRIPTS = [
+    ("Japanese", re.compile(r"[぀-ヿ]")),
+    ("Korean", re.compile(r"[가-힯]")),
+    ("Chinese", re.compile(r"[一-鿿]")),
+    ("Russian", re.compile(r"[Ѐ-ӿ]")),
+    ("Arabic", re.compile(r"[؀-ۿ]")),
+    ("Greek", re.compile(r"[Ͱ-Ͽ]")),
+    ("Hebrew", re.compile(r"[֐-׿]")),
+    ("Hindi", re.compile(r"[ऀ-ॿ]")),
+]
+
+_WORD = re.compile(r"[^\W\d_]+")
+_NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)*\.?|[IVX]+\.|[A-Z]\.)\s+\S")
+
+
+def parse_pdf_date(value: Optional[str]) -> str:
+    """ISO 8601 form of a PDF date string such as "D:20240131120000+01'00'"."""
+    match = _PDF_DATE.match((value or "").strip())
+    if not match:
+        return NOT_AVAILABLE
+    year, month, day, hour, minute, second, utc, sign, tz_h, tz_m = match.groups()
+    try:
+        stamp = datetime(
+            int(year),
+            int(month or 1),
+            int(day or 1),
+            int(hour or 0),
+            int(minute or 0),
+            int(second or 0),
+        )
+    except ValueError:
+        return NOT_AVAILABLE
+    if utc:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    elif sign:
+        offset = timedelta(hours=int(tz_h), minutes=int(tz_m or 0))
+        stamp = stamp.replace(tzinfo=timezone(offset if sign == "+" else -offset))
+    if hour is None:
+        return stamp.date().isoformat()
+    return stamp.isoformat()
+
+
+def detect_language(text: str) -> str:
+    """Best guess at the language of text from its script or common stopwords."""
+    letters = sum(1 for ch in text if ch.isalpha())
+    if not letters:
+        return NOT_AVAILABLE
+    for language, script in _SCRIPTS:
+        if len(script.findall(text)) > letters * 0.3:
+            return language
+    words = Counter(w.lower() for w in _WORD.findall(text))
+    scores = {
+        language: sum(words[w] for w in stopwords)
+        for language, stopwords in _STOPWORDS.items()
+    }
+    language, hits = max(scores.items(), key=lambda item: item[1])
+    if hits < 5 or hits < sum(words.values()) * 0.05:
+        return NOT_AVAILABLE
+    return language
+
+
+def _is_heading(line: str) -> bool:
+    if not 3 <= len(line) <= 80 or line.endswith((".", ",", ";", ":")):
+        return False
+    if _NUMBERED_HEADING.match(line):
+        return True
+    words = line.split()
+    if len(words) > 10 or not any(ch.isalpha() for ch in line):
+        return False
+    return line.isupper() or all(w[0].isupper() for w in words if w[0].isalpha())
+
+
+def _headings(text: str) -> List[str]:
+    return [line.strip() for line in text.splitlines() if _is_heading(line.strip())]
+
+
+def _title_from_text(parsed: ParsedDocument) -> str:
+    for page in parsed.pages[:1]:
+        for line in page.text.splitlines():
+            line = line.strip()
+            if 3 <= len(line) <= 120 and any(ch.isalpha() for ch in line):
+                return line
+    return NOT_AVAILABLE
+
+
+def _authors(value: Optional[str]) -> List[str]:
+    names = [n.strip() for n in re.split(r";|,| and | & ", value or "") if n.strip()]
+    return names or [NOT_AVAILABLE]
+
+
+def local_metadata(parsed: ParsedDocument) -> Dict[str, Any]:
+    """
+    The Metadata fields that need no LLM: PDF info dictionary, page count and
+    a language guess over the first pages.
+    """
+    info = parsed.metadata
+    opening = "\n".join(page.text for page in parsed.pages[:5])
+    return {
+        "Title": (info.get("title") or "").strip() or _title_from_text(parsed),
+        "Author": _authors(info.get("author")),
+        "DateCreated": parse_pdf_date(info.get("creationDate")),
+        "LastModifiedDate": parse_pdf_date(
+            info.get("modDate") or info.get("creationDate")
+        ),
+        "Language": detect_language(opening[:20000]),
+        "PageCount": parsed.page_count,
+    }
+
+
+def sample_text(parsed: ParsedDocument, max_tokens: int) -> str:
+    """
+    Text of at most about max_tokens tokens representing the whole document:
+    the opening pages, the section headings of the rest, then evenly spaced
+    excerpts. Documents that already fit are returned in full.
+    """
+    full = parsed.as_text()
+    budget = max_tokens * CHARS_PER_TOKEN
+    if len(full) <= budget:
+        return full
+
+    parts: List[str] = []
+    used = 0
+
+    def add(block: str) -> None:
+        nonlocal used
+        parts.append(block)
+        used += len(block) + 1
+
+    add(f"[Sampled excerpt of a {parsed.page_count}-page document]")
+    opening_budget = budget * 2 // 5
+    rest = 0
+    for rest, page in enumerate(parsed.pages):
+        block = f"\n--- Page {page.page + 1} ---\n{page.text}"
+        if used + len(block) > opening_budget:
+            if rest == 0:  # a long first page still opens the sample
+                add(block[: opening_budget - used])
+                rest = 1
+            break
+        add(block)
+    else:
+        rest = len(parsed.pages)
+    remaining = parsed.pages[rest:]
+
+    headings = [
+        f"p{page.page + 1}: {heading}"
+        for page in remaining
+        for heading in _headings(page.text)
+    ]
+    heading_budget = budget // 10
+    heading_chars = sum(len(h) + 1 for h in headings)
+    if heading_chars > heading_budget:
+        # Keep evenly spaced headings, first and last included, so the outline
+        # still spans the whole document.
+        keep = max(1, len(headings) * heading_budget // heading_chars)
+        last = len(headings) - 1
+        headings = [headings[round(i * last / max(1, keep - 1))] for i in range(keep)]
+    if headings:
+        add("\n--- Section headings ---\n" + "\n".join(headings))
+
+    excerpt_budget = budget - used
+    count = min(len(remaining), excerpt_budget // (EXCERPT_CHARS + 32))
+    if count > 0:
+        size = excerpt_budget // count - 32
+        step = len(remaining) / count
+        for i in range(count):
+            page = remaining[int(i * step + step / 2)]
+            text = " ".join(page.text.split())
+            middle = max(0, (len(text) - size) // 2)
+            add(
+                f"\n--- Excerpt, page {page.page + 1} ---\n{text[middle : middle + size]}"
+            )
+    return "\n".join(parts)
@@ -0,0 +1,384 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from logger.custom_logger import CustomLogger
+from utils.config_loader import load_config
+from utils.metadata_index import FILTERS_FILE, MetadataIndex, metadata_index_for
+from utils.metrics import span
+from utils.vector_store import (
+    SIDECAR_SUFFIX,
+    embed_queries,
+    load_vectorstore,
+    search_batch_with_bitmap,
+    search_with_bitmap,
+)
+
+log = CustomLogger().get_logger(__name__)
+
+# Session index layout:
+#   <index_dir>/CURRENT        name of the live generation, swapped with os.replace
+#   <index_dir>/gen-000007/    immutable index.faiss, index.pkl, filters.npz
+#                              (+ sidecar, ingested_meta.json)
+#   <index_dir>/.lock          advisory lock shared by all workers
+#   <index_dir>/.write.lock    held by writers across load-modify-publish
+#   <index_dir>/tombstones.json  removed documents, hidden from search until
+#                              compaction drops their rows
+# Directories written before generations existed (index.faiss directly in
+# <index_dir>) are still read as the "legacy" generation.
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = ".lock"
+WRITE_LOCK_FILE = ".write.lock"
+META_FILE = "ingested_meta.json"
+TOMBSTONE_FILE = "tombstones.json"
+LEGACY_GENERATION = "legacy"
+LEGACY_FILES = (
+    "index.faiss",
+    "index.pkl",
+    f"index{SIDECAR_SUFFIX}",
+    META_FILE,
+    FILTERS_FILE,
+)
+_GEN_RE = re.compile(r"^gen-(\d+)$")
+
+
+@contextmanager
+def file_lock(index_dir, shared: bool = False, name: str = LOCK_FILE):
+    """
+    Advisory lock on <index_dir>/<name> across processes: flock on POSIX
+    (shared or exclusive), msvcrt on Windows (always exclusive).
+    """
+    path = Path(index_dir) / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10s; keep waiting
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def current_generation(index_dir) -> Optional[str]:
+    """Name of the live generation, "legacy" for the old flat layout, or None."""
+    index_dir = Path(index_dir)
+    try:
+        return (index_dir / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        if (index_dir / "index.faiss").exists():
+            return LEGACY_GENERATION
+        return None
+
+
+def generation_path(index_dir, generation: str) -> Path:
+    index_dir = Path(index_dir)
+    return index_dir if generation == LEGACY_GENERATION else index_dir / generation
+
+
+def writer_lock(index_dir):
+    """
+    Serializes writers that load the live generation, change it and publish
+    the result, so concurrent appends cannot drop each other's rows. Readers
+    never take it.
+    """
+    return file_lock(index_dir, name=WRITE_LOCK_FILE)
+
+
+def read_metadata(index_dir, generation: Optional[str] = None) -> Dict[str, Any]:
+    """The metadata published with a generation (the live one by default)."""
+    generation = generation or current_generation(index_dir)
+    if generation is None:
+        return {}
+    path = generation_path(index_dir, generation) / META_FILE
+    try:
+        return json.loads(path.read_text(encoding="utf-8")) or {}
+    except FileNotFoundError:
+        return {}
+
+
+_tombstone_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Dict[str, Any]]]] = {}
+_tombstone_lock = threading.Lock()
+
+
+def read_tombstones(index_dir) -> Dict[str, Dict[str, Any]]:
+    """
+    doc_id -> {"chunks": n, "compacted": bool} for removed documents. Cached on
+    the file's inode and mtime (every write is a new file swapped in), so
+    checking on every query costs one stat.
+    """
+    path = Path(index_dir) / TOMBSTONE_FILE
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return {}
+    stamp = (st.st_ino, st.st_mtime_ns)
+    key = str(path)
+    with _tombstone_lock:
+        cached = _tombstone_cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    try:
+        tombstones = json.loads(path.read_text(encoding="utf-8")) or {}
+    except FileNotFoundError:
+        return {}
+    with _tombstone_lock:
+        _tombstone_cache[key] = (stamp, tombstones)
+    return tombstones
+
+
+def write_tombstones(index_dir, tombstones: Dict[str, Dict[str, Any]]) -> None:
+    """Replace the tombstone file atomically. Callers hold writer_lock."""
+    path = Path(index_dir) / TOMBSTONE_FILE
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_text(json.dumps(tombstones, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def live_search_kwargs(index_dir, k: int) -> Dict[str, Any]:
+    """
+    Retriever search_kwargs that hide tombstoned documents. fetch_k grows by
+    the number of hidden chunks, so k live results still come back.
+    """
+    tombstones = read_tombstones(index_dir)
+    if not tombstones:
+        return {"k": k}
+    dead = frozenset(tombstones)
+    hidden = sum(int(t.get("chunks", 0)) for t in tombstones.values())
+    return {
+        "k": k,
+        "filter": lambda metadata: metadata.get("doc_id") not in dead,
+        "fetch_k": max(20, k + hidden),
+    }
+
+
+class ScopedRetriever(BaseRetriever):
+    """
+    Retriever over a session index that restricts the FAISS search itself to
+    the rows of the requested source files and 0-based page range, and skips
+    tombstoned documents, using the generation's metadata bitmaps.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorstore: FAISS
+    index_dir: str
+    k: int = 5
+    sources: Optional[List[str]] = None
+    pages: Optional[Tuple[int, int]] = None
+
+    def _bitmap(self) -> Optional[np.ndarray]:
+        return metadata_index_for(self.vectorstore).mask(
+            self.sources, self.pages, exclude_docs=read_tombstones(self.index_dir)
+        )
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        bitmap = self._bitmap()
+        if bitmap is not None and not bitmap.any():
+            return []
+        embedding = self.vectorstore._embed_query(query)
+        return [
+            doc
+            for doc, _ in search_with_bitmap(
+                self.vectorstore, embedding, self.k, bitmap
+            )
+        ]
+
+    def retrieve_batch(self, queries: List[str]) -> List[List[Document]]:
+        """Documents for many queries from one embedding call and one search."""
+        bitmap = self._bitmap()
+        if not queries or (bitmap is not None and not bitmap.any()):
+            return [[] for _ in queries]
+        embedding = self.vectorstore.embedding_function
+        with span("embed"):
+            if isinstance(embedding, Embeddings):
+                vectors = embed_queries(embedding, queries)
+            else:
+                vectors = [embedding(query) for query in queries]
+        with span("retrieve"):
+            hits = search_batch_with_bitmap(self.vectorstore, vectors, self.k, bitmap)
+        return [[doc for doc, _ in row] for row in hits]
+
+
+def _generations(index_dir: Path) -> list:
+    return sorted(
+        int(m.group(1))
+        for m in (_GEN_RE.match(p.name) for p in index_dir.iterdir())
+        if m
+    )
+
+
+def publish_index(
+    index_dir,
+    vectorstore: FAISS,
+    keep_generations: Optional[int] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Save vectorstore as a new generation of index_dir and make it live.
+    The files are written outside the lock; only the pointer swap and pruning
+    of old generations hold it. metadata, if given, is stored with the
+    generation so it can never disagree with the index it describes.
+    Returns the new generation name.
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    if keep_generations is None:
+        keep_generations = int(
+            load_config().get("faiss_db", {}).get("keep_generations", 2)
+        )
+
+    staging = index_dir / f".staging-{uuid.uuid4().hex}"
+    vectorstore.save_local(str(staging))
+    try:
+        vectorstore.metadata_index = MetadataIndex.from_store(vectorstore)
+        vectorstore.metadata_index.save(staging)
+        if metadata is not None:
+            (staging / META_FILE).write_text(
+                json.dumps(metadata, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+        with file_lock(index_dir):
+            existing = _generations(index_dir)
+            generation = f"gen-{(existing[-1] if existing else 0) + 1:06d}"
+            os.replace(staging, index_dir / generation)
+            pointer = index_dir / f"{CURRENT_FILE}.{uuid.uuid4().hex}.tmp"
+            pointer.write_text(generation, encoding="utf-8")
+            os.replace(pointer, index_dir / CURRENT_FILE)
+            for name in LEGACY_FILES:  # superseded flat-layout index
+                (index_dir / name).unlink(missing_ok=True)
+            for old in _generations(index_dir)[:-keep_generations]:
+                # Readers hold loaded copies (and POSIX keeps mmapped files
+                # alive), so old generations can go as soon as they are not live.
+                shutil.rmtree(index_dir / f"gen-{old:06d}", ignore_errors=True)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    log.info(
+        "Published index generation", index_dir=str(index_dir), generation=generation
+    )
+    return generation
+
+
+def load_generation(index_dir, embeddings: Embeddings) -> Tuple[str, FAISS]:
+    """Load the live generation of index_dir under a shared lock."""
+    with file_lock(index_dir, shared=True):
+        generation = current_generation(index_dir)
+        if generation is None:
+            raise FileNotFoundError(f"No FAISS index in {index_dir}")
+        path = generation_path(index_dir, generation)
+        store = load_vectorstore(str(path), embeddings)
+        store.metadata_index = MetadataIndex.load(path)
+    return generation, store
+
+
+class IndexCache:
+    """
+    Per-process LRU of loaded session indexes. get() checks the CURRENT pointer
+    (one small file read) and, when a newer generation has been published,
+    keeps serving the loaded one while a background thread loads the new one,
+    so queries never wait for a reload.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, FAISS]]" = OrderedDict()
+        self._reloading: set = set()
+        self._lock = threading.Lock()
+
+    def get(self, index_dir, embeddings: Embeddings) -> FAISS:
+        key = str(Path(index_dir).resolve())
+        live = current_generation(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None or live is None:
+            generation, store = load_generation(key, embeddings)
+            self._put(key, generation, store)
+            return store
+
+        generation, store = entry
+        if generation != live:
+            self._reload_in_background(key, embeddings)
+        return store
+
+    def prime(self, index_dir, generation: str, store: FAISS) -> None:
+        """Install a store this process just published, skipping the reload."""
+        self._put(str(Path(index_dir).resolve()), generation, store)
+
+    def _put(self, key: str, generation: str, store: FAISS) -> None:
+        with self._lock:
+            self._entries[key] = (generation, store)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _reload_in_background(self, key: str, embeddings: Embeddings) -> None:
+        with self._lock:
+            if key in self._reloading:
+                return
+            self._reloading.add(key)
+
+        def reload():
+            start = time.perf_counter()
+            try:
+                with span("index_reload"):
+                    generation, store = load_generation(key, embeddings)
+                self._put(key, generation, store)
+                log.info(
+                    "Reloaded index",
+                    index_dir=key,
+                    generation=generation,
+                    seconds=round(time.perf_counter() - start, 3),
+                )
+            except Exception as e:
+                log.error("Index reload failed", index_dir=key, error=str(e))
+            finally:
+                with self._lock:
+                    self._reloading.discard(key)
+
+        threading.Thread(target=reload, name="index-reload", daemon=True).start()
+
+
+_default_cache: Optional[IndexCache] = None
+
+
+def get_index_cache() -> IndexCache:
+    global _default_cache
+    if _default_cache is None:
+        cfg = load_config().get("faiss_db", {})
+        _default_cache = IndexCache(int(cfg.get("max_cached_indexes", 32)))
+    return _default_cache
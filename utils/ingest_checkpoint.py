@@ -0,0 +1,120 @@
+import gzip
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+from langchain_core.documents import Document
+
+CHECKPOINT_DIR = "ingest"
+MANIFEST_FILE = "checkpoint.json"
+
+
+def _write_atomic(path: Path, write) -> None:
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+class IngestCheckpoint:
+    """
+    Work of an index update that has not been published yet, kept under
+    <index_dir>/ingest so a failed or interrupted update resumes where it
+    stopped. Staged files get their chunks saved and a row range in one
+    append-only list; embeddings are committed in batches over that list
+    (vectors-<first row>.npy). The manifest records the files and how many
+    rows are embedded. Callers hold the index writer_lock.
+    """
+
+    def __init__(self, index_dir):
+        self.path = Path(index_dir) / CHECKPOINT_DIR
+        manifest = self.path / MANIFEST_FILE
+        state: Dict[str, Any] = {}
+        if manifest.exists():
+            state = json.loads(manifest.read_text(encoding="utf-8"))
+        self.files: Dict[str, Dict[str, Any]] = state.get("files", {})
+        self.total: int = state.get("total", 0)
+        self.embedded: int = state.get("embedded", 0)
+
+    def _save_manifest(self) -> None:
+        state = {"files": self.files, "total": self.total, "embedded": self.embedded}
+        _write_atomic(
+            self.path / MANIFEST_FILE,
+            lambda p: p.write_text(json.dumps(state), encoding="utf-8"),
+        )
+
+    def _chunks_path(self, content_hash: str) -> Path:
+        return self.path / f"chunks-{content_hash}.jsonl.gz"
+
+    def stage_file(
+        self, content_hash: str, info: Dict[str, Any], chunks: List[Document]
+    ) -> None:
+        """Save a parsed file's chunks and append them to the rows to embed."""
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        def write(path: Path) -> None:
+            with gzip.open(path, "wt", encoding="utf-8", compresslevel=1) as f:
+                for chunk in chunks:
+                    record = {"text": chunk.page_content, "metadata": chunk.metadata}
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        _write_atomic(self._chunks_path(content_hash), write)
+        self.files[content_hash] = {**info, "first_row": self.total}
+        self.total += len(chunks)
+        self._save_manifest()
+
+    def documents(self) -> List[Document]:
+        """Staged chunks in row order."""
+        docs: List[Document] = []
+        for content_hash, _ in sorted(
+            self.files.items(), key=lambda item: item[1]["first_row"]
+        ):
+            with gzip.open(
+                self._chunks_path(content_hash), "rt", encoding="utf-8"
+            ) as f:
+                for line in f:
+                    record = json.loads(line)
+                    docs.append(
+                        Document(
+                            page_content=record["text"], metadata=record["metadata"]
+                        )
+                    )
+        return docs
+
+    def commit_batch(self, first_row: int, vectors: List[List[float]]) -> None:
+        """Persist the embeddings of rows first_row.. and mark them done."""
+        if first_row != self.embedded:
+            raise ValueError(
+                f"Batch starts at row {first_row}, checkpoint is at {self.embedded}"
+            )
+        array = np.asarray(vectors, dtype=np.float32)
+
+        def write(path: Path) -> None:
+            with open(path, "wb") as f:
+                np.save(f, array)
+
+        _write_atomic(self.path / f"vectors-{first_row:09d}.npy", write)
+        self.embedded += len(array)
+        self._save_manifest()
+
+    def vectors(self) -> np.ndarray:
+        """Committed embeddings of rows 0..embedded, in row order."""
+        batches = [np.load(p) for p in sorted(self.path.glob("vectors-*.npy"))]
+        if not batches:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(batches)[: self.embedded]
+
+    def files_done(self) -> int:
+        """Staged files whose every chunk is embedded."""
+        return sum(
+            1
+            for info in self.files.values()
+            if info["first_row"] + int(info.get("chunks", 0)) <= self.embedded
+        )
+
+    def clear(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.files, self.total, self.embedded = {}, 0, 0
@@ -0,0 +1,410 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+from pydantic import ConfigDict
+
+from logger.custom_logger import CustomLogger
+from utils.config_loader import load_config
+from utils.metrics import LLM_COALESCED, LLM_INFLIGHT, LLM_QUEUE_WAIT
+
+log = CustomLogger().get_logger(__name__)
+
+# Rough prompt size estimate used to reserve TPM budget before a call; the
+# bucket is corrected with provider-reported usage once the call returns.
+CHARS_PER_TOKEN = 4
+
+
+class TokenBucket:
+    """
+    Continuously refilling budget of `per_minute` units, holding at most
+    `capacity`. reserve() debits immediately (the balance may go negative) and
+    returns how long the caller must wait before its reservation is covered,
+    which keeps callers in FIFO order without a background thread.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: Optional[float] = None) -> float:
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill(now or time.monotonic())
+            self.tokens -= amount
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def adjust(self, delta: float) -> None:
+        """Return (positive) or charge (negative) units after the fact."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + delta)
+
+
+class _Slots:
+    """
+    FIFO counting semaphore usable from threads and event loops at once, so
+    sync invoke() and async abatch() calls share one provider limit.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._lock = threading.Lock()
+        self._waiters: Deque[Union[threading.Event, Tuple[Any, asyncio.Future]]] = (
+            deque()
+        )
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self.in_use < self.limit and not self._waiters:
+                self.in_use += 1
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        event.wait()  # the releasing caller hands its slot over
+
+    async def acquire_async(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_use < self.limit and not self._waiters:
+                self.in_use += 1
+                return
+            fut = loop.create_future()
+            self._waiters.append((loop, fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()  # handed over just as the caller was cancelled
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                loop, fut = waiter
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(_hand_over, fut, self)
+                    return
+            self.in_use -= 1
+
+
+def _hand_over(fut: asyncio.Future, slots: _Slots) -> None:
+    if fut.cancelled():
+        slots.release()  # waiter went away; pass the slot on
+    else:
+        fut.set_result(None)
+
+
+class ProviderLimits:
+    """Concurrency slots plus optional request and token buckets for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 8,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
+        self.name = name
+        self.slots = _Slots(max_concurrency)
+        self.rpm = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tpm = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def reserve(self, est_tokens: int) -> float:
+        wait = 0.0
+        if self.rpm:
+            wait = max(wait, self.rpm.reserve(1))
+        if self.tpm:
+            wait = max(wait, self.tpm.reserve(est_tokens))
+        return wait
+
+    def settle(self, est_tokens: int, used_tokens: int) -> None:
+        if self.tpm and used_tokens:
+            self.tpm.adjust(est_tokens - used_tokens)
+
+    def refund(self, est_tokens: int) -> None:
+        """Return the token reservation of a call that failed."""
+        if self.tpm:
+            self.tpm.adjust(est_tokens)
+
+
+class _LeaderGone(Exception):
+    """The coalesced call was abandoned (cancelled); followers retry on their own."""
+
+
+class LLMGateway:
+    """
+    Process-wide choke point for LLM calls: per-provider concurrency limits,
+    RPM/TPM token buckets and single-flight coalescing of identical prompts
+    that are in flight at the same time.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        cfg = config if config is not None else load_config().get("llm_gateway", {})
+        self.enabled = cfg.get("enabled", True)
+        self.coalesce = cfg.get("coalesce", True)
+        self.default_limits = cfg.get("default", {"max_concurrency": 8})
+        self.provider_cfg: Dict[str, Dict[str, Any]] = cfg.get("providers") or {}
+        # How long a coalesced caller waits on the leader before calling itself.
+        self.follower_timeout = float(cfg.get("follower_timeout_seconds", 300))
+        self._providers: Dict[str, ProviderLimits] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def limits(self, provider: str) -> ProviderLimits:
+        with self._lock:
+            if provider not in self._providers:
+                pcfg = {**self.default_limits, **self.provider_cfg.get(provider, {})}
+                self._providers[provider] = ProviderLimits(
+                    provider,
+                    max_concurrency=int(pcfg.get("max_concurrency", 8)),
+                    requests_per_minute=pcfg.get("requests_per_minute"),
+                    tokens_per_minute=pcfg.get("tokens_per_minute"),
+                )
+            return self._providers[provider]
+
+    def wrap(self, llm: BaseChatModel, provider: str) -> BaseChatModel:
+        if not self.enabled:
+            return llm
+        return GatewayChatModel(inner=llm, provider=provider, gateway=self)
+
+    # -- single flight -------------------------------------------------------
+    def _join(self, key: Optional[str]) -> Tuple[Future, bool]:
+        """Return (future, is_leader); followers wait on the leader's future."""
+        if key is None:
+            return Future(), True
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                return fut, False
+            fut = Future()
+            self._inflight[key] = fut
+            return fut, True
+
+    def _finish(self, key: Optional[str], fut: Future, result=None, error=None):
+        if key is not None:
+            with self._lock:
+                if self._inflight.get(key) is fut:
+                    del self._inflight[key]
+        if fut.done():
+            return
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+
+    def _abandon(self, key: Optional[str], fut: Future, error: BaseException):
+        # Followers only see real call errors; a cancelled or interrupted
+        # leader sends them off to make the call themselves.
+        self._finish(
+            key, fut, error=error if isinstance(error, Exception) else _LeaderGone()
+        )
+
+    # -- execution -----------------------------------------------------------
+    def call(
+        self,
+        provider: str,
+        key: Optional[str],
+        est_tokens: int,
+        fn: Callable[[], ChatResult],
+    ) -> ChatResult:
+        key = key if self.coalesce else None
+        while True:
+            fut, leader = self._join(key)
+            if leader:
+                break
+            LLM_COALESCED.labels(provider).inc()
+            try:
+                return fut.result(timeout=self.follower_timeout)
+            except _LeaderGone:
+                continue
+            except FutureTimeoutError:
+                key, fut = None, Future()  # stop waiting; call uncoalesced
+                break
+        limits = self.limits(provider)
+        start = time.perf_counter()
+        acquired = reserved = False
+        try:
+            limits.slots.acquire()
+            acquired = True
+            delay = limits.reserve(est_tokens)
+            reserved = True
+            if delay:
+                time.sleep(delay)
+            LLM_QUEUE_WAIT.labels(provider).observe(time.perf_counter() - start)
+            with LLM_INFLIGHT.labels(provider).track_inprogress():
+                result = fn()
+        except BaseException as e:
+            if reserved:
+                limits.refund(est_tokens)
+            self._abandon(key, fut, e)
+            raise
+        finally:
+            if acquired:
+                limits.slots.release()
+        limits.settle(est_tokens, _used_tokens(result))
+        self._finish(key, fut, result=result)
+        return result
+
+    async def acall(
+        self, provider: str, key: Optional[str], est_tokens: int, fn: Callable[[], Any]
+    ) -> ChatResult:
+        key = key if self.coalesce else None
+        while True:
+            fut, leader = self._join(key)
+            if leader:
+                break
+            LLM_COALESCED.labels(provider).inc()
+            try:
+                # shield: cancelling this caller must not cancel the leader's future
+                return await asyncio.wait_for(
+                    asyncio.shield(asyncio.wrap_future(fut)), self.follower_timeout
+                )
+            except _LeaderGone:
+                continue
+            except asyncio.TimeoutError:
+                key, fut = None, Future()
+                break
+        limits = self.limits(provider)
+        start = time.perf_counter()
+        acquired = reserved = False
+        try:
+            await limits.slots.acquire_async()
+            acquired = True
+            delay = limits.reserve(est_tokens)
+            reserved = True
+            if delay:
+                await asyncio.sleep(delay)
+            LLM_QUEUE_WAIT.labels(provider).observe(time.perf_counter() - start)
+            with LLM_INFLIGHT.labels(provider).track_inprogress():
+                result = await fn()
+        except BaseException as e:
+            if reserved:
+                limits.refund(est_tokens)
+            self._abandon(key, fut, e)
+            raise
+        finally:
+            if acquired:
+                limits.slots.release()
+        limits.settle(est_tokens, _used_tokens(result))
+        self._finish(key, fut, result=result)
+        return result
+
+
+def _used_tokens(result: ChatResult) -> int:
+    used = 0
+    for gen in result.generations:
+        usage = getattr(gen.message, "usage_metadata", None)
+        if usage:
+            used += usage.get("total_tokens", 0)
+    if not used and result.llm_output:
+        used = (result.llm_output.get("token_usage") or {}).get("total_tokens", 0)
+    return used
+
+
+def _estimate_tokens(messages: List[BaseMessage]) -> int:
+    chars = sum(len(str(m.content)) for m in messages)
+    return max(1, chars // CHARS_PER_TOKEN)
+
+
+def _request_key(
+    identity: str, messages: List[BaseMessage], stop: Optional[List[str]], kwargs
+) -> str:
+    material = json.dumps(
+        {
+            "llm": identity,
+            "messages": [(m.type, m.content) for m in messages],
+            "stop": stop,
+            "kwargs": kwargs,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class GatewayChatModel(BaseChatModel):
+    """Chat model that routes every call of the wrapped model through an LLMGateway."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    inner: BaseChatModel
+    provider: str
+    gateway: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return f"gateway-{self.inner._llm_type}"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"provider": self.provider, **self.inner._identifying_params}
+
+    def _key(self, messages, stop, kwargs) -> str:
+        return _request_key(repr(self._identifying_params), messages, stop, kwargs)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return self.gateway.call(
+            self.provider,
+            self._key(messages, stop, kwargs),
+            _estimate_tokens(messages),
+            lambda: self.inner._generate(messages, stop=stop, **kwargs),
+        )
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return await self.gateway.acall(
+            self.provider,
+            self._key(messages, stop, kwargs),
+            _estimate_tokens(messages),
+            lambda: self.inner._agenerate(messages, stop=stop, **kwargs),
+        )
+
+
+_default_gateway: Optional[LLMGateway] = None
+_default_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    global _default_gateway
+    if _default_gateway is None:
+        with _default_lock:
+            if _default_gateway is None:
+                _default_gateway = LLMGateway()
+    return _default_gateway
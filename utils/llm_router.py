@@ -0,0 +1,231 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, List, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+from pydantic import ConfigDict
+
+from logger.custom_logger import CustomLogger
+from utils.metrics import LLM_HEDGE_EVENTS
+
+log = CustomLogger().get_logger(__name__)
+
+# Sync hedges run provider calls on these threads; a losing call is left to
+# finish in the background (its latency still feeds the stats).
+_hedge_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies per provider."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(provider)
+            if samples is None:
+                samples = self._samples[provider] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, provider: str, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(provider) or ())
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def count(self, provider: str) -> int:
+        with self._lock:
+            return len(self._samples.get(provider) or ())
+
+
+class HedgePolicy:
+    """
+    Hedge deadline for a provider: the configured percentile of its recent
+    latencies, clamped to [min_deadline, max_deadline]. Until min_samples calls
+    have been observed the initial deadline is used.
+    """
+
+    def __init__(
+        self,
+        tracker: LatencyTracker,
+        percentile: float = 95,
+        min_samples: int = 20,
+        initial_deadline: float = 8.0,
+        min_deadline: float = 0.5,
+        max_deadline: float = 30.0,
+    ):
+        self.tracker = tracker
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_deadline = initial_deadline
+        self.min_deadline = min_deadline
+        self.max_deadline = max_deadline
+
+    def deadline(self, provider: str) -> float:
+        if self.tracker.count(provider) < self.min_samples:
+            return self.initial_deadline
+        observed = self.tracker.percentile(provider, self.percentile)
+        return min(self.max_deadline, max(self.min_deadline, observed or 0.0))
+
+
+class HedgedChatModel(BaseChatModel):
+    """
+    Sends each call to the primary provider; if it has not answered within the
+    policy deadline (or fails), fires the same call at the secondary and returns
+    whichever successful response arrives first.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    primary: BaseChatModel
+    secondary: BaseChatModel
+    primary_name: str
+    secondary_name: str
+    policy: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"primary": self.primary_name, "secondary": self.secondary_name}
+
+    def _timed(self, name: str, llm: BaseChatModel, messages, stop, kwargs):
+        start = time.perf_counter()
+        result = llm._generate(messages, stop=stop, **kwargs)
+        self.policy.tracker.record(name, time.perf_counter() - start)
+        return result
+
+    async def _atimed(self, name: str, llm: BaseChatModel, messages, stop, kwargs):
+        start = time.perf_counter()
+        try:
+            result = await llm._agenerate(messages, stop=stop, **kwargs)
+        except asyncio.CancelledError:
+            # A cancelled loser took at least this long; record it so a slow
+            # provider's deadline still moves up.
+            self.policy.tracker.record(name, time.perf_counter() - start)
+            raise
+        self.policy.tracker.record(name, time.perf_counter() - start)
+        return result
+
+    def _submit(self, name: str, llm: BaseChatModel, messages, stop, kwargs) -> Future:
+        ctx = contextvars.copy_context()
+        return _hedge_pool.submit(
+            ctx.run, self._timed, name, llm, messages, stop, kwargs
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        deadline = self.policy.deadline(self.primary_name)
+        pending = {
+            self._submit(
+                self.primary_name, self.primary, messages, stop, kwargs
+            ): self.primary_name
+        }
+        done, _ = wait(pending, timeout=deadline)
+        errors: List[BaseException] = []
+        for fut in done:
+            pending.pop(fut)
+            if fut.exception() is None:
+                return fut.result()
+            errors.append(fut.exception())  # type: ignore
+
+        self._hedge_fired(deadline, failed=bool(errors))
+        secondary = self._submit(
+            self.secondary_name, self.secondary, messages, stop, kwargs
+        )
+        pending[secondary] = self.secondary_name
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = pending.pop(fut)
+                if fut.exception() is None:
+                    self._hedge_won(name)
+                    return fut.result()
+                errors.append(fut.exception())  # type: ignore
+        raise errors[0]
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        deadline = self.policy.deadline(self.primary_name)
+        primary = asyncio.ensure_future(
+            self._atimed(self.primary_name, self.primary, messages, stop, kwargs)
+        )
+        pending = {primary: self.primary_name}
+        done, _ = await asyncio.wait(pending, timeout=deadline)
+        errors: List[BaseException] = []
+        for task in done:
+            pending.pop(task)
+            if task.exception() is None:
+                return task.result()
+            errors.append(task.exception())  # type: ignore
+
+        self._hedge_fired(deadline, failed=bool(errors))
+        secondary = asyncio.ensure_future(
+            self._atimed(self.secondary_name, self.secondary, messages, stop, kwargs)
+        )
+        pending[secondary] = self.secondary_name
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=FIRST_COMPLETED)
+                for task in done:
+                    name = pending.pop(task)
+                    if task.exception() is None:
+                        self._hedge_won(name)
+                        return task.result()
+                    errors.append(task.exception())  # type: ignore
+        finally:
+            for task in pending:
+                task.cancel()
+        raise errors[0]
+
+    def _hedge_fired(self, deadline: float, failed: bool) -> None:
+        event = "failover" if failed else "hedged"
+        LLM_HEDGE_EVENTS.labels(self.primary_name, event).inc()
+        log.info(
+            "Hedging LLM call",
+            primary=self.primary_name,
+            secondary=self.secondary_name,
+            reason=event,
+            deadline_s=round(deadline, 3),
+        )
+
+    def _hedge_won(self, name: str) -> None:
+        if name == self.secondary_name:
+            LLM_HEDGE_EVENTS.labels(self.primary_name, "secondary_won").inc()
+
+
+_default_tracker: Optional[LatencyTracker] = None
+
+
+def get_latency_tracker(window: int = 200) -> LatencyTracker:
+    global _default_tracker
+    if _default_tracker is None:
+        _default_tracker = LatencyTracker(window)
+    return _default_tracker
@@ -0,0 +1,79 @@
+import re
+import zlib
+from typing import Dict, List, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_TOKEN = re.compile(r"\w+")
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    In-process embeddings that need no model download or network: word unigrams
+    and bigrams are hashed (crc32, stable across processes) into `dim` signed
+    buckets, term counts are log-scaled and rows are L2-normalized. Retrieval
+    quality is that of a plain bag of words: fine for keyword-heavy queries,
+    offline tests and benchmarks, weaker than a trained model on paraphrases.
+
+    Each batch is accumulated with a single np.bincount over all texts; the
+    token -> bucket mapping is memoized because vocabularies repeat heavily.
+    """
+
+    def __init__(self, dim: int = 1024, batch_size: int = 512, bigrams: bool = True):
+        self.dim = dim
+        self.batch_size = batch_size
+        self.bigrams = bigrams
+        self._slots: Dict[str, int] = {}
+
+    def _slot(self, feature: str) -> int:
+        """Signed bucket: +(i+1) or -(i+1) for bucket i."""
+        slot = self._slots.get(feature)
+        if slot is None:
+            h = zlib.crc32(feature.encode("utf-8"))
+            slot = (h % self.dim + 1) * (1 if h & 0x80000000 else -1)
+            if len(self._slots) < 1_000_000:
+                self._slots[feature] = slot
+        return slot
+
+    def _features(self, text: str) -> List[str]:
+        tokens = _TOKEN.findall(text.lower())
+        if self.bigrams and len(tokens) > 1:
+            return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        return tokens
+
+    def _embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        rows: List[int] = []
+        slots: List[int] = []
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            rows.extend([row] * len(features))
+            slots.extend(self._slot(f) for f in features)
+        if not slots:
+            return np.zeros((len(texts), self.dim), dtype=np.float32)
+        signed = np.asarray(slots, dtype=np.int64)
+        flat = np.asarray(rows, dtype=np.int64) * self.dim + np.abs(signed) - 1
+        counts = np.bincount(
+            flat, weights=np.sign(signed), minlength=len(texts) * self.dim
+        ).reshape(len(texts), self.dim)
+        vectors = (np.sign(counts) * np.log1p(np.abs(counts))).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+    def embed_array(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts into a float32 (len(texts), dim) array."""
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.vstack(
+            [
+                self._embed_batch(texts[i : i + self.batch_size])
+                for i in range(0, len(texts), self.batch_size)
+            ]
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed_batch([text])[0].tolist()
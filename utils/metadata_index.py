@@ -0,0 +1,148 @@
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from logger.custom_logger import CustomLogger
+
+log = CustomLogger().get_logger(__name__)
+
+# Saved next to index.faiss in every published generation.
+FILTERS_FILE = "filters.npz"
+_KEY_TYPES = {"sources": str, "pages": np.int64, "docs": str}
+
+
+def _source_of(metadata: Dict[str, Any]) -> Optional[str]:
+    name = metadata.get("file_name")
+    if name is None and metadata.get("source") is not None:
+        name = Path(str(metadata["source"])).name
+    return name
+
+
+class MetadataIndex:
+    """
+    Row bitmaps of one index generation keyed by source file name, page
+    (0-based, as the loaders store it) and doc_id. Bit i stands for FAISS row
+    i; bitmaps are packed little-endian, the layout faiss.IDSelectorBitmap
+    reads, so a filter never touches the vectors it excludes.
+    """
+
+    def __init__(
+        self,
+        ntotal: int,
+        sources: Dict[str, np.ndarray],
+        pages: Dict[int, np.ndarray],
+        docs: Dict[str, np.ndarray],
+    ):
+        self.ntotal = ntotal
+        self.sources = sources
+        self.pages = pages
+        self.docs = docs
+
+    @classmethod
+    def from_store(cls, store: FAISS) -> "MetadataIndex":
+        ntotal = store.index.ntotal
+        rows: Dict[str, Dict[Any, List[int]]] = {
+            "sources": defaultdict(list),
+            "pages": defaultdict(list),
+            "docs": defaultdict(list),
+        }
+        for position, docstore_id in store.index_to_docstore_id.items():
+            doc = store.docstore.search(docstore_id)
+            metadata = getattr(doc, "metadata", None) or {}
+            source = _source_of(metadata)
+            if source is not None:
+                rows["sources"][source].append(position)
+            if isinstance(metadata.get("page"), int):
+                rows["pages"][metadata["page"]].append(position)
+            if metadata.get("doc_id") is not None:
+                rows["docs"][metadata["doc_id"]].append(position)
+
+        def pack(positions: List[int]) -> np.ndarray:
+            bits = np.zeros(ntotal, dtype=bool)
+            bits[positions] = True
+            return np.packbits(bits, bitorder="little")
+
+        return cls(
+            ntotal,
+            *(
+                {key: pack(positions) for key, positions in rows[kind].items()}
+                for kind in _KEY_TYPES
+            ),
+        )
+
+    def save(self, folder) -> None:
+        arrays = {"ntotal": np.array([self.ntotal])}
+        for kind, key_type in _KEY_TYPES.items():
+            table: Dict[Any, np.ndarray] = getattr(self, kind)
+            arrays[f"{kind}_keys"] = np.array(list(table), dtype=key_type)
+            arrays[f"{kind}_bits"] = (
+                np.stack(list(table.values()))
+                if table
+                else np.zeros((0, (self.ntotal + 7) // 8), dtype=np.uint8)
+            )
+        with open(Path(folder) / FILTERS_FILE, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, folder) -> Optional["MetadataIndex"]:
+        path = Path(folder) / FILTERS_FILE
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            tables = [
+                dict(zip(data[f"{kind}_keys"].tolist(), data[f"{kind}_bits"]))
+                for kind in _KEY_TYPES
+            ]
+            return cls(int(data["ntotal"][0]), *tables)
+
+    def _union(self, table: Dict[Any, np.ndarray], keys: Iterable) -> np.ndarray:
+        out = np.zeros((self.ntotal + 7) // 8, dtype=np.uint8)
+        for key in keys:
+            if key in table:
+                out |= table[key]
+        return out
+
+    def mask(
+        self,
+        sources: Optional[Iterable[str]] = None,
+        pages: Optional[Tuple[int, int]] = None,
+        exclude_docs: Iterable[str] = (),
+    ) -> Optional[np.ndarray]:
+        """
+        Packed bitmap of the rows matching every given filter: any of sources,
+        a page in the inclusive 0-based pages range, and not in exclude_docs.
+        None means no restriction.
+        """
+        allowed: Optional[np.ndarray] = None
+        if sources is not None:
+            allowed = self._union(self.sources, sources)
+        if pages is not None:
+            first, last = pages
+            in_range = self._union(
+                self.pages, (p for p in self.pages if first <= p <= last)
+            )
+            allowed = in_range if allowed is None else allowed & in_range
+        dead = [doc_id for doc_id in exclude_docs if doc_id in self.docs]
+        if dead:
+            if allowed is None:
+                allowed = np.packbits(
+                    np.ones(self.ntotal, dtype=bool), bitorder="little"
+                )
+            allowed &= ~self._union(self.docs, dead)
+        return allowed
+
+
+def metadata_index_for(store: FAISS) -> MetadataIndex:
+    """
+    The metadata index attached to store at load or publish time, or one
+    built now for indexes saved before they existed.
+    """
+    index = getattr(store, "metadata_index", None)
+    if index is None or index.ntotal != store.index.ntotal:
+        log.info("Building metadata index", rows=store.index.ntotal)
+        index = MetadataIndex.from_store(store)
+        store.metadata_index = index
+    return index
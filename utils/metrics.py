@@ -0,0 +1,197 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from prometheus_client import Counter, Gauge, Histogram
+
+# Latency buckets from 1ms (cache hits, FAISS search) to 2min (large LLM calls).
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0,
+)  # fmt: skip
+
+STAGE_LATENCY = Histogram(
+    "docportal_stage_duration_seconds",
+    "Time spent in each pipeline stage.",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_LATENCY = Histogram(
+    "docportal_request_duration_seconds",
+    "End-to-end HTTP request latency.",
+    ["route", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_ERRORS = Counter(
+    "docportal_stage_errors_total", "Stages that raised an exception.", ["stage"]
+)
+LLM_LATENCY = Histogram(
+    "docportal_llm_call_duration_seconds",
+    "Latency of individual LLM calls.",
+    ["component", "call"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "docportal_llm_tokens_total",
+    "Provider-reported LLM tokens.",
+    ["component", "direction"],
+)
+LLM_QUEUE_WAIT = Histogram(
+    "docportal_llm_queue_wait_seconds",
+    "Time LLM calls wait in the gateway for a concurrency slot and rate budget.",
+    ["provider"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_INFLIGHT = Gauge(
+    "docportal_llm_inflight_requests",
+    "LLM calls currently executing against the provider.",
+    ["provider"],
+    multiprocess_mode="livesum",
+)
+LLM_COALESCED = Counter(
+    "docportal_llm_coalesced_total",
+    "LLM calls answered by an identical call already in flight.",
+    ["provider"],
+)
+LLM_HEDGE_EVENTS = Counter(
+    "docportal_llm_hedge_events_total",
+    "Hedged LLM calls by primary provider: hedged, failover, secondary_won.",
+    ["primary", "event"],
+)
+CACHE_EVENTS = Counter(
+    "docportal_cache_events_total", "Cache lookups by outcome.", ["cache", "result"]
+)
+CHUNKS = Counter(
+    "docportal_chunks_total", "Chunks produced by the text splitter.", ["component"]
+)
+STORAGE_RECLAIMED_BYTES = Counter(
+    "docportal_storage_reclaimed_bytes_total",
+    "Bytes freed by the storage sweeper.",
+    ["area"],
+)
+STORAGE_EVICTED = Counter(
+    "docportal_storage_evicted_entries_total",
+    "Session folders / cache files removed by the storage sweeper.",
+    ["area"],
+)
+ADMISSION_WAIT = Histogram(
+    "docportal_admission_wait_seconds",
+    "Time admitted requests waited for a concurrency slot and memory budget.",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_REJECTED = Counter(
+    "docportal_admission_rejected_total",
+    "Requests answered 503 by admission control: queue_full or timeout.",
+    ["endpoint", "reason"],
+)
+ADMISSION_INFLIGHT_BYTES = Gauge(
+    "docportal_admission_inflight_bytes",
+    "Estimated working memory of requests currently admitted.",
+    multiprocess_mode="livesum",
+)
+
+# Per-request list of (stage, seconds); set by the API middleware for Server-Timing.
+_trace: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "docportal_trace", default=None
+)
+
+
+def start_trace() -> List[Tuple[str, float]]:
+    trace: List[Tuple[str, float]] = []
+    _trace.set(trace)
+    return trace
+
+
+def _record(stage: str, seconds: float) -> None:
+    STAGE_LATENCY.labels(stage).observe(seconds)
+    trace = _trace.get()
+    if trace is not None:
+        trace.append((stage, seconds))
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block of work as a pipeline stage (e.g. "parse", "index_load")."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        _record(stage, time.perf_counter() - start)
+
+
+def server_timing(trace: List[Tuple[str, float]]) -> str:
+    """Render a trace as a Server-Timing header value (durations in ms)."""
+    totals: Dict[str, float] = {}
+    for stage, seconds in trace:
+        name = stage.replace(".", "_").replace(" ", "_")
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(f"{name};dur={s * 1000:.1f}" for name, s in totals.items())
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """
+    LangChain callback that times every LLM call and retriever call inside a
+    chain and counts provider-reported tokens. The call label is the run_name
+    given to the LLM step (e.g. "question_rewriter"), or "llm" by default.
+    """
+
+    def __init__(self, component: str):
+        self.component = component
+        self._started: Dict[UUID, Tuple[str, float]] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs):
+        self._started[run_id] = (kwargs.get("name") or "llm", time.perf_counter())
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs):
+        self._started[run_id] = (kwargs.get("name") or "llm", time.perf_counter())
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs):
+        call, start = self._started.pop(run_id, ("llm", None))
+        if start is not None:
+            seconds = time.perf_counter() - start
+            LLM_LATENCY.labels(self.component, call).observe(seconds)
+            _record(f"llm.{call}", seconds)
+        tokens_in, tokens_out = _token_usage(response)
+        if tokens_in:
+            LLM_TOKENS.labels(self.component, "in").inc(tokens_in)
+        if tokens_out:
+            LLM_TOKENS.labels(self.component, "out").inc(tokens_out)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        call, _ = self._started.pop(run_id, ("llm", None))
+        STAGE_ERRORS.labels(f"llm.{call}").inc()
+
+    def on_retriever_start(self, serialized, query, *, run_id: UUID, **kwargs):
+        self._started[run_id] = ("retrieve", time.perf_counter())
+
+    def on_retriever_end(self, documents, *, run_id: UUID, **kwargs):
+        _, start = self._started.pop(run_id, ("retrieve", None))
+        if start is not None:
+            _record("retrieve", time.perf_counter() - start)
+
+    def on_retriever_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._started.pop(run_id, None)
+        STAGE_ERRORS.labels("retrieve").inc()
+
+
+def _token_usage(response: LLMResult) -> Tuple[int, int]:
+    tokens_in = tokens_out = 0
+    for generations in response.generations:
+        for gen in generations:
+            usage: Any = getattr(getattr(gen, "message", None), "usage_metadata", None)
+            if usage:
+                tokens_in += usage.get("input_tokens", 0)
+                tokens_out += usage.get("output_tokens", 0)
+    if not (tokens_in or tokens_out) and response.llm_output:
+        usage = response.llm_output.get("token_usage") or {}
+        tokens_in = usage.get("prompt_tokens", 0)
+        tokens_out = usage.get("completion_tokens", 0)
+    return tokens_in, tokens_out
@@ -1,7 +1,12 @@
 import os
 import sys
+import threading
+from typing import Any, Callable, Dict, Tuple
 from dotenv import load_dotenv
 from .config_loader import load_config
+from .llm_gateway import get_llm_gateway
+from .llm_router import HedgePolicy, HedgedChatModel, get_latency_tracker
+from .local_embeddings import HashingEmbeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_groq import ChatGroq
@@ -12,6 +17,43 @@ from exception.custom_exception import DocumentPortalException
 
 log = CustomLogger().get_logger(__name__)
 
+PROVIDER_API_KEYS = {"google": "GOOGLE_API_KEY", "groq": "GROQ_API_KEY"}
+# Alternative API endpoints, e.g. benchmarks/stub_provider.py for load tests.
+# GROQ_API_BASE is read by langchain_groq itself.
+PROVIDER_BASE_URLS = ("GOOGLE_API_BASE", "GROQ_API_BASE")
+
+# Provider clients are thread-safe and keep their HTTP connections, so one per
+# distinct configuration is shared by every request in the process.
+_clients: Dict[Tuple, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def _shared_client(key: Tuple, build: Callable[[], Any]) -> Any:
+    with _clients_lock:
+        client = _clients.get(key)
+    if client is None:
+        client = build()
+        with _clients_lock:
+            client = _clients.setdefault(key, client)
+    return client
+
+
+def _endpoints() -> Tuple:
+    return tuple(os.getenv(name) for name in PROVIDER_BASE_URLS)
+
+
+def _google_client_kwargs() -> Dict[str, Any]:
+    endpoint = os.getenv("GOOGLE_API_BASE")
+    if not endpoint:
+        return {}
+    return {"client_options": {"api_endpoint": endpoint}, "transport": "rest"}
+
+
+def clear_client_cache() -> None:
+    """Forget shared provider clients, e.g. after rotating API keys."""
+    with _clients_lock:
+        _clients.clear()
+
 
 class ModelLoader:
     """
@@ -20,18 +62,25 @@ class ModelLoader:
 
     def __init__(self):
         load_dotenv()
-        self._validate_env()
         self.config = load_config()
+        self._validate_env()
         log.info(f"Configuration loaded successfully: {list(self.config.keys())}")
 
     def _validate_env(self):
         """
         Validate necessary environment variables.
-        Ensure API keys exist.
+        Ensure API keys exist for the providers the configuration actually uses,
+        so e.g. a local embedding backend needs no GOOGLE_API_KEY.
         """
-        required_vars = ["GOOGLE_API_KEY", "GROQ_API_KEY"]
-        self.api_keys = {key: os.getenv(key) for key in required_vars}
-        missing = [k for k, v in self.api_keys.items() if not v]
+        self.api_keys = {key: os.getenv(key) for key in PROVIDER_API_KEYS.values()}
+        required_vars = sorted(
+            {
+                PROVIDER_API_KEYS[p]
+                for p in self._providers_in_use()
+                if p in PROVIDER_API_KEYS
+            }
+        )
+        missing = [k for k in required_vars if not self.api_keys[k]]
         if missing:
             log.error("Missing environment variables", missing_vars=missing)
             raise DocumentPortalException("Missing environment variables", sys)
@@ -39,34 +88,144 @@ class ModelLoader:
             f"Environment variables validated: available_keys={[k for k in self.api_keys if self.api_keys[k]]}"
         )
 
+    def _providers_in_use(self) -> set:
+        providers = {self._embedding_provider()}
+        routing = self._routing()
+        llm_keys = [os.getenv("LLM_PROVIDER", "groq")]
+        if routing["mode"] == "hedged":
+            llm_keys = [routing.get("primary") or llm_keys[0], routing["secondary"]]
+        for key in llm_keys:
+            providers.add(self.config["llm"].get(key, {}).get("provider", key))
+        return providers
+
+    def _embedding_provider(self) -> str:
+        return os.getenv(
+            "EMBEDDING_PROVIDER",
+            self.config["embedding_model"].get("provider", "google"),
+        )
+
     def load_embeddings(self):
         """
         Load and return the embedding model.
+        Providers: "google" (API), "fastembed" (local quantized ONNX model, needs
+        the optional fastembed package) or "hashing" (local, no download).
         """
         try:
-            log.info("Loading embedding model...")
-            model_name = self.config["embedding_model"]["model_name"]
-            return GoogleGenerativeAIEmbeddings(model=model_name)
+            emb_config = self.config["embedding_model"]
+            provider = self._embedding_provider()
+            key = (
+                "embeddings",
+                provider,
+                repr(sorted(emb_config.items())),
+                self.api_keys.get("GOOGLE_API_KEY"),
+                _endpoints(),
+            )
+            return _shared_client(key, lambda: self._build_embeddings(provider))
         except Exception as e:
             log.error("Error loading embedding model", error=str(e))
             raise DocumentPortalException("Failed to load embedding model", sys)
 
+    def _build_embeddings(self, provider: str):
+        log.info("Loading embedding model...")
+        emb_config = self.config["embedding_model"]
+        threads = emb_config.get("threads")
+        if provider == "hashing":
+            local = emb_config.get("hashing", {})
+            return HashingEmbeddings(
+                dim=int(local.get("dim", 1024)),
+                batch_size=int(emb_config.get("batch_size", 256)),
+            )
+        if provider == "fastembed":
+            from langchain_community.embeddings import FastEmbedEmbeddings
+
+            local = emb_config.get("fastembed", {})
+            return FastEmbedEmbeddings(
+                model_name=local.get("model_name", "BAAI/bge-small-en-v1.5"),
+                cache_dir=local.get("cache_dir"),
+                batch_size=int(emb_config.get("batch_size", 256)),
+                threads=int(threads) if threads else None,
+            )
+        model_name = emb_config["model_name"]
+        return GoogleGenerativeAIEmbeddings(model=model_name, **_google_client_kwargs())
+
+    def _routing(self) -> dict:
+        routing = dict(self.config.get("llm_routing") or {})
+        routing["mode"] = os.getenv("LLM_ROUTING", routing.get("mode", "single"))
+        return routing
+
+    def _provider_identity(self, provider_key: str) -> str:
+        llm_config = self.config["llm"].get(provider_key, {})
+        return (
+            f"{llm_config.get('provider')}:{llm_config.get('model_name')}"
+            f":temperature={llm_config.get('temperature', 0.2)}"
+        )
+
+    def llm_identity(self) -> str:
+        """
+        Provider, model and sampling settings of the LLM load_llm() would return;
+        used to key cached results.
+        """
+        provider_key = os.getenv("LLM_PROVIDER", "groq")
+        routing = self._routing()
+        if routing["mode"] == "hedged":
+            primary = routing.get("primary") or provider_key
+            return (
+                f"hedged({self._provider_identity(primary)}"
+                f"|{self._provider_identity(routing['secondary'])})"
+            )
+        return self._provider_identity(provider_key)
+
     def load_llm(self):
         """
         Load and return the LLM model.
+        With llm_routing.mode "hedged", calls go to the primary provider and are
+        hedged to the secondary once they exceed the rolling latency deadline.
         """
+        routing = self._routing()
+        if routing["mode"] != "hedged":
+            return self.load_provider_llm(os.getenv("LLM_PROVIDER", "groq"))
+
+        primary = routing.get("primary") or os.getenv("LLM_PROVIDER", "groq")
+        secondary = routing["secondary"]
+        tracker = get_latency_tracker(int(routing.get("window", 200)))
+        policy = HedgePolicy(
+            tracker,
+            percentile=float(routing.get("hedge_percentile", 95)),
+            min_samples=int(routing.get("min_samples", 20)),
+            initial_deadline=float(routing.get("initial_deadline_seconds", 8)),
+            min_deadline=float(routing.get("min_deadline_seconds", 0.5)),
+            max_deadline=float(routing.get("max_deadline_seconds", 30)),
+        )
+        log.info(f"Loading hedged LLM: primary={primary}, secondary={secondary}")
+        return HedgedChatModel(
+            primary=self.load_provider_llm(primary),
+            secondary=self.load_provider_llm(secondary),
+            primary_name=primary,
+            secondary_name=secondary,
+            policy=policy,
+        )
+
+    def load_provider_llm(self, provider_key: str):
         """Load LLM dynamically based on provider in config."""
 
         llm_block = self.config["llm"]
 
-        log.info("Loading LLM...")
-
-        provider_key = os.getenv("LLM_PROVIDER", "groq")  # Default groq
         if provider_key not in llm_block:
             log.error(f"LLM provider not found in config: {provider_key}")
             raise ValueError(f"Provider '{provider_key}' not found in config")
 
         llm_config = llm_block[provider_key]
+        key = (
+            "llm",
+            provider_key,
+            repr(sorted(llm_config.items())),
+            self.api_keys.get(PROVIDER_API_KEYS.get(llm_config.get("provider"), "")),
+            _endpoints(),
+        )
+        return _shared_client(key, lambda: self._build_llm(llm_config))
+
+    def _build_llm(self, llm_config: dict):
+        log.info("Loading LLM...")
         provider = llm_config.get("provider")
         model_name = llm_config.get("model_name")
         temperature = llm_config.get("temperature", 0.2)
@@ -78,9 +237,12 @@ class ModelLoader:
 
         if provider == "google":
             llm = ChatGoogleGenerativeAI(
-                model=model_name, temperature=temperature, max_output_tokens=max_tokens
+                model=model_name,
+                temperature=temperature,
+                max_output_tokens=max_tokens,
+                **_google_client_kwargs(),
             )
-            return llm
+            return get_llm_gateway().wrap(llm, provider)
 
         elif provider == "groq":
             llm = ChatGroq(
@@ -88,7 +250,7 @@ class ModelLoader:
                 api_key=self.api_keys["GROQ_API_KEY"],  # type: ignore
                 temperature=temperature,
             )
-            return llm
+            return get_llm_gateway().wrap(llm, provider)
 
         # elif provider == "openai":
         #     return ChatOpenAI(
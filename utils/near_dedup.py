@@ -0,0 +1,128 @@
+import re
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+_TOKEN = re.compile(r"\w+")
+_PRIME = np.uint64((1 << 31) - 1)
+# Shingle hashes per vectorized block; bounds the (num_perm, block) matrix.
+_BLOCK = 1 << 16
+# Duplicates listed on a representative; the count covers the rest.
+MAX_PROVENANCE = 20
+
+
+def _shingles(text: str, size: int) -> List[int]:
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) <= size:
+        grams = [" ".join(tokens)]
+    else:
+        grams = [" ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)]
+    return [zlib.crc32(g.encode("utf-8")) for g in set(grams)]
+
+
+def minhash_signatures(
+    texts: Sequence[str], num_perm: int = 64, shingle: int = 5, seed: int = 1
+) -> np.ndarray:
+    """
+    MinHash signatures (len(texts), num_perm) over word shingles. All
+    shingle hashes go through the num_perm hash functions as one matrix
+    product per block and are reduced per text with np.minimum.reduceat.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+    b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    start = 0
+    while start < len(texts):
+        hashes: List[int] = []
+        offsets: List[int] = []
+        end = start
+        while end < len(texts) and (not hashes or len(hashes) < _BLOCK):
+            offsets.append(len(hashes))
+            hashes.extend(_shingles(texts[end], shingle))
+            end += 1
+        x = np.asarray(hashes, dtype=np.uint64) % _PRIME
+        permuted = (a * x[None, :] + b) % _PRIME
+        signatures[start:end] = np.minimum.reduceat(permuted, offsets, axis=1).T
+        start = end
+    return signatures
+
+
+def near_duplicate_of(
+    signatures: np.ndarray, threshold: float = 0.9, bands: int = 16
+) -> np.ndarray:
+    """
+    For each row, the index of the earlier kept row it nearly duplicates
+    (estimated Jaccard similarity >= threshold), or its own index if it is
+    kept. Candidates come from LSH banding: rows sharing any band bucket.
+    """
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    band_ids = [
+        np.unique(
+            signatures[:, i * rows : (i + 1) * rows], axis=0, return_inverse=True
+        )[1].ravel()
+        for i in range(bands)
+    ]
+    buckets: List[Dict[int, List[int]]] = [defaultdict(list) for _ in range(bands)]
+    representative = np.arange(n)
+    for row in range(n):
+        candidates = {
+            kept for band in range(bands) for kept in buckets[band][band_ids[band][row]]
+        }
+        if candidates:
+            ordered = np.fromiter(sorted(candidates), dtype=np.int64)
+            similarity = (signatures[ordered] == signatures[row]).mean(axis=1)
+            best = int(np.argmax(similarity))
+            if similarity[best] >= threshold:
+                representative[row] = ordered[best]
+                continue
+        for band in range(bands):
+            buckets[band][band_ids[band][row]].append(row)
+    return representative
+
+
+def _provenance(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        key: metadata[key]
+        for key in ("file_name", "page", "doc_id")
+        if metadata.get(key) is not None
+    }
+
+
+def collapse_near_duplicates(
+    chunks: List[Document], settings: Optional[Dict[str, Any]] = None
+) -> List[Document]:
+    """
+    Drop chunks that nearly duplicate an earlier chunk. Each kept
+    representative records what it stands for in metadata: duplicate_count
+    and duplicates (file_name, page and doc_id of up to MAX_PROVENANCE).
+    """
+    settings = settings or {}
+    if len(chunks) < 2:
+        return chunks
+    signatures = minhash_signatures(
+        [c.page_content for c in chunks],
+        num_perm=int(settings.get("num_perm", 64)),
+        shingle=int(settings.get("shingle_words", 5)),
+    )
+    representative = near_duplicate_of(
+        signatures,
+        threshold=float(settings.get("threshold", 0.9)),
+        bands=int(settings.get("bands", 16)),
+    )
+    kept: List[Document] = []
+    for row, chunk in enumerate(chunks):
+        rep = int(representative[row])
+        if rep == row:
+            kept.append(chunk)
+            continue
+        metadata = chunks[rep].metadata
+        metadata["duplicate_count"] = metadata.get("duplicate_count", 0) + 1
+        duplicates = metadata.setdefault("duplicates", [])
+        if len(duplicates) < MAX_PROVENANCE:
+            duplicates.append(_provenance(chunk.metadata))
+    return kept
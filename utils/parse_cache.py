@@ -0,0 +1,164 @@
+import gzip
+import hashlib
+import json
+import os
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import fitz  # PyMuPDF
+
+from logger.custom_logger import CustomLogger
+from utils.metrics import CACHE_EVENTS
+from utils.storage_manager import mark_access
+
+log = CustomLogger().get_logger(__name__)
+
+# Bump the suffix whenever the extraction logic changes so stale entries are ignored.
+EXTRACTOR_VERSION = f"fitz-{fitz.VersionBind}-1"
+
+HASH_BLOCK = 1 << 20
+
+
+@dataclass
+class ParsedPage:
+    page: int
+    label: str
+    text: str
+    width: float
+    height: float
+
+
+@dataclass
+class ParsedDocument:
+    sha256: str
+    page_count: int
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    pages: List[ParsedPage] = field(default_factory=list)
+
+    def as_text(self) -> str:
+        """Page texts joined with "--- Page N ---" markers, as fed to the LLM chains."""
+        return "\n".join(f"\n--- Page {p.page + 1} ---\n{p.text}" for p in self.pages)
+
+
+def sha256_of(source: Union[str, Path, bytes]) -> str:
+    """Content hash of a file path or raw bytes, read in blocks for large files."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    with open(source, "rb") as f:
+        while block := f.read(HASH_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    On-disk cache of extracted PDF text keyed by content hash and extractor version.
+    Each entry is a gzip-compressed JSON-lines file: a header record followed by
+    one record per page.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = Path(
+            cache_dir
+            or os.getenv("PARSE_CACHE_DIR", os.path.join("data", "parse_cache"))
+        )
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, sha256: str) -> Path:
+        return self.cache_dir / sha256[:2] / f"{sha256}.{EXTRACTOR_VERSION}.jsonl.gz"
+
+    def get(self, sha256: str) -> Optional[ParsedDocument]:
+        path = self._path(sha256)
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                header = json.loads(f.readline())
+                pages = [ParsedPage(**json.loads(line)) for line in f]
+            mark_access(path)
+            return ParsedDocument(
+                sha256=sha256,
+                page_count=header["page_count"],
+                metadata=header.get("metadata") or {},
+                pages=pages,
+            )
+        except Exception as e:
+            # A corrupt entry is treated as a miss and overwritten on the next put.
+            log.warning(f"Discarding unreadable parse cache entry {path}: {e}")
+            return None
+
+    def put(self, parsed: ParsedDocument) -> None:
+        path = self._path(parsed.sha256)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        header = {
+            "version": EXTRACTOR_VERSION,
+            "page_count": parsed.page_count,
+            "metadata": parsed.metadata,
+        }
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            for page in parsed.pages:
+                f.write(json.dumps(asdict(page), ensure_ascii=False) + "\n")
+        os.replace(tmp_path, path)
+
+
+_default_cache: Optional[ParseCache] = None
+
+
+def get_parse_cache() -> ParseCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ParseCache()
+    return _default_cache
+
+
+def _extract(doc: "fitz.Document", sha256: str) -> ParsedDocument:
+    if doc.is_encrypted:
+        raise ValueError("PDF is encrypted")
+    pages = []
+    for page_num in range(doc.page_count):
+        page = doc.load_page(page_num)
+        pages.append(
+            ParsedPage(
+                page=page_num,
+                label=page.get_label() or str(page_num + 1),
+                text=page.get_text(),  # type: ignore
+                width=page.rect.width,
+                height=page.rect.height,
+            )
+        )
+    metadata = {k: v for k, v in (doc.metadata or {}).items() if v}
+    return ParsedDocument(
+        sha256=sha256, page_count=doc.page_count, metadata=metadata, pages=pages
+    )
+
+
+def parse_pdf(
+    source: Union[str, Path, bytes], cache: Optional[ParseCache] = None
+) -> ParsedDocument:
+    """
+    Return the per-page text of a PDF given as a path or raw bytes.
+    The PDF is parsed at most once per content hash; later calls read the cache.
+    """
+    cache = cache or get_parse_cache()
+    sha256 = sha256_of(source)
+    parsed = cache.get(sha256)
+    if parsed is not None:
+        CACHE_EVENTS.labels("parse", "hit").inc()
+        log.info("Parse cache hit", sha256=sha256, pages=parsed.page_count)
+        return parsed
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        doc = fitz.open(stream=source, filetype="pdf")
+    else:
+        doc = fitz.open(source)
+    with doc:
+        parsed = _extract(doc, sha256)
+    cache.put(parsed)
+    CACHE_EVENTS.labels("parse", "miss").inc()
+    log.info("Parse cache miss", sha256=sha256, pages=parsed.page_count)
+    return parsed
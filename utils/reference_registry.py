@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import re
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from logger.custom_logger import CustomLogger
+from utils.config_loader import load_config
+from utils.index_store import file_lock
+from utils.parse_cache import ParseCache, ParsedDocument, parse_pdf, sha256_of
+
+log = CustomLogger().get_logger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+PAGES_DIR = "pages"
+_REFERENCE_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$")
+
+
+def page_hashes(parsed: ParsedDocument) -> List[str]:
+    """Per-page hashes of the text with whitespace normalized."""
+    return [
+        hashlib.sha256(" ".join(page.text.split()).encode("utf-8")).hexdigest()
+        for page in parsed.pages
+    ]
+
+
+def unchanged_rows(parsed: ParsedDocument) -> List[Dict[str, str]]:
+    """Comparison rows for a document whose every page matches the reference."""
+    return [
+        {"Page": str(page.page + 1), "Changes": "NO CHANGE"} for page in parsed.pages
+    ]
+
+
+def reference_id_for(file_name: str) -> str:
+    """Default reference id derived from an uploaded file name."""
+    stem = re.sub(r"[^A-Za-z0-9._-]+", "-", Path(file_name).stem).strip("-._")
+    return stem[:64] or uuid.uuid4().hex[:8]
+
+
+class ReferenceRegistry:
+    """
+    Reference PDFs stored once and compared against many times. Each
+    reference id keeps numbered versions: the PDF, its content hash and
+    per-page text hashes in <root>/<id>/manifest.json, and the parsed pages
+    in a parse cache under <root>/pages that the storage sweeper never
+    touches, so comparing against a stored version parses nothing.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        cfg = load_config().get("references", {})
+        self.root = Path(
+            root
+            or os.getenv("REFERENCE_REGISTRY_DIR", cfg.get("path", "data/references"))
+        )
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.pages = ParseCache(str(self.root / PAGES_DIR))
+
+    def _dir(self, reference_id: str) -> Path:
+        if not _REFERENCE_ID.match(reference_id) or reference_id == PAGES_DIR:
+            raise ValueError(f"Invalid reference id: {reference_id!r}")
+        return self.root / reference_id
+
+    def _read_manifest(self, reference_id: str) -> Optional[Dict[str, Any]]:
+        path = self._dir(reference_id) / MANIFEST_FILE
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _write_manifest(self, reference_id: str, manifest: Dict[str, Any]) -> None:
+        path = self._dir(reference_id) / MANIFEST_FILE
+        tmp_path = path.with_name(f"{MANIFEST_FILE}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def add(
+        self, file_name: str, data: bytes, reference_id: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Store data as the next version of reference_id (default: derived from
+        file_name). Returns (version record, created); re-uploading content
+        that is already a version returns that version with created False.
+        """
+        if not file_name.lower().endswith(".pdf"):
+            raise ValueError("Only PDF files are allowed.")
+        reference_id = reference_id or reference_id_for(file_name)
+        folder = self._dir(reference_id)
+        sha256 = sha256_of(data)
+        with file_lock(folder):
+            manifest = self._read_manifest(reference_id) or {
+                "reference_id": reference_id,
+                "versions": [],
+            }
+            for record in manifest["versions"]:
+                if record["sha256"] == sha256:
+                    return record, False
+            parsed = parse_pdf(data, cache=self.pages)
+            version = len(manifest["versions"]) + 1
+            stored = folder / f"v{version}.pdf"
+            stored.write_bytes(data)
+            record = {
+                "reference_id": reference_id,
+                "version": version,
+                "file_name": file_name,
+                "sha256": sha256,
+                "page_count": parsed.page_count,
+                "page_hashes": page_hashes(parsed),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            }
+            manifest["versions"].append(record)
+            self._write_manifest(reference_id, manifest)
+        log.info(
+            "Reference version stored",
+            reference_id=reference_id,
+            version=version,
+            pages=parsed.page_count,
+        )
+        return record, True
+
+    def get(self, reference_id: str, version: Optional[int] = None) -> Dict[str, Any]:
+        """Version record of reference_id (latest by default); KeyError if unknown."""
+        manifest = self._read_manifest(reference_id)
+        if not manifest or not manifest["versions"]:
+            raise KeyError(f"Unknown reference: {reference_id}")
+        if version is None:
+            return manifest["versions"][-1]
+        for record in manifest["versions"]:
+            if record["version"] == version:
+                return record
+        raise KeyError(f"Unknown version {version} of reference {reference_id}")
+
+    def load(
+        self, reference_id: str, version: Optional[int] = None
+    ) -> Tuple[Dict[str, Any], ParsedDocument]:
+        """Version record and parsed pages, re-parsed only after an extractor upgrade."""
+        record = self.get(reference_id, version)
+        parsed = self.pages.get(record["sha256"])
+        if parsed is None:
+            stored = self._dir(reference_id) / f"v{record['version']}.pdf"
+            parsed = parse_pdf(stored, cache=self.pages)
+        return record, parsed
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Latest version record of every reference, without page hashes."""
+        references = []
+        for folder in sorted(self.root.iterdir()):
+            if folder.name == PAGES_DIR or not (folder / MANIFEST_FILE).exists():
+                continue
+            manifest = self._read_manifest(folder.name)
+            if manifest and manifest["versions"]:
+                latest = dict(manifest["versions"][-1])
+                latest.pop("page_hashes", None)
+                references.append({**latest, "versions": len(manifest["versions"])})
+        return references
+
+
+_default_registry: Optional[ReferenceRegistry] = None
+
+
+def get_reference_registry() -> ReferenceRegistry:
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ReferenceRegistry()
+    return _default_registry
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from logger.custom_logger import CustomLogger
+from utils.config_loader import load_config
+from utils.metrics import CACHE_EVENTS
+
+log = CustomLogger().get_logger(__name__)
+
+
+def schema_fingerprint(pydantic_model) -> str:
+    """Short hash of a pydantic model's JSON schema, so schema edits invalidate entries."""
+    schema = json.dumps(pydantic_model.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()[:16]
+
+
+def llm_result_key(
+    namespace: str,
+    doc_hashes: Iterable[str],
+    llm_identity: str,
+    prompt_version: str,
+    schema: str,
+) -> str:
+    """Cache key for an LLM result over one or more documents (order matters)."""
+    material = json.dumps(
+        {
+            "ns": namespace,
+            "docs": list(doc_hashes),
+            "llm": llm_identity,
+            "prompt": prompt_version,
+            "schema": schema,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent SQLite cache of JSON-serializable LLM results with TTL and
+    least-recently-used eviction once the stored payloads exceed max_bytes.
+    Safe to share between uvicorn workers (WAL mode, one connection per call).
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        cfg = config if config is not None else load_config().get("result_cache", {})
+        self.enabled = cfg.get("enabled", True)
+        self.path = Path(
+            os.getenv("RESULT_CACHE_PATH", cfg.get("path", "data/result_cache.sqlite3"))
+        )
+        self.ttl_seconds = float(cfg.get("ttl_hours", 168)) * 3600
+        self.max_bytes = int(cfg.get("max_bytes", 256 * 1024 * 1024))
+        if self.enabled:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    " key TEXT PRIMARY KEY, namespace TEXT, value TEXT,"
+                    " size INTEGER, created REAL, accessed REAL)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS results_accessed ON results(accessed)"
+                )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:  # commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, namespace: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (key, namespace, payload, len(payload), now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM results WHERE created < ?", (now - self.ttl_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM results ORDER BY accessed ASC"
+        ):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM results WHERE key = ?", victims)
+        log.info("Result cache evicted entries", count=len(victims))
+
+    def lookup(self, key: str, namespace: str) -> Optional[Any]:
+        """get() that counts hits/misses and treats a storage error as a miss."""
+        try:
+            cached = self.get(key)
+        except sqlite3.Error as e:
+            log.warning("Result cache read failed", error=str(e))
+            cached = None
+        CACHE_EVENTS.labels(namespace, "miss" if cached is None else "hit").inc()
+        return cached
+
+    def store(self, key: str, namespace: str, value: Any) -> None:
+        """put() that logs and ignores storage errors; caching is best effort."""
+        try:
+            self.put(key, namespace, value)
+        except sqlite3.Error as e:
+            log.warning("Result cache write failed", error=str(e))
+
+    def get_or_compute(
+        self, key: str, namespace: str, compute: Callable[[], Any]
+    ) -> Tuple[Any, bool]:
+        """Return (value, cache_hit). compute() must return a JSON-serializable value."""
+        cached = self.lookup(key, namespace)
+        if cached is not None:
+            return cached, True
+        value = compute()
+        self.store(key, namespace, value)
+        return value, False
+
+
+_default_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
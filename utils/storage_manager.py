@@ -0,0 +1,230 @@
+import os
+import shutil
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from logger.custom_logger import CustomLogger
+from utils.config_loader import load_config
+from utils.metrics import STORAGE_EVICTED, STORAGE_RECLAIMED_BYTES
+
+log = CustomLogger().get_logger(__name__)
+
+_lease_lock = threading.Lock()
+_leases: Dict[str, int] = defaultdict(int)
+
+
+def _key(path) -> str:
+    return str(Path(path).resolve())
+
+
+@contextmanager
+def lease(path):
+    """
+    Mark a session directory (or cache entry) as in use for the duration of the block.
+    The sweeper never evicts a leased path; the access time is refreshed on entry.
+    """
+    key = _key(path)
+    with _lease_lock:
+        _leases[key] += 1
+    mark_access(path)
+    try:
+        yield
+    finally:
+        with _lease_lock:
+            _leases[key] -= 1
+            if _leases[key] <= 0:
+                del _leases[key]
+
+
+def is_leased(path) -> bool:
+    key = _key(path)
+    with _lease_lock:
+        return any(k == key or k.startswith(key + os.sep) for k in _leases)
+
+
+def mark_access(path) -> None:
+    """Record an access by bumping the path's mtime; atime is unreliable on most mounts."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _scan(entry: Path) -> Tuple[int, float]:
+    """Total size in bytes and most recent mtime of an entry and everything under it."""
+    st = entry.stat()
+    if not entry.is_dir():
+        return st.st_size, st.st_mtime
+    size, last = 0, st.st_mtime
+    for root, dirs, files in os.walk(entry):
+        for name in dirs:
+            try:
+                last = max(last, os.stat(os.path.join(root, name)).st_mtime)
+            except OSError:
+                continue
+        for name in files:
+            try:
+                fst = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            size += fst.st_size
+            last = max(last, fst.st_mtime)
+    return size, last
+
+
+def last_access(entry: Path) -> float:
+    return _scan(entry)[1]
+
+
+class StorageArea:
+    """
+    A directory whose children at entry_depth are evictable units of the given
+    kind: "dirs" for one folder per session, "files" for one file per cache entry.
+    Entries of the other kind or not matching pattern (e.g. sample files checked
+    into data/) are ignored.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        path: str,
+        max_bytes: Optional[int] = None,
+        ttl_hours: Optional[float] = None,
+        entry_depth: int = 1,
+        kind: str = "dirs",
+        pattern: str = "*",
+    ):
+        self.name = name
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_hours * 3600 if ttl_hours else None
+        self.entry_depth = entry_depth
+        self.kind = kind
+        self.pattern = pattern
+
+    def entries(self) -> List[Path]:
+        if not self.path.is_dir():
+            return []
+        level = [self.path]
+        for _ in range(self.entry_depth):
+            level = [c for p in level if p.is_dir() for c in p.iterdir()]
+        want_dirs = self.kind == "dirs"
+        return [
+            e
+            for e in level
+            if e.is_dir() == want_dirs and fnmatch(e.name, self.pattern)
+        ]
+
+
+class StorageSweeper:
+    """
+    Background sweeper enforcing per-area TTLs and byte quotas.
+
+    Entries are evicted least-recently-accessed first. Leased entries and entries
+    touched within min_idle_seconds (which covers requests running in other
+    workers) are never removed.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        cfg = config if config is not None else load_config().get("storage", {})
+        self.interval = float(cfg.get("sweep_interval_seconds", 300))
+        self.min_idle = float(cfg.get("min_idle_seconds", 600))
+        self.areas = [
+            StorageArea(
+                name=name,
+                path=area["path"],
+                max_bytes=area.get("max_bytes"),
+                ttl_hours=area.get("ttl_hours"),
+                entry_depth=area.get("entry_depth", 1),
+                kind=area.get("kind", "dirs"),
+                pattern=area.get("pattern", "*"),
+            )
+            for name, area in (cfg.get("areas") or {}).items()
+        ]
+        self.reclaimed_bytes: Dict[str, int] = defaultdict(int)
+        self.evicted_entries: Dict[str, int] = defaultdict(int)
+        self.last_sweep_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _evict(self, area: StorageArea, entry: Path, size: int, reason: str) -> None:
+        if entry.is_dir():
+            shutil.rmtree(entry, ignore_errors=True)
+        else:
+            entry.unlink(missing_ok=True)
+        self.reclaimed_bytes[area.name] += size
+        self.evicted_entries[area.name] += 1
+        STORAGE_RECLAIMED_BYTES.labels(area.name).inc(size)
+        STORAGE_EVICTED.labels(area.name).inc()
+        log.info(
+            f"Evicted storage entry area={area.name} path={entry} bytes={size} reason={reason}"
+        )
+
+    def sweep_area(self, area: StorageArea, now: Optional[float] = None) -> int:
+        """Sweep one area and return the number of bytes reclaimed."""
+        now = now or time.time()
+        before = self.reclaimed_bytes[area.name]
+        scanned = []
+        for entry in area.entries():
+            try:
+                size, accessed = _scan(entry)
+            except FileNotFoundError:
+                continue
+            scanned.append((accessed, size, entry))
+        total = sum(size for _, size, _ in scanned)
+
+        # Oldest access first so quota eviction removes the coldest entries.
+        for accessed, size, entry in sorted(scanned, key=lambda x: x[0]):
+            if is_leased(entry) or now - accessed < self.min_idle:
+                continue
+            if area.ttl_seconds and now - accessed > area.ttl_seconds:
+                self._evict(area, entry, size, "ttl")
+                total -= size
+            elif area.max_bytes is not None and total > area.max_bytes:
+                self._evict(area, entry, size, "quota")
+                total -= size
+        return self.reclaimed_bytes[area.name] - before
+
+    def sweep_once(self) -> Dict[str, int]:
+        start = time.perf_counter()
+        report = {}
+        for area in self.areas:
+            try:
+                report[area.name] = self.sweep_area(area)
+            except Exception as e:
+                log.error(f"Storage sweep failed area={area.name} error={e}")
+        self.last_sweep_seconds = time.perf_counter() - start
+        return report
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "reclaimed_bytes": dict(self.reclaimed_bytes),
+            "evicted_entries": dict(self.evicted_entries),
+            "last_sweep_seconds": self.last_sweep_seconds,
+        }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sweep_once()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="storage-sweeper", daemon=True
+        )
+        self._thread.start()
+        log.info(
+            f"Storage sweeper started interval={self.interval}s areas={[a.name for a in self.areas]}"
+        )
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
@@ -0,0 +1,269 @@
+import inspect
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from logger.custom_logger import CustomLogger
+from utils.config_loader import load_config
+
+log = CustomLogger().get_logger(__name__)
+
+# faiss_db.precision -> scalar quantizer type; "float32" keeps IndexFlatL2.
+QUANTIZER_TYPES = {
+    "float16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+# Full-precision copy of the vectors, row i = FAISS position i, saved next to
+# index.faiss and memory-mapped on load so re-ranking only pages in candidates.
+SIDECAR_SUFFIX = ".f32.npy"
+
+
+def index_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    cfg = config if config is not None else load_config().get("faiss_db", {})
+    precision = os.getenv("FAISS_PRECISION", cfg.get("precision", "float32"))
+    if precision != "float32" and precision not in QUANTIZER_TYPES:
+        raise ValueError(f"Unsupported faiss_db.precision: {precision}")
+    return {
+        "precision": precision,
+        "rerank": bool(cfg.get("rerank", True)),
+        "rerank_factor": int(cfg.get("rerank_factor", 4)),
+    }
+
+
+class RerankingFAISS(FAISS):
+    """
+    FAISS store over a scalar-quantized index (float16 or 8-bit). Searches fetch
+    rerank_factor * k candidates from the compact index and, when the float32
+    sidecar is present, re-rank them by exact L2 distance before returning k.
+    """
+
+    def __init__(self, *args, rerank_factor: int = 4, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rerank_factor = rerank_factor
+        self.exact: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_vectors(
+        cls,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        embedding: Embeddings,
+        metadatas: Optional[Iterable[dict]] = None,
+        precision: str = "sq8",
+        rerank: bool = True,
+        rerank_factor: int = 4,
+    ) -> "RerankingFAISS":
+        texts, vectors = zip(*text_embeddings)
+        matrix = np.asarray(vectors, dtype=np.float32)
+        index = faiss.IndexScalarQuantizer(
+            matrix.shape[1], QUANTIZER_TYPES[precision], faiss.METRIC_L2
+        )
+        index.train(matrix)  # per-dimension ranges for sq8; a no-op for fp16
+        store = cls(
+            embedding,
+            index,
+            InMemoryDocstore(),
+            {},
+            distance_strategy=DistanceStrategy.EUCLIDEAN_DISTANCE,
+            rerank_factor=rerank_factor,
+        )
+        if rerank:
+            store.exact = np.empty((0, matrix.shape[1]), dtype=np.float32)
+        store.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas)
+        return store
+
+    # FAISS.add_texts/add_embeddings/add_documents all funnel through __add.
+    def _FAISS__add(self, texts, embeddings, metadatas=None, ids=None) -> List[str]:
+        embeddings = list(embeddings)
+        add = super()._FAISS__add  # type: ignore[misc]
+        added = add(texts, embeddings, metadatas=metadatas, ids=ids)
+        if self.exact is not None:
+            rows = np.asarray(embeddings, dtype=np.float32)
+            self.exact = np.concatenate([np.asarray(self.exact), rows])
+        return added
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if ids is not None and self.exact is not None:
+            wanted = set(ids)
+            doomed = {
+                i for i, _id in self.index_to_docstore_id.items() if _id in wanted
+            }
+            keep = [i for i in range(len(self.exact)) if i not in doomed]
+            self.exact = np.asarray(self.exact)[keep]
+        return super().delete(ids, **kwargs)
+
+    def save_local(self, folder_path: str, index_name: str = "index") -> None:
+        super().save_local(folder_path, index_name)
+        if self.exact is not None:
+            path = Path(folder_path) / f"{index_name}{SIDECAR_SUFFIX}"
+            tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.asarray(self.exact, dtype=np.float32))
+            os.replace(tmp_path, path)
+
+    def attach_sidecar(self, folder_path: str, index_name: str = "index") -> None:
+        """Memory-map the float32 sidecar saved with the index, if it matches."""
+        sidecar = Path(folder_path) / f"{index_name}{SIDECAR_SUFFIX}"
+        if not sidecar.exists():
+            return
+        exact = np.load(sidecar, mmap_mode="r")
+        if exact.shape[0] == self.index.ntotal:
+            self.exact = exact
+        else:
+            log.warning(
+                "Ignoring float32 sidecar that does not match the index",
+                path=str(sidecar),
+                rows=exact.shape[0],
+                ntotal=self.index.ntotal,
+            )
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Union[Callable, Dict[str, Any]]] = None,
+        fetch_k: int = 20,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        if self.exact is None:
+            return super().similarity_search_with_score_by_vector(
+                embedding, k, filter=filter, fetch_k=fetch_k, **kwargs
+            )
+        vector = np.array([embedding], dtype=np.float32)
+        candidates_k = k * self.rerank_factor
+        if filter is not None:
+            candidates_k = max(candidates_k, fetch_k)
+        _, indices = self.index.search(vector, candidates_k)
+        # Sorted positions keep sidecar reads sequential within the mmap.
+        positions = np.sort(indices[0][indices[0] >= 0])
+        distances = ((self.exact[positions] - vector) ** 2).sum(axis=1)
+        ranked = sorted(zip(distances.tolist(), positions.tolist()))
+
+        filter_func = self._create_filter_func(filter) if filter is not None else None
+        score_threshold = kwargs.get("score_threshold")
+        docs: List[Tuple[Document, float]] = []
+        for distance, position in ranked:
+            doc = self.docstore.search(self.index_to_docstore_id[position])
+            if not isinstance(doc, Document):
+                raise ValueError(f"Could not find document for position {position}")
+            if filter_func is not None and not filter_func(doc.metadata):
+                continue
+            if score_threshold is not None and distance > score_threshold:
+                continue
+            docs.append((doc, distance))
+            if len(docs) == k:
+                break
+        return docs
+
+
+def build_vectorstore(
+    text_embeddings: List[Tuple[str, List[float]]],
+    embedding: Embeddings,
+    metadatas: Optional[List[dict]] = None,
+    settings: Optional[Dict[str, Any]] = None,
+) -> FAISS:
+    """Build a session index with the precision configured under faiss_db."""
+    settings = settings or index_settings()
+    if settings["precision"] == "float32":
+        return FAISS.from_embeddings(text_embeddings, embedding, metadatas=metadatas)
+    return RerankingFAISS.from_vectors(
+        text_embeddings,
+        embedding,
+        metadatas=metadatas,
+        precision=settings["precision"],
+        rerank=settings["rerank"],
+        rerank_factor=settings["rerank_factor"],
+    )
+
+
+def load_vectorstore(
+    folder_path: str, embeddings: Embeddings, index_name: str = "index"
+) -> FAISS:
+    """
+    Load a session index saved by build_vectorstore. The index type on disk
+    decides the class, so indexes built before a precision change still load.
+    """
+    store = FAISS.load_local(
+        folder_path, embeddings, index_name, allow_dangerous_deserialization=True
+    )
+    if not isinstance(store.index, faiss.IndexScalarQuantizer):
+        return store
+    reranking = RerankingFAISS(
+        store.embedding_function,
+        store.index,
+        store.docstore,
+        store.index_to_docstore_id,
+        distance_strategy=store.distance_strategy,
+        rerank_factor=index_settings()["rerank_factor"],
+    )
+    reranking.attach_sidecar(folder_path, index_name)
+    return reranking
+
+
+def search_batch_with_bitmap(
+    store: FAISS,
+    embeddings: List[List[float]],
+    k: int,
+    bitmap: Optional[np.ndarray] = None,
+) -> List[List[Tuple[Document, float]]]:
+    """
+    Top-k for every query vector in one FAISS search over the whole matrix.
+    bitmap (packed little-endian, see utils.metadata_index) restricts the
+    search to its rows through an id selector, so excluded rows are never
+    scored; None searches every row.
+    """
+    vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+    if getattr(store, "_normalize_L2", False):
+        faiss.normalize_L2(vectors)
+    exact = getattr(store, "exact", None)
+    fetch = k * store.rerank_factor if exact is not None else k
+    params = None
+    if bitmap is not None:
+        selector = faiss.IDSelectorBitmap(store.index.ntotal, faiss.swig_ptr(bitmap))
+        params = faiss.SearchParameters(sel=selector)
+    distances, indices = store.index.search(vectors, fetch, params=params)
+
+    results = []
+    for vector, row_distances, row_indices in zip(vectors, distances, indices):
+        found = row_indices >= 0
+        ranked = list(zip(row_distances[found].tolist(), row_indices[found].tolist()))
+        if exact is not None:
+            positions = np.sort(row_indices[found])
+            exact_distances = ((exact[positions] - vector) ** 2).sum(axis=1)
+            ranked = sorted(zip(exact_distances.tolist(), positions.tolist()))[:k]
+        results.append(
+            [
+                (store.docstore.search(store.index_to_docstore_id[position]), score)
+                for score, position in ranked
+            ]
+        )
+    return results
+
+
+def search_with_bitmap(
+    store: FAISS,
+    embedding: List[float],
+    k: int,
+    bitmap: Optional[np.ndarray],
+) -> List[Tuple[Document, float]]:
+    """Single-query form of search_batch_with_bitmap."""
+    return search_batch_with_bitmap(store, [embedding], k, bitmap)[0]
+
+
+def embed_queries(embeddings: Embeddings, queries: List[str]) -> List[List[float]]:
+    """
+    Embed many queries in one call. embed_documents batches, but providers
+    with task types (Google) must be told these are queries, not documents.
+    """
+    if "task_type" in inspect.signature(embeddings.embed_documents).parameters:
+        return embeddings.embed_documents(queries, task_type="RETRIEVAL_QUERY")
+    return embeddings.embed_documents(queries)
@@ -0,0 +1,112 @@
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from logger.custom_logger import CustomLogger
+from utils.index_store import current_generation, get_index_cache
+
+log = CustomLogger().get_logger(__name__)
+
+# (name, function, required): a failed required step keeps the process unready.
+WarmupStep = Tuple[str, Callable[[], Any], bool]
+
+
+class Warmup:
+    """
+    Startup work run once per process before it reports ready: loading
+    models, building the shared chains, preloading indexes and opening
+    provider connections. Steps run in order; a failed optional step is
+    logged and skipped.
+    """
+
+    def __init__(self) -> None:
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def run(self, steps: List[WarmupStep]) -> None:
+        with self._lock:
+            for name, _, required in steps:
+                self.steps[name] = {"status": "pending", "required": required}
+        started = time.perf_counter()
+        for name, fn, _ in steps:
+            with self._lock:
+                self.steps[name]["status"] = "running"
+            start = time.perf_counter()
+            try:
+                result = fn()
+                update = {"status": "ok"}
+                # Counts and the like are reported; built objects are not.
+                if isinstance(result, (int, float, str)):
+                    update["result"] = result
+            except Exception as e:
+                log.error("Warm-up step failed", step=name, error=str(e))
+                update = {"status": "failed", "error": str(e)}
+            update["seconds"] = round(time.perf_counter() - start, 3)
+            with self._lock:
+                self.steps[name].update(update)
+        self._done.set()
+        log.info(
+            "Warm-up finished",
+            ready=self.ready,
+            seconds=round(time.perf_counter() - started, 3),
+        )
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return self.done and all(
+                step["status"] == "ok"
+                for step in self.steps.values()
+                if step["required"]
+            )
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            steps = {name: dict(step) for name, step in self.steps.items()}
+        if self.ready:
+            state = "ready"
+        elif self.done:
+            state = "failed"
+        else:
+            state = "warming"
+        return {"status": state, "steps": steps}
+
+
+def recent_index_dirs(faiss_base: str, limit: int) -> List[Path]:
+    """The limit most recently used session indexes under faiss_base."""
+    base = Path(faiss_base)
+    if limit <= 0 or not base.is_dir():
+        return []
+    # Queries bump the session folder's mtime (storage_manager.mark_access).
+    dirs = [d for d in base.iterdir() if d.is_dir() and current_generation(d)]
+    dirs.sort(key=lambda d: d.stat().st_mtime, reverse=True)
+    return dirs[:limit]
+
+
+def preload_indexes(faiss_base: str, limit: int, embeddings: Embeddings) -> int:
+    """Load recent session indexes into the index cache; returns how many loaded."""
+    loaded = 0
+    for index_dir in recent_index_dirs(faiss_base, limit):
+        try:
+            get_index_cache().get(index_dir, embeddings)
+            loaded += 1
+        except Exception as e:
+            log.warning("Index preload failed", index_dir=str(index_dir), error=str(e))
+    return loaded
+
+
+def prime_providers(embeddings: Embeddings, llm: Any) -> None:
+    """One tiny call per provider so TLS and HTTP connections are open."""
+    embeddings.embed_query("warm-up")
+    llm.invoke("Reply with OK.")